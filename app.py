@@ -1,167 +1,475 @@
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, Response, BackgroundTasks, WebSocket, WebSocketDisconnect, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, validator, Field
 import time
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Literal, Set, Tuple
 from datetime import datetime, timedelta
-from croniter import croniter
 import pytz
 from pathlib import Path
 import database as db
-from database import AlertType, to_utc, from_db_datetime
+from database import AlertType, RecentAlerts, to_utc, from_db_datetime
 import platform
 import socket
 import json
+import hashlib
+import os
 import asyncio
 from contextlib import asynccontextmanager
+from scheduler import DeadlineScheduler
+from events import ChangeFeed
+from incidents import coalesce_alerts, summarize
+from leader import LeaderElection
+import metrics
+import retention
+import schedules
+from sketches import DurationStats
 
-# Background task for checking job issues
-async def check_job_issues():
-    while True:
-        try:
-            current_time = datetime.now(pytz.UTC)
-            
-            # Check for missed jobs
-            jobs = db.get_all_job_configs()
-            for job in jobs:
-                # Skip paused jobs
-                if job.get('paused', False):
-                    continue
-                
-                # Skip heartbeat jobs for missed job checks
-                if not job.get('max_runtime_minutes'):
-                    continue
-                
-                # Handle sub-minute schedules
-                if ' * *' in job['schedule']:  # Check if it's a sub-minute schedule
-                    seconds = int(job['schedule'].split()[0].strip('*/'))
-                    if seconds < 60:
-                        # For sub-minute schedules, check if we've missed the last expected run
-                        last_run = db.get_latest_job_run(job['job_id'])
-                        last_run_time = last_run['start_time'] if last_run else None
-                        
-                        if not last_run_time:
-                            expected_time = current_time - timedelta(seconds=seconds)
-                        else:
-                            expected_time = last_run_time + timedelta(seconds=seconds)
-                        
-                        # Calculate the tolerance window
-                        tolerance_minutes = job.get('tolerance_minutes', 0)  # Default to 0 if not set
-                        if tolerance_minutes is None:
-                            tolerance_minutes = 0
-                        tolerance = timedelta(minutes=tolerance_minutes)
-                        window_end = expected_time + tolerance
-                        
-                        # If we're past the window end and there's no run recorded
-                        if current_time > window_end and (
-                            not last_run_time or 
-                            last_run_time < expected_time
-                        ):
-                            # Check if alert already exists for this expected start time
-                            if not db.has_existing_alert(job['job_id'], expected_time, AlertType.MISSED_JOB):
-                                alert_message = (
-                                    f"Job {job['job_id']} missed its scheduled run. "
-                                    f"Expected at {format_time_with_cst(expected_time)}, "
-                                    f"tolerance window ended at {format_time_with_cst(window_end)}."
-                                )
-                                db.add_job_alert(
-                                    job_id=job['job_id'],
-                                    alert_type=AlertType.MISSED_JOB,
-                                    alert_message=alert_message,
-                                    expected_start_time=expected_time
-                                )
-                        continue
-                
-                # Handle regular cron schedules
-                # Get the last run time for this job
-                last_run = db.get_latest_job_run(job['job_id'])
-                last_run_time = last_run['start_time'] if last_run else None
-                
-                # Get the most recent expected run time according to the schedule
-                cron = croniter(job['schedule'], current_time)
-                expected_time = to_utc(cron.get_prev(datetime))
-                
-                # Calculate the tolerance window
-                tolerance_minutes = job.get('tolerance_minutes', 0)  # Default to 0 if not set
-                if tolerance_minutes is None:
-                    tolerance_minutes = 0
-                tolerance = timedelta(minutes=tolerance_minutes)
-                window_end = expected_time + tolerance
-                
-                # If we're past the window end and there's no run recorded
-                if current_time > window_end and (
-                    not last_run_time or 
-                    last_run_time < expected_time
-                ):
-                    # Check if alert already exists for this expected start time
-                    if not db.has_existing_alert(job['job_id'], expected_time, AlertType.MISSED_JOB):
-                        alert_message = (
-                            f"Job {job['job_id']} missed its scheduled run. "
-                            f"Expected at {format_time_with_cst(expected_time)}, "
-                            f"tolerance window ended at {format_time_with_cst(window_end)}."
-                        )
-                        db.add_job_alert(
-                            job_id=job['job_id'],
-                            alert_type=AlertType.MISSED_JOB,
-                            alert_message=alert_message,
-                            expected_start_time=expected_time
-                        )
-            
-            # Check for long-running jobs
-            running_jobs = db.get_running_jobs()
-            for job in running_jobs:
-                # Skip heartbeat jobs for long-running checks
-                if not job.get('max_runtime_minutes'):
+# Deadline kinds tracked per job by the checker
+MISSED_DEADLINE = 'missed'
+LONG_RUNNING_DEADLINE = 'long_running'
+
+# How often the checker rebuilds every deadline from the database, as a safety
+# net; writes by other workers are followed within WORKER_SYNC_SECONDS
+CHECKER_RESYNC_SECONDS = float(os.environ.get('CRONICLE_CHECKER_RESYNC_SECONDS', 300))
+
+scheduler = DeadlineScheduler()
+
+# Deadlines that come due within this many seconds of the checker starting
+# are held back until then, so clients can report in after downtime
+CHECKER_GRACE_SECONDS = float(os.environ.get('CRONICLE_CHECKER_GRACE_SECONDS', 60))
+
+# When this process started checking; alerts about earlier start times
+# happened while no checker was running
+checker_started = datetime.now(pytz.UTC)
+
+# Most expected runs one missed-run check alerts on. After a longer outage
+# only the latest are checked, so catching up stays cheap per job.
+CATCH_UP_MAX_RUNS = int(os.environ.get('CRONICLE_CATCH_UP_MAX_RUNS', 100))
+
+# Jobs caught up on between yields to the event loop
+CATCH_UP_YIELD_JOBS = 20
+
+# Latest expected start per job that has already been satisfied or alerted
+# on; persisted in job_checks so that a restarted checker catches up
+handled_through: Dict[str, datetime] = {}
+
+# Data changes pushed to dashboard clients over /ws
+change_feed = ChangeFeed()
+
+# How often each worker looks for writes committed by the other workers, and
+# how often at most it then tells its dashboard clients to reload
+WORKER_SYNC_SECONDS = float(os.environ.get('CRONICLE_WORKER_SYNC_SECONDS', 0.5))
+CHANGE_FEED_RESET_SECONDS = float(os.environ.get('CRONICLE_CHANGE_FEED_RESET_SECONDS', 2))
+
+def missed_after(job: dict) -> timedelta:
+    """How long after an expected start a run that has not started counts as missed"""
+    return timedelta(minutes=job.get('tolerance_minutes') or 0, seconds=job.get('jitter_seconds') or 0)
+
+def scheduled_runs(job: dict, last_run_time: Optional[datetime], current_time: datetime) -> Tuple[Optional[datetime], datetime]:
+    """The job's latest scheduled start before current_time (None if unknown) and its next one.
+
+    Interval schedules count from the job's latest run.
+    """
+    schedule = schedules.for_job(job)
+    if schedule.kind == schedules.INTERVAL:
+        return schedule.prev_fire(current_time, last_run_time), schedule.next_fire(current_time, last_run_time)
+    return schedule.prev_fire(current_time), schedule.next_fire(current_time)
+
+def next_expected_run(job: dict, last_run_time: Optional[datetime], current_time: datetime) -> Optional[datetime]:
+    """Return the next expected start the missed-run check has to wait for"""
+    handled = handled_through.get(job['job_id'])
+    if job.get('schedule_kind') == schedules.INTERVAL:
+        base = last_run_time or handled or current_time
+        expected_time = base + timedelta(seconds=job['interval_seconds'])
+        # Only the first missed interval after a run is alerted on
+        if handled and handled >= expected_time:
+            return None
+        return expected_time
+    
+    if handled:
+        # Every expected run since the watermark (or the job's last run)
+        # is due, however long ago
+        return schedules.next_fire(job['schedule'], max(handled, last_run_time or handled))
+    prev_run = schedules.prev_fire(job['schedule'], current_time)
+    if not last_run_time or last_run_time < prev_run:
+        return prev_run
+    return schedules.next_fire(job['schedule'], current_time)
+
+def arm_missed_check(job: dict, last_run_time: Optional[datetime], current_time: datetime):
+    """Schedule the missed-run check for the job's next expected start"""
+    # Paused and heartbeat jobs are not checked for missed runs
+    if job.get('paused') or not job.get('max_runtime_minutes'):
+        scheduler.cancel(job['job_id'], MISSED_DEADLINE)
+        return
+    expected_time = next_expected_run(job, last_run_time, current_time)
+    if expected_time is None:
+        scheduler.cancel(job['job_id'], MISSED_DEADLINE)
+        return
+    scheduler.arm(job['job_id'], MISSED_DEADLINE, expected_time + missed_after(job), payload=expected_time)
+
+def arm_long_running_check(job: dict, open_run_starts: List[datetime], after: Optional[datetime] = None):
+    """Schedule the long-running check for the job's earliest open run.
+
+    Runs whose limit expired at or before `after` have already been checked.
+    """
+    # Heartbeat jobs are not checked for long runs
+    if not job.get('max_runtime_minutes'):
+        scheduler.cancel(job['job_id'], LONG_RUNNING_DEADLINE)
+        return
+    max_runtime = timedelta(minutes=job['max_runtime_minutes'])
+    deadlines = [start_time + max_runtime for start_time in open_run_starts]
+    if after:
+        deadlines = [deadline for deadline in deadlines if deadline > after]
+    if deadlines:
+        scheduler.arm(job['job_id'], LONG_RUNNING_DEADLINE, min(deadlines))
+    else:
+        scheduler.cancel(job['job_id'], LONG_RUNNING_DEADLINE)
+
+def expected_runs(job: dict, expected_time: datetime, current_time: datetime) -> Tuple[List[datetime], bool]:
+    """Expected starts from expected_time on whose tolerance window has closed, at most
+    the latest CATCH_UP_MAX_RUNS, and whether earlier ones were left out"""
+    if job.get('schedule_kind') == schedules.INTERVAL:
+        return [expected_time], False
+    times, truncated = schedules.fire_times(
+        job['schedule'], expected_time, current_time - missed_after(job), CATCH_UP_MAX_RUNS
+    )
+    return times or [expected_time], truncated
+
+def find_missed_runs(due: List[Tuple[str, datetime]], configs: dict, latest_starts: dict, current_time: datetime) -> Tuple[List[dict], int]:
+    """Alerts for the expected runs jobs have not started since, and the number of jobs
+    that missed more than CATCH_UP_MAX_RUNS; re-arms each job"""
+    alerts = []
+    truncated_jobs = 0
+    for job_id, expected_time in due:
+        job = configs.get(job_id)
+        if not job:
+            handled_through.pop(job_id, None)
+            continue
+        last_run_time = latest_starts.get(job_id)
+        checked, truncated = expected_runs(job, expected_time, current_time)
+        truncated_jobs += truncated
+        if not job['paused'] and job['max_runtime_minutes']:
+            for expected in checked:
+                if last_run_time and last_run_time >= expected:
                     continue
-                    
-                start_time = job['start_time']
-                runtime = current_time - start_time
-                max_runtime = timedelta(minutes=job['max_runtime_minutes'])
+                # Skip alerts already recorded for this expected start time
+                if RecentAlerts.key(job_id, AlertType.MISSED_JOB, expected) not in db.recent_alerts:
+                    alerts.append({
+                        'job_id': job_id,
+                        'alert_type': AlertType.MISSED_JOB,
+                        'expected_start_time': expected,
+                        'actual_start_time': None,
+                        'schedule': job['schedule'],
+                        'window_end': expected + missed_after(job),
+                    })
+        handled_through[job_id] = checked[-1]
+        arm_missed_check(job, last_run_time, current_time)
+    return alerts, truncated_jobs
+
+def find_long_running(job_ids: List[str], open_runs: List[dict], current_time: datetime) -> List[dict]:
+    """Alerts for every open run of the jobs past its max runtime; re-arms each job"""
+    runs_by_job: Dict[str, List[dict]] = {job_id: [] for job_id in job_ids}
+    for run in open_runs:
+        if run['job_id'] in runs_by_job:
+            runs_by_job[run['job_id']].append(run)
+    alerts = []
+    for job_id, running_jobs in runs_by_job.items():
+        for job in running_jobs:
+            # Skip heartbeat jobs for long-running checks
+            if not job.get('max_runtime_minutes'):
+                continue
                 
-                if runtime > max_runtime:
-                    # Check if long-running alert already exists for this start time
-                    if not db.has_existing_alert(job['job_id'], start_time, AlertType.LONG_RUNNING):
-                        alert_message = (
-                            f"Job {job['job_id']} has been running for {runtime.total_seconds() / 60:.1f} minutes, "
-                            f"exceeding the maximum runtime of {job['max_runtime_minutes']} minutes. "
-                            f"Started at {format_time_with_cst(start_time)}."
-                        )
-                        db.add_job_alert(
-                            job_id=job['job_id'],
-                            alert_type=AlertType.LONG_RUNNING,
-                            alert_message=alert_message,
-                            actual_start_time=start_time
-                        )
-            
-        except Exception as e:
-            print(f"Error in check_job_issues: {str(e)}")
+            start_time = job['start_time']
+            runtime = current_time - start_time
+            if runtime > timedelta(minutes=job['max_runtime_minutes']):
+                # Skip alerts already recorded for this start time
+                if RecentAlerts.key(job_id, AlertType.LONG_RUNNING, start_time) not in db.recent_alerts:
+                    alerts.append({
+                        'job_id': job_id,
+                        'alert_type': AlertType.LONG_RUNNING,
+                        'expected_start_time': None,
+                        'actual_start_time': start_time,
+                        'schedule': None,
+                        'runtime': runtime,
+                        'max_runtime_minutes': job['max_runtime_minutes'],
+                    })
         
-        # Check more frequently for sub-minute schedules
-        await asyncio.sleep(5)  # Check every 5 seconds instead of every minute
+        if running_jobs:
+            arm_long_running_check(running_jobs[0], [job['start_time'] for job in running_jobs], after=current_time)
+    return alerts
 
-# WebSocket connections store
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+def alert_message(alert: dict) -> str:
+    """The message of an alert recorded on its own"""
+    job_id = alert['job_id']
+    if alert['alert_type'] == AlertType.MISSED_JOB:
+        return (
+            f"Job {job_id} missed its scheduled run. "
+            f"Expected at {format_time_with_cst(alert['expected_start_time'])}, "
+            f"tolerance window ended at {format_time_with_cst(alert['window_end'])}."
+        )
+    return (
+        f"Job {job_id} has been running for {alert['runtime'].total_seconds() / 60:.1f} minutes, "
+        f"exceeding the maximum runtime of {alert['max_runtime_minutes']} minutes. "
+        f"Started at {format_time_with_cst(alert['actual_start_time'])}."
+    )
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+async def record_alerts(alerts: List[dict], checked_through: Optional[Dict[str, datetime]] = None):
+    """Record the alerts found at one wakeup, and how far the checked jobs have been
+    checked, in one write, grouping storms into incidents"""
+    found = coalesce_alerts(alerts, checker_started)
+    incident_rows = []
+    for index, incident in enumerate(found):
+        summary = summarize(incident)
+        incident_rows.append({**incident, 'summary': summary})
+        for alert in incident['alerts']:
+            alert['incident'] = index
+            # Part of a storm; the incident says the rest
+            alert['alert_message'] = f"Job {alert['job_id']}: {summary}."
+    for alert in alerts:
+        if 'alert_message' not in alert:
+            alert['alert_message'] = alert_message(alert)
+    result = await db.aio.record_alerts(alerts, incident_rows, checked_through)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    recorded = {
+        (alert['job_id'], alert['alert_type'])
+        for alert, alert_id in zip(alerts, result['alert_ids'])
+        if alert_id is not None
+    }
+    incident_ids = []
+    for incident, incident_id in zip(incident_rows, result['incident_ids']):
+        if incident_id is not None:
+            print(f"Alert incident ({incident['reason']}): {incident['summary']}")
+            incident_ids.append(incident_id)
+    if recorded:
+        await publish_alerts(recorded, incident_ids)
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except WebSocketDisconnect:
-                self.disconnect(connection)
-            except Exception as e:
-                print(f"Error broadcasting to WebSocket: {e}")
+async def on_deadlines(due: List[Tuple[str, str, object]]):
+    """Check every deadline due at one wakeup and record the resulting alerts together"""
+    current_time = datetime.now(pytz.UTC)
+    grace_end = checker_started + timedelta(seconds=CHECKER_GRACE_SECONDS)
+    if current_time < grace_end:
+        # Give clients time to report in after downtime before judging them
+        for job_id, kind, payload in due:
+            scheduler.arm(job_id, kind, grace_end, payload)
+        return
 
-manager = ConnectionManager()
+    missed = [(job_id, payload) for job_id, kind, payload in due if kind == MISSED_DEADLINE]
+    long_running = [job_id for job_id, kind, _ in due if kind == LONG_RUNNING_DEADLINE]
+    alerts = []
+    checked_through = {}
+    if missed:
+        job_ids = [job_id for job_id, _ in missed]
+        configs = await db.aio.get_job_configs(job_ids)
+        latest_starts = await db.aio.get_latest_run_starts(job_ids)
+        truncated_jobs = 0
+        for start in range(0, len(missed), CATCH_UP_YIELD_JOBS):
+            found, truncated = find_missed_runs(missed[start:start + CATCH_UP_YIELD_JOBS], configs, latest_starts, current_time)
+            alerts.extend(found)
+            truncated_jobs += truncated
+            # Catching up on many jobs at once; let request handlers in
+            await asyncio.sleep(0)
+        if truncated_jobs:
+            print(f"{truncated_jobs} jobs missed more than {CATCH_UP_MAX_RUNS} runs; only the latest were checked")
+        checked_through = {job_id: handled_through[job_id] for job_id in job_ids if job_id in handled_through}
+    if long_running:
+        # One job's open runs, or all of them when many jobs are due at once
+        open_runs = await db.aio.get_running_jobs(long_running[0] if len(long_running) == 1 else None)
+        alerts.extend(find_long_running(long_running, open_runs, current_time))
+    if alerts or checked_through:
+        await record_alerts(alerts, checked_through)
+
+async def resync_job_checks():
+    """Rebuild every job's deadlines from the database"""
+    current_time = datetime.now(pytz.UTC)
+    jobs = await db.aio.get_jobs_overview()
+    open_runs: Dict[str, List[datetime]] = {}
+    for run in await db.aio.get_running_jobs():
+        open_runs.setdefault(run['job_id'], []).append(run['start_time'])
+    # Watermarks may have been reset by config changes in other processes
+    handled_through.clear()
+    handled_through.update(await db.aio.get_checked_through())
+    
+    scheduler.clear()
+    for job in jobs:
+        last_run = job['latest_run']
+        arm_missed_check(job, last_run['start_time'] if last_run else None, current_time)
+        arm_long_running_check(job, open_runs.get(job['job_id'], []))
+    
+
+async def follow_job_checks(configs_changed: bool):
+    """Re-arm deadlines after other workers wrote to the database.
+
+    Changed job definitions rebuild every deadline; otherwise only runs they
+    opened are looked up, so their long-running deadlines are armed in time.
+    """
+    if configs_changed:
+        await resync_job_checks()
+        return
+    current_time = datetime.now(pytz.UTC)
+    deadlines: Dict[str, datetime] = {}
+    for run in await db.aio.get_running_jobs():
+        if not run['max_runtime_minutes']:
+            continue
+        deadline = run['start_time'] + timedelta(minutes=run['max_runtime_minutes'])
+        # Runs whose limit has already passed were checked when it did
+        if deadline > current_time and (run['job_id'] not in deadlines or deadline < deadlines[run['job_id']]):
+            deadlines[run['job_id']] = deadline
+    for job_id, deadline in deadlines.items():
+        current = scheduler.deadline(job_id, LONG_RUNNING_DEADLINE)
+        if current is None or deadline.timestamp() < current:
+            scheduler.arm(job_id, LONG_RUNNING_DEADLINE, deadline)
+
+async def refresh_job_checks(job_id: str, restart: bool = False):
+    """Re-arm a job's deadlines after its configuration or runs changed.
+
+    `restart` drops the job's watermark, for jobs created, changed or resumed
+    through the API, whose earlier expected runs are not caught up on.
+    """
+    if not checker_election.is_leader:
+        # The checker runs in another process, which follows our writes
+        return
+    if restart:
+        handled_through.pop(job_id, None)
+    jobs = await db.aio.get_jobs_overview(job_id)
+    if not jobs:
+        scheduler.cancel(job_id)
+        handled_through.pop(job_id, None)
+        return
+    job = jobs[0]
+    last_run = job['latest_run']
+    arm_missed_check(job, last_run['start_time'] if last_run else None, datetime.now(pytz.UTC))
+    arm_long_running_check(job, [run['start_time'] for run in await db.aio.get_running_jobs(job_id)])
+
+def job_started(job: dict, start_time: datetime):
+    """Re-arm a job's deadlines after a run started"""
+    if not checker_election.is_leader:
+        # The checker runs in another process, which follows our writes
+        return
+    arm_missed_check(job, start_time, start_time)
+    if job.get('max_runtime_minutes'):
+        deadline = start_time + timedelta(minutes=job['max_runtime_minutes'])
+        current = scheduler.deadline(job['job_id'], LONG_RUNNING_DEADLINE)
+        if current is None or deadline.timestamp() < current:
+            scheduler.arm(job['job_id'], LONG_RUNNING_DEADLINE, deadline)
+
+def job_ended(job_id: str):
+    """Drop a job's long-running deadline once all its runs have ended"""
+    if not checker_election.is_leader:
+        return
+    scheduler.cancel(job_id, LONG_RUNNING_DEADLINE)
+
+# Background task for checking job issues
+async def check_job_issues():
+    """Sleep until the next missed-run or long-running deadline and check it"""
+    # Alerts recorded before this process became the checker
+    try:
+        await db.aio.load_recent_alerts()
+    except Exception as e:
+        print(f"Error loading recent alerts: {str(e)}")
+    global checker_started
+    checker_started = datetime.now(pytz.UTC)
+    await scheduler.run(on_deadlines, resync_job_checks, CHECKER_RESYNC_SECONDS)
+
+# The alert checker and run retention run in one process among all workers
+checker_election = LeaderElection('checker', [check_job_issues, retention.run_retention])
+
+def job_summary(job: dict, current_time: datetime) -> dict:
+    """Shape an overview row the way GET /jobs returns it"""
+    # Latest run info comes with the overview
+    latest_run = job.pop('latest_run')
+
+    # Calculate next run time
+    _, next_run = scheduled_runs(job, latest_run['start_time'] if latest_run else None, current_time)
+    job['next_scheduled_run'] = next_run.isoformat()
+    
+    job.pop('latest_alert')
+    job.pop('needs_end_signal')
+    job.pop('created_at')
+    if latest_run:
+        job['last_start_time'] = latest_run['start_time'].isoformat() if latest_run['start_time'] else None
+        job['last_end_time'] = latest_run['end_time'].isoformat() if latest_run['end_time'] else None
+    return job
+
+async def publish_job_changes(job_id: str, run_ids: List[int] = ()):
+    """Push a job's /jobs row (None once deleted) and the given runs to dashboard clients"""
+    await publish_changes([job_id], run_ids)
+
+async def publish_changes(job_ids: List[str], run_ids: List[int] = ()):
+    """Push the /jobs rows of several jobs and the given runs to dashboard clients"""
+    if not len(change_feed):
+        # Nobody is listening; skip the queries
+        change_feed.skip()
+        return
+    if run_ids:
+        run_ids = list(dict.fromkeys(run_ids))
+        runs, _ = await db.aio.get_job_runs(limit=len(run_ids), run_ids=run_ids)
+        # Oldest first, so clients that prepend new runs keep them in order
+        for run in reversed(runs):
+            change_feed.publish('run', job_id=run['job_id'], run=jsonable_encoder(run))
+    job_ids = list(dict.fromkeys(job_ids))
+    if len(job_ids) == 1:
+        jobs = await db.aio.get_jobs_overview(job_ids[0])
+    else:
+        jobs = await db.aio.get_jobs_overview()
+    current_time = datetime.now(pytz.UTC)
+    jobs = {job['job_id']: job for job in jobs}
+    for job_id in job_ids:
+        job = job_summary(jobs[job_id], current_time) if job_id in jobs else None
+        change_feed.publish('job', job_id=job_id, job=jsonable_encoder(job))
+
+async def publish_alert(job_id: str, alert_type: AlertType):
+    """Push the job's latest alert of a type, as GET /job_alerts groups it"""
+    await publish_alerts({(job_id, alert_type)})
+
+async def publish_alerts(groups: Set[Tuple[str, AlertType]], incident_ids: List[int] = ()):
+    """Push the latest alert of several jobs and types, and new incidents, in a few queries"""
+    if not len(change_feed):
+        change_feed.skip()
+        return
+    if len(groups) == 1:
+        (job_id, alert_type), = groups
+        alerts = await db.aio.get_job_alerts(job_id, alert_type, include_acknowledged=True)
+    elif groups:
+        alerts = await db.aio.get_job_alerts(include_acknowledged=True)
+    else:
+        alerts = []
+    wanted = {(job_id, alert_type.value) for job_id, alert_type in groups}
+    for alert in alerts:
+        if (alert['job_id'], alert['type']) in wanted:
+            change_feed.publish('alert', job_id=alert['job_id'], alert=jsonable_encoder(alert))
+    if incident_ids:
+        for incident in await db.aio.get_alert_incidents(incident_ids=list(incident_ids)):
+            change_feed.publish('incident', incident=jsonable_encoder(incident))
+
+async def follow_other_workers():
+    """Catch up with writes committed by other workers.
+
+    The feed only carries this process's own changes, so its clients are
+    reset to reload the rest, including the alerts recorded by the checker's
+    worker. If this process runs the checker, it re-arms its deadlines.
+    """
+    seen = checked = db.shared_version.foreign_writes()
+    configs = db.shared_version.configs()
+    last_reset = 0.0
+    while True:
+        await asyncio.sleep(WORKER_SYNC_SECONDS)
+        try:
+            foreign = db.shared_version.foreign_writes()
+            if foreign != checked and checker_election.is_leader:
+                checked = foreign
+                current_configs = db.shared_version.configs()
+                await follow_job_checks(current_configs != configs)
+                configs = current_configs
+        except Exception as e:
+            print(f"Error following other workers: {str(e)}")
+            continue
+        if foreign == seen or time.monotonic() - last_reset < CHANGE_FEED_RESET_SECONDS:
+            continue
+        seen = foreign
+        last_reset = time.monotonic()
+        change_feed.reset()
 
 # Startup and shutdown events manager
 @asynccontextmanager
@@ -171,15 +479,18 @@ async def lifespan(app: FastAPI):
     data_dir.mkdir(exist_ok=True)
     db.init_db()
     
-    # Start background task
-    task = asyncio.create_task(check_job_issues())
+    # Start background tasks; with several workers only the elected one runs them
+    election_task = asyncio.create_task(checker_election.run())
+    follow_task = asyncio.create_task(follow_other_workers())
     yield
-    # Cancel background task
-    task.cancel()
-    try:
-        await task
-    except asyncio.CancelledError:
-        pass
+    # Stop background tasks and hand the lease to another worker
+    for task in (follow_task, election_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    db.close_db()
 
 app = FastAPI(
     title="Cronjob Monitor",
@@ -187,6 +498,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
 # Mount the static directory
 static_path = Path(__file__).parent / "static"
 app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
@@ -203,22 +516,12 @@ class JobConfig(BaseModel):
     )
 
     @validator('schedule')
-    def validate_cron(cls, v):
-        # Handle sub-minute schedules
-        if ' * * * *' in v:
-            try:
-                seconds = int(v.split()[0].strip('*/'))
-                if 0 < seconds < 60:
-                    return v
-            except ValueError:
-                pass
-        
-        # Handle regular cron schedules
+    def validate_schedule(cls, v):
+        # A cron expression or an interval such as '@every 30s'
         try:
-            croniter(v)
-            return v
+            return schedules.parse_schedule(v)['schedule']
         except ValueError as e:
-            raise ValueError(f"Invalid cron expression: {str(e)}")
+            raise ValueError(f"Invalid schedule: {str(e)}")
 
     @validator('max_runtime_minutes')
     def validate_max_runtime(cls, v):
@@ -233,6 +536,17 @@ class JobConfig(BaseModel):
 class JobMetadata(BaseModel):
     metadata: Optional[Dict] = Field(default=None, description="Custom metadata for the job run")
 
+# Largest number of events accepted by POST /jobs/batch
+MAX_BATCH_EVENTS = int(os.environ.get('CRONICLE_MAX_BATCH_EVENTS', 10000))
+# How far ahead of the server's clock an event timestamp may be
+MAX_CLOCK_SKEW_SECONDS = float(os.environ.get('CRONICLE_MAX_CLOCK_SKEW_SECONDS', 60))
+
+class JobEvent(BaseModel):
+    job_id: str
+    event: Literal['start', 'end', 'heartbeat']
+    timestamp: Optional[datetime] = Field(default=None, description="When the event happened; defaults to now")
+    metadata: Optional[Dict] = Field(default=None, description="Custom metadata for the job run")
+
 def format_time_with_cst(dt: datetime) -> str:
     """Format time in both UTC and CST"""
     utc_str = dt.strftime('%I:%M %p %Z')
@@ -249,8 +563,7 @@ def check_schedule(schedule: str, tolerance_minutes: int, current_time: datetime
     current_time_utc = current_time.astimezone(pytz.UTC)
     
     # Get the most recent scheduled time
-    cron = croniter(schedule, current_time_utc)
-    scheduled_time = to_utc(cron.get_prev(datetime))
+    scheduled_time = schedules.prev_fire(schedule, current_time_utc)
     
     # Calculate the time window
     window_start = scheduled_time - timedelta(minutes=tolerance_minutes)
@@ -258,26 +571,71 @@ def check_schedule(schedule: str, tolerance_minutes: int, current_time: datetime
     
     return window_start <= current_time_utc <= window_end
 
+def make_etag(version: str, *parts) -> str:
+    """Weak ETag for a response derived from the data version"""
+    return 'W/"' + '.'.join([version, *map(str, parts)]) + '"'
+
+def request_etag(request: Request, version: str, *parts) -> str:
+    """Weak ETag for a GET response: the data version and the query it answers.
+
+    Parameters are sorted first, so the same query in any order gets the
+    same tag, and a tag never matches a response to a different query.
+    """
+    query = sorted(request.query_params.multi_items())
+    if query:
+        parts = (*parts, hashlib.sha1(json.dumps(query).encode()).hexdigest()[:16])
+    return make_etag(version, *parts)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already names this ETag"""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    return any(tag.strip() in (etag, '*') for tag in header.split(','))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+def set_etag(response: Response, etag: str):
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+
+# /jobs also changes when the clock passes a job's next_scheduled_run, so its
+# last ETag is kept with the data version it was built from and its expiry
+jobs_etag: Optional[Tuple[str, str, float]] = None
+
+# Facts about this server recorded with every run, looked up once
+SERVER_INFO = {
+    'hostname': socket.gethostname(),
+    'os_info': f"{platform.system()} {platform.release()}",
+    'python_version': platform.python_version(),
+    'platform': platform.platform(),
+}
+
 def get_client_info(request: Request) -> dict:
     """Collect client information from the request"""
     client_host = request.client.host if request.client else None
+    headers = request.headers
     
     # Get the X-Forwarded-For header if behind a proxy
-    forwarded_for = request.headers.get("X-Forwarded-For")
+    forwarded_for = headers.get("X-Forwarded-For")
     if forwarded_for:
         # The first IP in X-Forwarded-For is the original client
         client_host = forwarded_for.split(',')[0].strip()
     
     client_info = {
         'ip_address': client_host,
-        'user_agent': request.headers.get("User-Agent"),
-        'hostname': socket.gethostname(),
-        'os_info': f"{platform.system()} {platform.release()}",
+        'user_agent': headers.get("User-Agent"),
+        'hostname': SERVER_INFO['hostname'],
+        'os_info': SERVER_INFO['os_info'],
         'additional_info': {
-            'python_version': platform.python_version(),
-            'platform': platform.platform(),
-            'headers': dict(request.headers),
-            'timestamp': datetime.now().isoformat()
+            'python_version': SERVER_INFO['python_version'],
+            'platform': SERVER_INFO['platform'],
+            # Only the configured headers are looked up, not every header sent
+            'headers': {
+                name: value for name in db.CLIENT_INFO_HEADERS
+                if (value := headers.get(name)) is not None
+            }
         }
     }
     return client_info
@@ -294,41 +652,43 @@ async def start_job(request: Request):
     client_info = get_client_info(request)
     
     # Check if job exists
-    job_config = db.get_job_config(job_id)
+    job_config = await db.aio.get_job_config(job_id)
     if not job_config:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
     # Check if there's already a running job
-    latest_run = db.get_latest_job_run(job_id)
+    latest_run = await db.aio.get_latest_job_run(job_id)
     if latest_run and not latest_run['end_time']:
         raise HTTPException(status_code=400, detail=f"Job {job_id} is already running")
     
     # Check if job should run now
     current_time = datetime.now(pytz.UTC)
-    cron = croniter(job_config['schedule'], current_time)
-    prev_run = to_utc(cron.get_prev(datetime))
-    next_run = to_utc(cron.get_next(datetime))
-    tolerance = timedelta(minutes=job_config['tolerance_minutes'])
-    
-    # Calculate time windows
-    prev_window_start = prev_run - tolerance
-    prev_window_end = prev_run + tolerance
-    next_window_start = next_run - tolerance
-    next_window_end = next_run + tolerance
-    
-    # Check if we're in either window
-    in_prev_window = prev_window_start <= current_time <= prev_window_end
-    in_next_window = next_window_start <= current_time <= next_window_end
-    
     alert = None
-    if not (in_prev_window or in_next_window):
-        alert = (
-            f"Warning: Job started outside scheduled windows. "
-            f"Previous window was {format_time_with_cst(prev_run)} ±{int(tolerance.total_seconds()/60)}min, "
-            f"next window is {format_time_with_cst(next_run)} ±{int(tolerance.total_seconds()/60)}min"
-        )
+    # Interval jobs have no fixed windows; their schedule counts from this run
+    if job_config['schedule_kind'] != schedules.INTERVAL:
+        prev_run, next_run = scheduled_runs(job_config, None, current_time)
+        tolerance = timedelta(minutes=job_config['tolerance_minutes'])
+        
+        # Calculate time windows
+        prev_window_start = prev_run - tolerance
+        prev_window_end = prev_run + tolerance
+        next_window_start = next_run - tolerance
+        next_window_end = next_run + tolerance
+        
+        # Check if we're in either window
+        in_prev_window = prev_window_start <= current_time <= prev_window_end
+        in_next_window = next_window_start <= current_time <= next_window_end
+        
+        if not (in_prev_window or in_next_window):
+            alert = (
+                f"Warning: Job started outside scheduled windows. "
+                f"Previous window was {format_time_with_cst(prev_run)} ±{int(tolerance.total_seconds()/60)}min, "
+                f"next window is {format_time_with_cst(next_run)} ±{int(tolerance.total_seconds()/60)}min"
+            )
     
-    run_id = db.start_job_run(job_id, client_info, alert)
+    run_id = await db.aio.start_job_run(job_id, client_info, alert)
+    job_started(job_config, current_time)
+    await publish_job_changes(job_id, [run_id])
     return {"message": "Job started", "run_id": run_id, "alert": alert}
 
 @app.post("/end_job")
@@ -340,113 +700,262 @@ async def end_job(request: Request):
         raise HTTPException(status_code=400, detail="job_id is required")
     
     # Get job config
-    job_config = db.get_job_config(job_id)
+    job_config = await db.aio.get_job_config(job_id)
     if not job_config:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
     # Get latest run
-    latest_run = db.get_latest_job_run(job_id)
+    latest_run = await db.aio.get_latest_job_run(job_id)
     if not latest_run or latest_run['end_time']:
         raise HTTPException(status_code=400, detail=f"Job {job_id} is not running")
     
-    db.end_job_run(job_id, latest_run['id'])
+    await db.aio.end_job_run(job_id, latest_run['id'])
+    await refresh_job_checks(job_id)
+    await publish_job_changes(job_id, [latest_run['id']])
     return {"message": "Job ended"}
 
 @app.get("/jobs")
-async def list_jobs():
+async def list_jobs(request: Request, response: Response):
     """Get all jobs with their latest status"""
-    jobs = db.get_all_job_configs()
-    current_time = datetime.now(pytz.UTC)
+    global jobs_etag
+    version = db.get_data_version()
+    if jobs_etag:
+        etag, etag_version, expires_at = jobs_etag
+        if etag_version == version and time.time() < expires_at and etag_matches(request, etag):
+            return not_modified(etag)
     
-    for job in jobs:
-        # Calculate next run time
-        cron = croniter(job['schedule'], current_time)
-        next_run = to_utc(cron.get_next(datetime))
-        job['next_scheduled_run'] = next_run.isoformat()
-        
-        # Get latest run info
-        latest_run = db.get_latest_job_run(job['job_id'])
-        if latest_run:
-            job['last_start_time'] = latest_run['start_time'].isoformat() if latest_run['start_time'] else None
-            job['last_end_time'] = latest_run['end_time'].isoformat() if latest_run['end_time'] else None
+    jobs = await db.aio.get_jobs_overview()
+    current_time = datetime.now(pytz.UTC)
+    jobs = [job_summary(job, current_time) for job in jobs]
     
+    expires_at = min(
+        (datetime.fromisoformat(job['next_scheduled_run']).timestamp() for job in jobs),
+        default=float('inf')
+    )
+    etag = request_etag(request, version, int(expires_at) if jobs else 'none')
+    jobs_etag = (etag, version, expires_at)
+    set_etag(response, etag)
     return jobs
 
 @app.post("/jobs")
 async def create_job(job: JobConfig):
     try:
-        db.add_job(
+        await db.aio.add_job(
             job_id=job.job_id,
             schedule=job.schedule,
             tolerance_minutes=job.tolerance_minutes,
             max_runtime_minutes=job.max_runtime_minutes
         )
+        await refresh_job_checks(job.job_id, restart=True)
+        await publish_job_changes(job.job_id)
         return {"message": f"Job {job.job_id} created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/job_status/{job_id}")
 async def get_job_status(job_id: str):
-    status = db.get_job_status(job_id)
+    status = await db.aio.get_job_status(job_id)
     if not status:
         raise HTTPException(status_code=404, detail="Job not found")
     
     # Add next scheduled run information
     current_time = datetime.now(pytz.UTC)
-    cron = croniter(status['schedule'], current_time)
-    next_run = to_utc(cron.get_next(datetime))
-    prev_run = to_utc(cron.get_prev(datetime))
+    prev_run, next_run = scheduled_runs(status, status['last_start'], current_time)
     
     status.update({
         "next_scheduled_run": next_run.isoformat(),
-        "last_scheduled_run": prev_run.isoformat(),
+        "last_scheduled_run": prev_run.isoformat() if prev_run else None,
     })
     
     return status
 
 @app.get("/job_alerts")
 async def get_alerts(
+    request: Request,
+    response: Response,
     job_id: Optional[str] = None,
     alert_type: Optional[str] = None,
     include_acknowledged: bool = False
 ):
     """Get job alerts"""
+    etag = request_etag(request, db.get_data_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
         alert_type_enum = AlertType(alert_type) if alert_type else None
-        return db.get_job_alerts(job_id, alert_type_enum, include_acknowledged)
+        alerts = await db.aio.get_job_alerts(job_id, alert_type_enum, include_acknowledged)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    set_etag(response, etag)
+    return alerts
+
+@app.get("/incidents")
+async def get_incidents(request: Request, response: Response, limit: int = Query(50, ge=1, le=500)):
+    """Get the latest alert incidents, each with the jobs it covers"""
+    etag = request_etag(request, db.get_data_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    incidents = await db.aio.get_alert_incidents(limit)
+    set_etag(response, etag)
+    return incidents
 
 @app.post("/acknowledge_alert/{alert_id}")
 async def acknowledge_alert(alert_id: int):
     """Acknowledge a job alert"""
-    if not db.acknowledge_job_alert(alert_id):
+    if not await db.aio.acknowledge_job_alert(alert_id):
         raise HTTPException(status_code=404, detail="Alert not found")
+    change_feed.publish('alert_acknowledged', alert_id=alert_id)
     return {"status": "success", "message": "Alert acknowledged"}
 
 @app.delete("/jobs/{job_id}")
 async def delete_job(job_id: str):
     """Delete a job configuration and all its related data"""
-    if not db.get_job_config(job_id):
+    if not await db.aio.get_job_config(job_id):
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
-    db.delete_job(job_id)
+    await db.aio.delete_job(job_id)
+    await refresh_job_checks(job_id)
+    await publish_job_changes(job_id)
     return {"message": f"Job {job_id} deleted successfully"}
 
 @app.get("/job_runs")
-def get_job_runs(page: int = 1, per_page: int = 10):
-    """Get the history of job runs with pagination"""
+async def get_job_runs(
+    request: Request,
+    response: Response,
+    per_page: int = Query(10, ge=1, le=500),
+    cursor: Optional[str] = None,
+    job_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Get the history of job runs, newest first.
+
+    Pass the returned `next_cursor` back as `cursor` to fetch the next page.
+    Runs past the retention window only survive as hourly or daily rollups,
+    each `{job_id, granularity, bucket_start, run_count, late_count,
+    duration_count, duration_mean, duration_stddev, duration_min,
+    duration_max, duration_p50, duration_p95, duration_p99}` (durations in
+    minutes). Whenever the selected range reaches back past the window they
+    are merged with the runs by start time, with or without `since`: a page
+    holds at most `per_page` entries across `runs` and `rollups`, and the
+    cursor continues from either. `total` counts every run of the selected
+    job(s), rolled-up ones included; it is omitted when a time range is
+    given, since the counters are not kept per time window.
+    """
+    etag = request_etag(request, db.get_data_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
-        total = db.count_job_runs()
-        runs = db.get_job_runs(offset=(page-1)*per_page, limit=per_page)
-        return {
-            "runs": runs,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page
-        }
+        runs, rollups, next_cursor = await db.aio.get_job_history(
+            limit=per_page, cursor=cursor, job_id=job_id, since=since, until=until
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    total = None if since or until else await db.aio.count_job_runs(job_id)
+    set_etag(response, etag)
+    return {
+        "runs": runs,
+        "total": total,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "rollups": rollups
+    }
+
+async def load_job_stats(
+    job_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict[str, DurationStats]:
+    """All-time duration statistics, or those of the runs started within a range"""
+    if since or until:
+        return await db.aio.get_job_stats_between(job_id, since, until)
+    return await db.aio.get_job_stats([job_id] if job_id else None)
+
+@app.get("/jobs/stats")
+async def get_all_job_stats(
+    request: Request,
+    response: Response,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Run duration statistics (in minutes) for every job and across all jobs.
+
+    Without a range these are all-time figures read from statistics kept up
+    to date as runs end. With `since`/`until` they cover the runs started in
+    that range, including rolled-up ones by the hour or day.
+    """
+    etag = request_etag(request, db.get_data_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    stats = await load_job_stats(since=since, until=until)
+    total = DurationStats()
+    jobs = []
+    for job in await db.aio.get_all_job_configs():
+        durations = stats.get(job['job_id'], DurationStats())
+        total.merge(durations)
+        jobs.append({'job_id': job['job_id'], 'duration': durations.summary()})
+    set_etag(response, etag)
+    return {"jobs": jobs, "total": {"duration": total.summary()}}
+
+@app.get("/jobs/{job_id}/stats")
+async def get_job_stats(
+    job_id: str,
+    request: Request,
+    response: Response,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Run duration statistics (in minutes) for one job; see GET /jobs/stats"""
+    etag = request_etag(request, db.get_data_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if not await db.aio.get_job_config(job_id):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    stats = await load_job_stats(job_id, since, until)
+    set_etag(response, etag)
+    return {"job_id": job_id, "duration": stats.get(job_id, DurationStats()).summary()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Service metrics in the Prometheus text exposition format"""
+    metrics.websocket_connections.set(len(change_feed))
+    metrics.write_queue_depth.set(db.writer.depth())
+    metrics.write_commits.set(db.writer.commits)
+    for state, count in (await db.aio.get_job_state_counts()).items():
+        metrics.jobs.labels(state).set(count)
+    for cache, stats in (
+        ('job_configs', db.job_configs.stats()),
+        ('schedules', schedules.cache.stats()),
+        ('alert_keys', db.recent_alerts.stats()),
+    ):
+        metrics.cache_hits.labels(cache).set(stats['hits'])
+        metrics.cache_misses.labels(cache).set(stats['misses'])
+        metrics.cache_size.labels(cache).set(stats['size'] or 0)
+    return PlainTextResponse(metrics.registry.render(), media_type='text/plain; version=0.0.4')
+
+@app.get("/debug/queries")
+async def get_query_profile(limit: int = Query(20, ge=1, le=1000), sort: str = 'total'):
+    """Statements with the most database time, when CRONICLE_DB_PROFILE is set.
+
+    `sort` is one of total, mean, max or calls. Times are in milliseconds
+    and cover executing each statement and fetching its rows.
+    """
+    if db.query_profiler is None:
+        raise HTTPException(status_code=404, detail="Query profiling is disabled; set CRONICLE_DB_PROFILE=1")
+    try:
+        queries = db.query_profiler.top(limit, sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"slow_query_ms": db.DB_SLOW_QUERY_MS, "queries": queries}
+
+@app.delete("/debug/queries")
+async def reset_query_profile():
+    """Clear the statement aggregates, e.g. before profiling a workload"""
+    if db.query_profiler is None:
+        raise HTTPException(status_code=404, detail="Query profiling is disabled; set CRONICLE_DB_PROFILE=1")
+    db.query_profiler.reset()
+    return {"message": "Query profile reset"}
 
 @app.get("/", response_class=HTMLResponse)
 async def get_html():
@@ -457,7 +966,7 @@ async def get_html():
 @app.post("/jobs/{job_id}/start")
 async def start_job(job_id: str, request: Request, metadata: Optional[JobMetadata] = None):
     try:
-        job = db.get_job_config(job_id)
+        job = await db.aio.get_job_config(job_id)
         if not job:
             raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
         
@@ -471,22 +980,111 @@ async def start_job(job_id: str, request: Request, metadata: Optional[JobMetadat
         if metadata and metadata.metadata:
             client_info['custom_metadata'] = metadata.metadata
         
-        # Record the job start
-        db.record_job_start(job_id, client_info)
-        
-        # For health check jobs (no max runtime), automatically record the end
+        # Health check jobs (no max runtime) record a completed run in one write
         if not job['max_runtime_minutes']:
-            db.record_job_end(job_id)
+            run_ids = await db.aio.record_heartbeat(job_id, client_info)
+            await publish_job_changes(job_id, run_ids)
             return {"status": "success", "message": f"Health check recorded for job {job_id}"}
-            
+        
+        # Record the job start
+        start_time = datetime.now(pytz.UTC)
+        run_id = await db.aio.record_job_start(job_id, client_info)
+        job_started(job, start_time)
+        await publish_job_changes(job_id, [run_id])
         return {"status": "success", "message": f"Job {job_id} started"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jobs/batch")
+async def record_job_events(events: List[JobEvent], request: Request):
+    """Record many start/end/heartbeat events in one request and one commit.
+
+    Events are applied in order and checked against the job configurations
+    like the single-job endpoints; invalid events are reported and skipped
+    without affecting the rest. A start on a health check job counts as a
+    heartbeat. Timestamps more than MAX_CLOCK_SKEW_SECONDS in the future
+    are rejected, as are ends and heartbeats before the start of a run they
+    would close.
+    """
+    if len(events) > MAX_BATCH_EVENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_EVENTS} events per batch")
+    
+    client_info = get_client_info(request)
+    current_time = datetime.now(pytz.UTC)
+    configs = await db.aio.get_job_configs([event.job_id for event in events])
+    
+    results = []
+    accepted = []
+    for index, event in enumerate(events):
+        result = {'index': index, 'job_id': event.job_id, 'event': event.event}
+        results.append(result)
+        job = configs.get(event.job_id)
+        if not job:
+            result.update(status='error', detail=f"Job {event.job_id} not found")
+            continue
+        if job['paused']:
+            result.update(status='error', detail=f"Job {event.job_id} is paused")
+            continue
+        kind = event.event
+        if not job['max_runtime_minutes']:
+            if kind == 'end':
+                result.update(status='error', detail=f"Job {event.job_id} is a health check job and doesn't support manual end")
+                continue
+            kind = 'heartbeat'
+        timestamp = to_utc(event.timestamp) if event.timestamp else current_time
+        if timestamp > current_time + timedelta(seconds=MAX_CLOCK_SKEW_SECONDS):
+            result.update(status='error', detail=f"Timestamp {timestamp.isoformat()} is in the future")
+            continue
+        event_client_info = client_info
+        if event.metadata:
+            event_client_info = {**client_info, 'custom_metadata': event.metadata}
+        accepted.append((result, job, {
+            'job_id': event.job_id,
+            'event': kind,
+            'timestamp': timestamp,
+            'client_info': event_client_info if kind != 'end' else None,
+        }))
+    
+    if accepted:
+        try:
+            run_ids = await db.aio.record_job_events([record for _, _, record in accepted])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        # Backdated starts must not pull the deadlines back before a later start
+        latest_start = {}
+        for _, job, _ in accepted:
+            if job['last_start_time']:
+                latest_start[job['job_id']] = from_db_datetime(job['last_start_time'])
+        for (result, job, record), event_run_ids in zip(accepted, run_ids):
+            if event_run_ids is None:
+                result.update(status='error', detail=f"Job {job['job_id']} has a run that started after {record['timestamp'].isoformat()}")
+                continue
+            result.update(status='ok', run_ids=event_run_ids)
+            if not job['max_runtime_minutes']:
+                continue
+            if record['event'] == 'end':
+                job_ended(job['job_id'])
+            else:
+                start_time = max(record['timestamp'], latest_start.get(job['job_id'], record['timestamp']))
+                latest_start[job['job_id']] = start_time
+                job_started(job, start_time)
+                if record['event'] == 'heartbeat':
+                    job_ended(job['job_id'])
+        await publish_changes(
+            [record['job_id'] for _, _, record in accepted],
+            [run_id for event_run_ids in run_ids if event_run_ids for run_id in event_run_ids]
+        )
+    
+    return {
+        "accepted": sum(result['status'] == 'ok' for result in results),
+        "rejected": sum(result['status'] == 'error' for result in results),
+        "results": results
+    }
+
 @app.post("/jobs/{job_id}/end")
 async def end_job(job_id: str, request: Request):
     try:
-        job = db.get_job_config(job_id)
+        job = await db.aio.get_job_config(job_id)
         if not job:
             raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
             
@@ -496,7 +1094,9 @@ async def end_job(job_id: str, request: Request):
         if job['paused']:
             raise HTTPException(status_code=400, detail=f"Job {job_id} is paused")
 
-        db.record_job_end(job_id)
+        ended_run_ids = await db.aio.record_job_end(job_id)
+        job_ended(job_id)
+        await publish_job_changes(job_id, ended_run_ids)
         return {"status": "success", "message": f"Job {job_id} ended"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -505,11 +1105,13 @@ async def end_job(job_id: str, request: Request):
 async def pause_job(job_id: str):
     """Pause a job configuration"""
     try:
-        job = db.get_job_config(job_id)
+        job = await db.aio.get_job_config(job_id)
         if not job:
             raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
             
-        db.update_job_pause_status(job_id, True)
+        await db.aio.update_job_pause_status(job_id, True)
+        await refresh_job_checks(job_id)
+        await publish_job_changes(job_id)
         return {"message": f"Job {job_id} paused"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -518,24 +1120,43 @@ async def pause_job(job_id: str):
 async def resume_job(job_id: str):
     """Resume a job configuration"""
     try:
-        job = db.get_job_config(job_id)
+        job = await db.aio.get_job_config(job_id)
         if not job:
             raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
             
-        db.update_job_pause_status(job_id, False)
+        await db.aio.update_job_pause_status(job_id, False)
+        await refresh_job_checks(job_id, restart=True)
+        await publish_job_changes(job_id)
         return {"message": f"Job {job_id} resumed"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, feed: Optional[str] = None, since: Optional[int] = None):
+    """Push change-feed events to a dashboard client.
+
+    The first message is a hello with the feed id and sequence number.
+    Clients that reconnect with the `feed` and last `seq` they saw get the
+    events they missed; otherwise, or after a reset message, they reload
+    their state from the REST endpoints.
+    """
+    await websocket.accept()
+    subscription = change_feed.subscribe(feed, since)
+
+    async def send_events():
+        while True:
+            await websocket.send_json(await subscription.get())
+
+    sender = asyncio.create_task(send_events())
     try:
         while True:
-            # Keep the connection alive
+            # Clients only send keepalives; this notices the disconnect
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
+    finally:
+        change_feed.unsubscribe(subscription)
+        sender.cancel()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Request latency under concurrent readers and writers, with and without the async database layer.
+
+Drives the app in-process over ASGI with a mix of dashboard readers
+(GET /jobs, GET /job_runs) and job clients (POST /jobs/{id}/start and /end)
+while the alert checker runs. Each scenario is run twice:
+
+  blocking  database calls made directly on the event loop, as before
+  async     database calls through db.aio (executor reads, writer-thread writes)
+
+A probe task also measures how late the event loop wakes up from a 10ms
+sleep, which is what WebSocket pings and the checker experience.
+
+Usage:
+    python benchmarks/bench_async_db.py --jobs 200 --runs 100000 --readers 16 --writers 16 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Use a scratch database; must be set before database is imported
+os.environ['CRONICLE_DATA_DIR'] = tempfile.mkdtemp(prefix='cronicle-bench-')
+
+import httpx
+
+import database as db
+import app as appmod
+
+
+class BlockingDatabase:
+    """Stand-in for db.aio that calls the database on the event loop"""
+
+    def __getattr__(self, name):
+        func = getattr(db, name)
+
+        async def call(*args, **kwargs):
+            return func(*args, **kwargs)
+
+        return call
+
+    def close(self):
+        pass
+
+
+def seed(jobs: int, runs: int):
+    """Fill the scratch database with synthetic jobs and finished runs"""
+    rng = random.Random(42)
+    now = datetime.now(pytz.UTC)
+    job_ids = [f"job-{i:05d}" for i in range(jobs)]
+    conn = sqlite3.connect(str(db.DATABASE_FILE))
+    with conn:
+        conn.executemany(
+            'INSERT INTO job_configs (job_id, schedule, tolerance_minutes, max_runtime_minutes) VALUES (?, ?, ?, ?)',
+            ((job_id, '*/5 * * * *', 1, 30) for job_id in job_ids)
+        )
+
+        def run_rows():
+            for _ in range(runs):
+                start = now - timedelta(seconds=rng.randint(60, 30 * 86400))
+                end = start + timedelta(seconds=rng.randint(1, 600))
+                yield rng.choice(job_ids), start.isoformat(), end.isoformat()
+
+        conn.executemany('INSERT INTO job_runs (job_id, start_time, end_time) VALUES (?, ?, ?)', run_rows())
+    conn.close()
+    return job_ids
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_scenario(job_ids, readers: int, writers: int, seconds: float):
+    latencies = {'read': [], 'write': []}
+    lags = []
+    stop_at = time.perf_counter() + seconds
+    rng = random.Random(7)
+    transport = httpx.ASGITransport(app=appmod.app)
+
+    async def timed(kind, request):
+        # In-process ASGI calls never suspend on their own; yield once per
+        # request as a socket would, so blocked handlers queue up behind
+        # each other instead of one client monopolizing the loop
+        began = time.perf_counter()
+        await asyncio.sleep(0)
+        response = await request
+        latencies[kind].append(time.perf_counter() - began)
+        response.raise_for_status()
+
+    async def reader(client):
+        while time.perf_counter() < stop_at:
+            await timed('read', client.get('/jobs'))
+            await timed('read', client.get('/job_runs', params={'job_id': rng.choice(job_ids)}))
+
+    async def writer(client):
+        while time.perf_counter() < stop_at:
+            job_id = rng.choice(job_ids)
+            await timed('write', client.post(f'/jobs/{job_id}/start'))
+            await timed('write', client.post(f'/jobs/{job_id}/end'))
+
+    async def probe():
+        while time.perf_counter() < stop_at:
+            began = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - began - 0.01)
+
+    async with appmod.app.router.lifespan_context(appmod.app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            began = time.perf_counter()
+            await asyncio.gather(
+                probe(),
+                *(reader(client) for _ in range(readers)),
+                *(writer(client) for _ in range(writers)),
+            )
+            elapsed = time.perf_counter() - began
+    return latencies, lags, elapsed
+
+
+def report(name, latencies, lags, elapsed):
+    print(f"\n{name}")
+    for kind in ('read', 'write'):
+        values = latencies[kind]
+        print(
+            f"  {kind:>5}: {len(values) / elapsed:8.1f} req/s"
+            f"  p50 {percentile(values, 0.50) * 1000:8.1f}ms"
+            f"  p99 {percentile(values, 0.99) * 1000:8.1f}ms"
+        )
+    print(
+        f"  loop lag: p50 {percentile(lags, 0.50) * 1000:.1f}ms"
+        f"  p99 {percentile(lags, 0.99) * 1000:.1f}ms"
+        f"  max {max(lags) * 1000:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=100_000)
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"seeding {args.jobs} jobs and {args.runs} runs in {db.DATABASE_FILE}")
+    job_ids = seed(args.jobs, args.runs)
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per scenario")
+
+    async_db = db.aio
+    for name, layer in (('blocking', BlockingDatabase()), ('async', async_db)):
+        db.aio = layer
+        report(name, *asyncio.run(run_scenario(job_ids, args.readers, args.writers, args.seconds)))
+    db.aio = async_db
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Benchmark of health check pings, from the database write up to POST /jobs/{job_id}/start.
+
+Two measurements against a scratch database of health check jobs:
+
+  write      a ping recorded as record_job_start() plus record_job_end(),
+             the two writes the endpoint used to make, against the single
+             record_heartbeat() write it makes now
+  endpoint   POST /jobs/{job_id}/start called straight through ASGI, without
+             an HTTP client in the loop, so the figures are the server's own
+             cost on one core; one client at a time and `--concurrency` at once
+
+Prints a JSON report with throughput and p50/p99 latency per measurement.
+
+Usage:
+    python benchmarks/bench_heartbeat.py --jobs 200 --requests 5000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Use a scratch database; must be set before database is imported
+os.environ['CRONICLE_DATA_DIR'] = tempfile.mkdtemp(prefix='cronicle-bench-')
+os.environ.setdefault('CRONICLE_RUN_RETENTION_DAYS', '0')
+
+import database as db
+import app as appmod
+
+CLIENT_INFO = {
+    'ip_address': '10.0.0.1',
+    'user_agent': 'curl/8.0',
+    'hostname': 'bench',
+    'os_info': 'Linux',
+    'additional_info': {'python_version': platform.python_version(), 'platform': 'bench', 'headers': {}},
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(latencies, elapsed: float) -> dict:
+    return {
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+        },
+    }
+
+
+def bench_write(job_ids, requests: int, fused: bool) -> dict:
+    latencies = []
+    began = time.perf_counter()
+    for i in range(requests):
+        job_id = job_ids[i % len(job_ids)]
+        client_info = {**CLIENT_INFO, 'custom_metadata': {'ping': i}}
+        started = time.perf_counter()
+        if fused:
+            db.record_heartbeat(job_id, client_info)
+        else:
+            db.record_job_start(job_id, client_info)
+            db.record_job_end(job_id)
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, time.perf_counter() - began)
+
+
+async def post(path: str, body: bytes) -> int:
+    """Call the app with one POST request as a server would and return the status"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'POST',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': '',
+        'query_string': b'',
+        'headers': [
+            (b'host', b'bench'),
+            (b'user-agent', b'curl/8.0'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ],
+        'client': ('10.0.0.1', 40000),
+        'server': ('127.0.0.1', 8000),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    status = None
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await appmod.app(scope, receive, send)
+    return status
+
+
+async def bench_endpoint(job_ids, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+
+    async def client(index: int):
+        nonlocal errors
+        for i in range(index, requests, concurrency):
+            body = json.dumps({'metadata': {'ping': i}}).encode()
+            started = time.perf_counter()
+            if await post(f'/jobs/{job_ids[i % len(job_ids)]}/start', body) != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+            # Give other clients a turn, as a socket read would
+            await asyncio.sleep(0)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    return {**summarize(latencies, time.perf_counter() - began), 'errors': errors, 'clients': concurrency}
+
+
+async def run_endpoint(job_ids, requests: int, concurrency: int) -> dict:
+    results = {}
+    async with appmod.app.router.lifespan_context(appmod.app):
+        for clients in dict.fromkeys((1, concurrency)):
+            results[f'clients_{clients}'] = await bench_endpoint(job_ids, requests, clients)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000, help='pings per measurement')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients of the endpoint')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    job_ids = [f"health-{i:05d}" for i in range(args.jobs)]
+    for job_id in job_ids:
+        db.add_job(job_id, '* * * * *', 1, None)
+
+    results = {
+        'write': {
+            'start_and_end': bench_write(job_ids, args.requests, fused=False),
+            'heartbeat': bench_write(job_ids, args.requests, fused=True),
+        },
+        'endpoint': asyncio.run(run_endpoint(job_ids, args.requests, args.concurrency)),
+    }
+    for group, measurements in results.items():
+        for name, result in measurements.items():
+            print(f"{group} {name}: {result['throughput']} req/s, p99 {result['latency_ms']['p99']}ms", file=sys.stderr)
+
+    report = {
+        'config': {'jobs': args.jobs, 'requests': args.requests, 'concurrency': args.concurrency},
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
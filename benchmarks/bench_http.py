@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""End-to-end HTTP benchmark of mixed workloads against a synthetic database.
+
+Seeds a scratch data directory with jobs, runs and alerts, starts the app
+in-process (lifespan included, so the alert checker runs) and drives it over
+ASGI with one workload at a time:
+
+  heartbeat_storm   every health check job reports at once, as at a minute boundary
+  heartbeat_batch   the same storm sent as one POST /jobs/batch per burst
+  dashboard         clients polling /jobs, /job_runs and /job_alerts with ETags
+  acknowledge       listing unacknowledged alerts and acknowledging them
+  deep_pagination   walking /job_runs page by page to the end of the history
+
+Prints a JSON report with throughput and p50/p95/p99 latency per workload,
+plus the database size before and after, for comparison between releases.
+
+Usage:
+    python benchmarks/bench_http.py --jobs 500 --runs 200000 --alerts 20000 --seconds 10 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Use a scratch database and keep the seeded history out of the retention
+# task's way; must be set before database is imported
+os.environ['CRONICLE_DATA_DIR'] = tempfile.mkdtemp(prefix='cronicle-bench-')
+os.environ.setdefault('CRONICLE_RUN_RETENTION_DAYS', '0')
+
+import httpx
+
+import database as db
+import app as appmod
+
+WORKLOADS = ('heartbeat_storm', 'heartbeat_batch', 'dashboard', 'acknowledge', 'deep_pagination')
+
+
+def seed(jobs: int, runs: int, alerts: int, health_check_share: float):
+    """Fill the scratch database; returns (timed job ids, health check job ids)"""
+    rng = random.Random(42)
+    now = datetime.now(pytz.UTC)
+    job_ids = [f"job-{i:05d}" for i in range(jobs)]
+    health_checks = job_ids[:int(jobs * health_check_share)]
+    timed = job_ids[len(health_checks):]
+    conn = sqlite3.connect(str(db.DATABASE_FILE))
+    with conn:
+        conn.executemany(
+            'INSERT INTO job_configs (job_id, schedule, tolerance_minutes, max_runtime_minutes) VALUES (?, ?, ?, ?)',
+            [(job_id, '* * * * *', 1, None) for job_id in health_checks]
+            + [(job_id, '*/5 * * * *', 1, 30) for job_id in timed]
+        )
+
+        def run_rows():
+            for _ in range(runs):
+                start = now - timedelta(seconds=rng.randint(60, 60 * 86400))
+                end = start + timedelta(seconds=rng.randint(1, 600))
+                yield rng.choice(job_ids), start.isoformat(), end.isoformat(), (end - start).total_seconds() / 60
+
+        conn.executemany(
+            'INSERT INTO job_runs (job_id, start_time, end_time, duration) VALUES (?, ?, ?, ?)',
+            run_rows()
+        )
+
+        def alert_rows():
+            for _ in range(alerts):
+                expected = now - timedelta(minutes=5 * rng.randint(1, 100000))
+                yield (
+                    rng.choice(timed or job_ids),
+                    rng.choice(('missed_job', 'long_running')),
+                    expected.isoformat(),
+                    (expected + timedelta(minutes=1)).isoformat(),
+                    'synthetic alert',
+                    rng.random() < 0.5
+                )
+
+        conn.executemany(
+            '''INSERT INTO job_alerts (job_id, alert_type, expected_start_time, detected_time, alert_message, acknowledged)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            alert_rows()
+        )
+    conn.close()
+    # Pick up the seeded configs
+    db.init_db()
+    return timed, health_checks
+
+
+def database_size() -> int:
+    return sum(
+        Path(f"{db.DATABASE_FILE}{suffix}").stat().st_size
+        for suffix in ('', '-wal')
+        if Path(f"{db.DATABASE_FILE}{suffix}").exists()
+    )
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Recorder:
+    """Latencies and errors of the requests made by one workload"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    async def request(self, call):
+        # In-process ASGI calls never suspend on their own; yield once per
+        # request as a socket would, and measure from the moment it was issued
+        began = time.perf_counter()
+        await asyncio.sleep(0)
+        response = await call
+        self.latencies.append(time.perf_counter() - began)
+        if response.status_code >= 400:
+            self.errors += 1
+        return response
+
+    def report(self, elapsed: float, **extra) -> dict:
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'seconds': round(elapsed, 3),
+            'throughput': round(len(self.latencies) / elapsed, 1) if elapsed else None,
+            'latency_ms': {
+                name: round(value * 1000, 3) if value is not None else None
+                for name, value in (
+                    ('p50', percentile(self.latencies, 0.50)),
+                    ('p95', percentile(self.latencies, 0.95)),
+                    ('p99', percentile(self.latencies, 0.99)),
+                    ('max', max(self.latencies) if self.latencies else None),
+                )
+            },
+            **extra,
+        }
+
+
+async def heartbeat_storm(client, recorder, stop_at, health_checks, **_):
+    bursts = 0
+    while time.perf_counter() < stop_at:
+        await asyncio.gather(*(
+            recorder.request(client.post(f'/jobs/{job_id}/start', json={'metadata': {'burst': bursts}}))
+            for job_id in health_checks
+        ))
+        bursts += 1
+    return {'bursts': bursts, 'events_per_burst': len(health_checks)}
+
+
+async def heartbeat_batch(client, recorder, stop_at, health_checks, **_):
+    bursts = 0
+    while time.perf_counter() < stop_at:
+        await recorder.request(client.post('/jobs/batch', json=[
+            {'job_id': job_id, 'event': 'heartbeat', 'metadata': {'burst': bursts}}
+            for job_id in health_checks
+        ]))
+        bursts += 1
+    return {'bursts': bursts, 'events_per_burst': len(health_checks)}
+
+
+async def dashboard(client, recorder, stop_at, concurrency, rng, **_):
+    async def poller():
+        etags = {}
+        while time.perf_counter() < stop_at:
+            for url in ('/jobs', '/job_runs', '/job_alerts'):
+                headers = {'If-None-Match': etags[url]} if url in etags else {}
+                response = await recorder.request(client.get(url, headers=headers))
+                if 'etag' in response.headers:
+                    etags[url] = response.headers['etag']
+
+    async def heartbeats():
+        # Background writes, so that ETags do not answer every poll
+        while time.perf_counter() < stop_at:
+            await client.post(f'/jobs/{rng.choice(jobs_list)}/start')
+            await asyncio.sleep(0.01)
+
+    jobs_list = [job['job_id'] for job in db.get_all_job_configs()]
+    await asyncio.gather(heartbeats(), *(poller() for _ in range(concurrency)))
+    return {'clients': concurrency}
+
+
+async def acknowledge(client, recorder, stop_at, concurrency, **_):
+    pending = asyncio.Queue()
+    acknowledged = 0
+
+    async def lister():
+        while time.perf_counter() < stop_at:
+            response = await recorder.request(client.get('/job_alerts'))
+            alerts = response.json()
+            if not alerts:
+                break
+            for alert in alerts:
+                pending.put_nowait(alert['id'])
+            await pending.join()
+
+    async def acker():
+        nonlocal acknowledged
+        while True:
+            alert_id = await pending.get()
+            try:
+                if time.perf_counter() < stop_at:
+                    await recorder.request(client.post(f'/acknowledge_alert/{alert_id}'))
+                    acknowledged += 1
+            finally:
+                pending.task_done()
+
+    ackers = [asyncio.create_task(acker()) for _ in range(concurrency)]
+    try:
+        await lister()
+    finally:
+        for task in ackers:
+            task.cancel()
+    return {'acknowledged': acknowledged}
+
+
+async def deep_pagination(client, recorder, stop_at, per_page, **_):
+    pages = 0
+    walks = 0
+    while time.perf_counter() < stop_at:
+        cursor = None
+        while time.perf_counter() < stop_at:
+            params = {'per_page': per_page}
+            if cursor:
+                params['cursor'] = cursor
+            response = await recorder.request(client.get('/job_runs', params=params))
+            pages += 1
+            cursor = response.json().get('next_cursor')
+            if not cursor:
+                walks += 1
+                break
+    return {'pages': pages, 'complete_walks': walks, 'per_page': per_page}
+
+
+async def run_workloads(names, seconds, options):
+    results = {}
+    transport = httpx.ASGITransport(app=appmod.app)
+    async with appmod.app.router.lifespan_context(appmod.app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            for name in names:
+                recorder = Recorder()
+                began = time.perf_counter()
+                extra = await globals()[name](client, recorder, began + seconds, **options)
+                results[name] = recorder.report(time.perf_counter() - began, **extra)
+                print(f"{name}: {results[name]['throughput']} req/s, p99 {results[name]['latency_ms']['p99']}ms", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=200_000)
+    parser.add_argument('--alerts', type=int, default=20_000)
+    parser.add_argument('--health-check-share', type=float, default=0.5,
+                        help='fraction of the jobs that are health checks (the heartbeat storm senders)')
+    parser.add_argument('--seconds', type=float, default=10.0, help='duration of each workload')
+    parser.add_argument('--concurrency', type=int, default=16, help='dashboard clients and acknowledging clients')
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--workloads', default=','.join(WORKLOADS), help='comma-separated subset of: ' + ', '.join(WORKLOADS))
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.workloads.split(',') if name.strip()]
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    print(f"seeding {args.jobs} jobs, {args.runs} runs, {args.alerts} alerts in {db.DATABASE_FILE}", file=sys.stderr)
+    seed_began = time.perf_counter()
+    timed, health_checks = seed(args.jobs, args.runs, args.alerts, args.health_check_share)
+    seed_seconds = time.perf_counter() - seed_began
+    size_before = database_size()
+
+    options = {
+        'health_checks': health_checks,
+        'timed': timed,
+        'concurrency': args.concurrency,
+        'per_page': args.per_page,
+        'rng': random.Random(7),
+    }
+    results = asyncio.run(run_workloads(names, args.seconds, options))
+
+    report = {
+        'config': {
+            'jobs': args.jobs,
+            'health_check_jobs': len(health_checks),
+            'runs': args.runs,
+            'alerts': args.alerts,
+            'seconds': args.seconds,
+            'concurrency': args.concurrency,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'seed_seconds': round(seed_seconds, 3),
+        'db_size_bytes': {'before': size_before, 'after': database_size()},
+        'workloads': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
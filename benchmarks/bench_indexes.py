@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Query plans and timings for the hot lookups, before and after the migrations.
+
+Builds a scratch database with the version 1 schema (the base tables and
+nothing from any later migration), seeds it, measures the checker/dashboard
+lookups, times migrate() up to the current version and measures the same
+lookups again. The real database is never touched.
+
+Usage:
+    python benchmarks/bench_indexes.py --jobs 500 --runs 200000 --alerts 20000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def seed(conn: sqlite3.Connection, jobs: int, runs: int, alerts: int, open_runs: int):
+    """Fill the scratch database with synthetic jobs, runs and alerts"""
+    rng = random.Random(42)
+    now = datetime.now(pytz.UTC)
+    job_ids = [f"job-{i:05d}" for i in range(jobs)]
+    with conn:
+        conn.executemany(
+            'INSERT INTO job_configs (job_id, schedule, tolerance_minutes, max_runtime_minutes) VALUES (?, ?, ?, ?)',
+            ((job_id, '*/5 * * * *', 1, 30) for job_id in job_ids)
+        )
+
+        def run_rows():
+            for i in range(runs):
+                start = now - timedelta(seconds=rng.randint(60, 365 * 86400))
+                end = None if i < open_runs else start + timedelta(seconds=rng.randint(1, 1800))
+                yield (
+                    rng.choice(job_ids),
+                    start.isoformat(),
+                    end.isoformat() if end else None,
+                    (end - start).total_seconds() / 60 if end else None,
+                    '{"ip_address": "10.0.0.1"}'
+                )
+
+        conn.executemany(
+            'INSERT INTO job_runs (job_id, start_time, end_time, duration, client_info) VALUES (?, ?, ?, ?, ?)',
+            run_rows()
+        )
+
+        def alert_rows():
+            for _ in range(alerts):
+                expected = now - timedelta(minutes=5 * rng.randint(1, 100000))
+                yield (
+                    rng.choice(job_ids),
+                    rng.choice(('missed_job', 'long_running')),
+                    expected.isoformat(),
+                    (expected + timedelta(minutes=1)).isoformat(),
+                    'synthetic alert',
+                    rng.random() < 0.9
+                )
+
+        conn.executemany(
+            '''INSERT INTO job_alerts (job_id, alert_type, expected_start_time, detected_time, alert_message, acknowledged)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            alert_rows()
+        )
+    return job_ids
+
+
+def workloads(job_ids, rng):
+    """The lookups under test, as (name, sql, params factory, share of --iterations).
+
+    These are the read paths whose plans depend on the migrations' indexes,
+    written against the version 1 columns so the same statements run on
+    both schemas: the checker's latest run and latest starts per job, the
+    open runs, and the first page of the run history, overall and for one
+    job.
+    """
+    return [
+        ('latest run of a job', '''
+            SELECT * FROM job_runs WHERE job_id = ? ORDER BY start_time DESC LIMIT 1
+        ''', lambda: (rng.choice(job_ids),), 1),
+        ('latest starts of 20 jobs', '''
+            SELECT value, (
+                SELECT start_time FROM job_runs
+                WHERE job_id = value
+                ORDER BY start_time DESC
+                LIMIT 1
+            )
+            FROM json_each(?)
+        ''', lambda: (json.dumps(rng.sample(job_ids, 20)),), 1 / 20),
+        ('open runs', '''
+            SELECT jr.*, jc.max_runtime_minutes
+            FROM job_runs jr
+            JOIN job_configs jc ON jr.job_id = jc.job_id
+            WHERE jr.start_time IS NOT NULL AND jr.end_time IS NULL
+        ''', lambda: (), 1),
+        ('run history of a job', '''
+            SELECT * FROM job_runs WHERE job_id = ? ORDER BY start_time DESC, id DESC LIMIT 50
+        ''', lambda: (rng.choice(job_ids),), 1),
+        ('run history', '''
+            SELECT * FROM job_runs ORDER BY start_time DESC, id DESC LIMIT 50
+        ''', lambda: (), 1 / 20),
+    ]
+
+
+def capture_plans(conn, job_ids):
+    """EXPLAIN each workload's statement"""
+    plans = {}
+    for name, sql, params, _ in workloads(job_ids, random.Random(0)):
+        plans[name] = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params())]
+    return plans
+
+
+def time_workloads(conn, job_ids, iterations):
+    """Mean milliseconds per call for each workload"""
+    timings = {}
+    for name, sql, params, share in workloads(job_ids, random.Random(1)):
+        conn.execute(sql, params()).fetchall()  # warm the page cache
+        count = max(1, int(iterations * share))
+        start = time.perf_counter()
+        for _ in range(count):
+            conn.execute(sql, params()).fetchall()
+        timings[name] = (time.perf_counter() - start) * 1000 / count
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=200_000)
+    parser.add_argument('--alerts', type=int, default=20_000)
+    parser.add_argument('--open-runs', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    # database migrates its own scratch database on import; the one under
+    # test is built next to it
+    os.environ['CRONICLE_DATA_DIR'] = tempfile.mkdtemp(prefix='cronicle-bench-')
+    sys.path.insert(0, str(ROOT))
+    import database as db
+
+    path = db.DATABASE_FILE.with_name('version1.db')
+    conn = sqlite3.connect(str(path), isolation_level=None)
+    with conn:
+        db.MIGRATIONS[0](conn)
+        conn.execute('PRAGMA user_version = 1')
+
+    print(f"Seeding {args.jobs} jobs, {args.runs} runs, {args.alerts} alerts in {path}")
+    job_ids = seed(conn, args.jobs, args.runs, args.alerts, args.open_runs)
+
+    results = {}
+    for label in ('before', 'after'):
+        if label == 'after':
+            start = time.perf_counter()
+            with conn:
+                conn.execute('BEGIN')
+                version = db.migrate(conn)
+            print(f"\nMigrated from schema version 1 to {version} in {time.perf_counter() - start:.2f}s")
+        results[label] = (capture_plans(conn, job_ids), time_workloads(conn, job_ids, args.iterations))
+
+    for name in results['before'][1]:
+        before_ms = results['before'][1][name]
+        after_ms = results['after'][1][name]
+        print(f"\n== {name}: {before_ms:.3f} ms -> {after_ms:.3f} ms ({before_ms / after_ms:.1f}x)")
+        for label in ('before', 'after'):
+            print(f"  {label}:")
+            for line in results[label][0][name]:
+                print(f"    {line}")
+
+    conn.close()
+    db.close_db()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Compare raw croniter with the compiled schedule cache for many distinct schedules.
+
+Simulates the checker and dashboard asking for the previous and next fire
+time of every schedule at a series of instants a few seconds apart, which is
+the access pattern of check_job_issues and GET /jobs.
+
+Usage:
+    python benchmarks/bench_schedules.py --schedules 10000 --ticks 12
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+from croniter import croniter
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import schedules
+
+
+def distinct_expressions(count: int):
+    """Generate `count` distinct, valid cron expressions"""
+    expressions = []
+    for day in range(1, 29):
+        for hour in range(24):
+            for minute in range(60):
+                expressions.append(f"{minute} {hour} {day} * *")
+                if len(expressions) == count:
+                    return expressions
+    # Fall back to step schedules if a very large count is requested
+    step = 1
+    while len(expressions) < count:
+        expressions.append(f"*/{step} * * * {step % 7}")
+        step += 1
+    return expressions
+
+
+def run_raw(expressions, instants):
+    for now in instants:
+        for expression in expressions:
+            croniter(expression, now).get_prev(datetime)
+            croniter(expression, now).get_next(datetime)
+
+
+def run_cached(expressions, instants):
+    for now in instants:
+        for expression in expressions:
+            schedules.prev_fire(expression, now)
+            schedules.next_fire(expression, now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--schedules', type=int, default=10_000)
+    parser.add_argument('--ticks', type=int, default=12)
+    parser.add_argument('--tick-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    expressions = distinct_expressions(args.schedules)
+    start = datetime.now(pytz.UTC)
+    instants = [start + timedelta(seconds=args.tick_seconds * i) for i in range(args.ticks)]
+    schedules.cache.maxsize = max(schedules.cache.maxsize, len(expressions))
+    lookups = 2 * len(expressions) * len(instants)
+
+    # Spot-check that both paths agree before timing them
+    for expression in expressions[::max(1, len(expressions) // 100)]:
+        assert schedules.prev_fire(expression, start) == croniter(expression, start).get_prev(datetime)
+        assert schedules.next_fire(expression, start) == croniter(expression, start).get_next(datetime)
+    schedules.cache.clear()
+
+    results = {}
+    for name, fn in (('raw croniter', run_raw), ('cached (cold)', run_cached), ('cached (warm)', run_cached)):
+        began = time.perf_counter()
+        fn(expressions, instants)
+        elapsed = time.perf_counter() - began
+        results[name] = elapsed
+        print(f"{name:>14}: {elapsed:7.3f}s  {elapsed / lookups * 1e6:7.2f} us/lookup")
+
+    print(f"\n{len(expressions)} schedules x {len(instants)} ticks x 2 lookups = {lookups} lookups")
+    print(f"warm speedup over raw croniter: {results['raw croniter'] / results['cached (warm)']:.1f}x")
+    print(f"cache: {schedules.cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,99 @@
 import sqlite3
+from collections import OrderedDict
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+import base64
+import hashlib
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import pytz
 import os
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import functools
+import mmap
+import struct
+import types
+try:
+    import fcntl
+except ImportError:  # Windows: a single process is assumed
+    fcntl = None
+
+import metrics
+import schedules
+from profiling import ProfilingConnection, QueryProfiler
+from sketches import DurationSketch, DurationStats
+
+ZERO_OFFSET = timedelta(0)
 
 class AlertType(Enum):
     MISSED_JOB = "missed_job"
     LONG_RUNNING = "long_running"
 
 # Get the absolute path to the data directory
-if os.environ.get('DOCKER_ENV') == 'true':
+if os.environ.get('CRONICLE_DATA_DIR'):
+    # Explicit override, e.g. for tests or benchmarks against a scratch database
+    data_dir = Path(os.environ['CRONICLE_DATA_DIR'])
+elif os.environ.get('DOCKER_ENV') == 'true':
     # In Docker, use the mounted volume path
     data_dir = Path('/app/data')
 else:
     # On host, use relative path
     data_dir = Path(__file__).parent / "data"
 
-data_dir.mkdir(exist_ok=True)
+data_dir.mkdir(parents=True, exist_ok=True)
 
 DATABASE_FILE = data_dir / "jobs.db"
 
+# Connection settings, applied once when a connection is opened
+DB_POOL_SIZE = int(os.environ.get('CRONICLE_DB_POOL_SIZE', 4))
+DB_BUSY_TIMEOUT = float(os.environ.get('CRONICLE_DB_BUSY_TIMEOUT', 5.0))
+DB_PRAGMAS = {
+    'journal_mode': os.environ.get('CRONICLE_DB_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('CRONICLE_DB_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': os.environ.get('CRONICLE_DB_CACHE_SIZE', '-16000'),  # negative = KiB
+    'mmap_size': os.environ.get('CRONICLE_DB_MMAP_SIZE', '268435456'),
+    'temp_store': os.environ.get('CRONICLE_DB_TEMP_STORE', 'MEMORY'),
+}
+
+# Group commit settings for the single writer
+DB_WRITE_BATCH_SIZE = int(os.environ.get('CRONICLE_DB_WRITE_BATCH_SIZE', 128))
+DB_WRITE_MAX_DELAY = float(os.environ.get('CRONICLE_DB_WRITE_MAX_DELAY_MS', 2)) / 1000
+
+# Alerts the checker remembers having recorded, so that conditions it has
+# already alerted on cost no queries. Keys unused for the TTL are dropped.
+ALERT_DEDUP_TTL = float(os.environ.get('CRONICLE_ALERT_DEDUP_TTL_HOURS', 24)) * 3600
+ALERT_DEDUP_MAX_KEYS = int(os.environ.get('CRONICLE_ALERT_DEDUP_MAX_KEYS', 100000))
+
+# Opt-in statement profiling, served at /debug/queries; statements slower
+# than the threshold are logged with their query plan
+DB_PROFILE = os.environ.get('CRONICLE_DB_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+DB_SLOW_QUERY_MS = float(os.environ.get('CRONICLE_DB_SLOW_QUERY_MS', 100))
+
+# Request headers kept in a run's client info (lowercase names); the rest are dropped
+CLIENT_INFO_HEADERS = [
+    header.strip().lower()
+    for header in os.environ.get('CRONICLE_CLIENT_INFO_HEADERS', 'user-agent,x-forwarded-for,x-real-ip').split(',')
+    if header.strip()
+]
+
 def to_utc(dt: Optional[datetime]) -> Optional[datetime]:
     """Convert datetime to UTC or return None"""
     if dt is None:
         return None
     if dt.tzinfo is None:
-        dt = pytz.UTC.localize(dt)
+        return pytz.UTC.localize(dt)
+    if dt.tzinfo is pytz.UTC:
+        return dt
+    # Stored timestamps are already UTC; relabeling is much cheaper than astimezone
+    if dt.utcoffset() == ZERO_OFFSET:
+        return dt.replace(tzinfo=pytz.UTC)
     return dt.astimezone(pytz.UTC)
 
 def from_db_datetime(dt_str: Optional[str]) -> Optional[datetime]:
@@ -39,174 +103,1155 @@ def from_db_datetime(dt_str: Optional[str]) -> Optional[datetime]:
     dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
     return to_utc(dt)
 
+def _durations_from_row(count, total, m2, minimum, maximum, sketch) -> DurationStats:
+    """Rebuild duration statistics from their stored columns"""
+    return DurationStats(
+        count=count,
+        mean=total / count if count else 0.0,
+        m2=m2 or 0.0,
+        minimum=minimum,
+        maximum=maximum,
+        sketch=DurationSketch.from_bytes(sketch)
+    )
+
+def _durations_to_row(durations: DurationStats) -> tuple:
+    return (
+        durations.count, durations.mean * durations.count, durations.m2,
+        durations.min, durations.max, durations.sketch.to_bytes(),
+    )
+
+def _add_missing_columns(db, table: str, columns: dict):
+    """Add columns that databases created by older versions may lack"""
+    existing = {col[1] for col in db.execute(f'PRAGMA table_info({table})')}
+    for name, definition in columns.items():
+        if name not in existing:
+            db.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+def _migration_1_base_schema(db):
+    """Create the base tables.
+
+    Databases created before migrations were versioned start at version 0 and
+    may be missing columns that were added over time, so those are back-filled
+    here once.
+    """
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS job_configs (
+            job_id TEXT PRIMARY KEY,
+            schedule TEXT NOT NULL,
+            tolerance_minutes INTEGER NOT NULL,
+            max_runtime_minutes INTEGER,
+            needs_end_signal BOOLEAN DEFAULT FALSE,
+            paused BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_start TIMESTAMP,
+            last_end TIMESTAMP,
+            duration REAL
+        )
+    ''')
+
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS job_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            start_time TIMESTAMP NOT NULL,
+            end_time TIMESTAMP,
+            duration REAL,
+            client_info TEXT,
+            FOREIGN KEY (job_id) REFERENCES job_configs (job_id)
+        )
+    ''')
+
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS job_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            alert_type TEXT NOT NULL,
+            expected_start_time TIMESTAMP,
+            actual_start_time TIMESTAMP,
+            detected_time TIMESTAMP NOT NULL,
+            alert_message TEXT NOT NULL,
+            acknowledged BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_id) REFERENCES job_configs (job_id)
+        )
+    ''')
+
+    _add_missing_columns(db, 'job_configs', {
+        'max_runtime_minutes': 'INTEGER',
+        'paused': 'BOOLEAN DEFAULT FALSE',
+        'last_start': 'TIMESTAMP',
+        'last_end': 'TIMESTAMP',
+        'duration': 'REAL',
+        'needs_end_signal': 'BOOLEAN DEFAULT FALSE',
+    })
+    _add_missing_columns(db, 'job_runs', {'client_info': 'TEXT'})
+
+def _migration_2_indexes(db):
+    """Index the lookups made by the checker, the dashboard and ingest"""
+    # Latest run per job (get_latest_job_run, job status)
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_runs_job_start
+        ON job_runs (job_id, start_time DESC)
+    ''')
+    # Open runs only (get_running_jobs, record_job_end); stays tiny
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_runs_open
+        ON job_runs (job_id, start_time)
+        WHERE end_time IS NULL
+    ''')
+    # Alerts by job, type and expected start time
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_alerts_job_type_expected
+        ON job_alerts (job_id, alert_type, expected_start_time)
+    ''')
+
+def _migration_3_latest_alert_index(db):
+    """Index the latest-alert-per-job lookup used by the jobs overview"""
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_alerts_job_detected
+        ON job_alerts (job_id, detected_time DESC)
+    ''')
+
+def _migration_4_run_pagination(db):
+    """Support keyset pagination and O(1) run counts.
+
+    Timestamps written through the sqlite3 datetime adapter used a space
+    separator while the rest used isoformat()'s 'T'; they are normalized so
+    that string comparison and index order match time order.
+    """
+    for table, columns in (('job_runs', ('start_time', 'end_time')), ('job_configs', ('last_start', 'last_end'))):
+        for column in columns:
+            db.execute(f'''
+                UPDATE {table}
+                SET {column} = substr({column}, 1, 10) || 'T' || substr({column}, 12)
+                WHERE {column} LIKE '____-__-__ %'
+            ''')
+    
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_runs_start
+        ON job_runs (start_time DESC, id DESC)
+    ''')
+    
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS job_run_counts (
+            job_id TEXT PRIMARY KEY,
+            run_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    db.execute('''
+        INSERT OR REPLACE INTO job_run_counts (job_id, run_count)
+        SELECT job_id, COUNT(*) FROM job_runs GROUP BY job_id
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS job_runs_count_insert
+        AFTER INSERT ON job_runs
+        BEGIN
+            INSERT INTO job_run_counts (job_id, run_count) VALUES (NEW.job_id, 1)
+            ON CONFLICT (job_id) DO UPDATE SET run_count = run_count + 1;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS job_runs_count_delete
+        AFTER DELETE ON job_runs
+        BEGIN
+            UPDATE job_run_counts SET run_count = run_count - 1 WHERE job_id = OLD.job_id;
+        END
+    ''')
+
+def _migration_5_run_rollups(db):
+    """Add hourly and daily aggregates that replace runs past the retention window"""
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS job_run_rollups (
+            job_id TEXT NOT NULL,
+            granularity TEXT NOT NULL,
+            bucket_start TEXT NOT NULL,
+            run_count INTEGER NOT NULL DEFAULT 0,
+            late_count INTEGER NOT NULL DEFAULT 0,
+            duration_count INTEGER NOT NULL DEFAULT 0,
+            duration_sum REAL NOT NULL DEFAULT 0,
+            duration_min REAL,
+            duration_max REAL,
+            duration_sketch BLOB,
+            PRIMARY KEY (job_id, granularity, bucket_start)
+        )
+    ''')
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_run_rollups_bucket
+        ON job_run_rollups (bucket_start DESC)
+    ''')
+
+def split_client_info(client_info: Optional[dict]) -> Tuple[Optional[dict], Optional[dict]]:
+    """Split client info into the client's fingerprint and the run's custom metadata.
+
+    The fingerprint is what stays the same from run to run of an agent; the
+    per-request timestamp and headers outside CLIENT_INFO_HEADERS are dropped.
+    """
+    if not client_info:
+        return None, None
+    client = dict(client_info)
+    custom_metadata = client.pop('custom_metadata', None) or None
+    additional_info = client.get('additional_info')
+    if isinstance(additional_info, dict):
+        additional_info = dict(additional_info)
+        additional_info.pop('timestamp', None)
+        headers = additional_info.get('headers')
+        if isinstance(headers, dict):
+            additional_info['headers'] = {
+                name: value for name, value in headers.items()
+                if name.lower() in CLIENT_INFO_HEADERS
+            }
+        client['additional_info'] = additional_info
+    return client or None, custom_metadata
+
+def _client_json(client: dict) -> Tuple[bytes, str]:
+    """Canonical JSON of a client and the hash it is stored under"""
+    data = json.dumps(client, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode()).digest(), data
+
+def _insert_client(db, client: dict) -> int:
+    fingerprint, data = _client_json(client)
+    db.execute('INSERT OR IGNORE INTO clients (fingerprint, client_info) VALUES (?, ?)', (fingerprint, data))
+    return db.execute('SELECT id FROM clients WHERE fingerprint = ?', (fingerprint,)).fetchone()[0]
+
+def _migration_6_clients(db):
+    """Store each distinct client once and reference it from its runs"""
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fingerprint BLOB NOT NULL UNIQUE,
+            client_info TEXT NOT NULL
+        )
+    ''')
+    _add_missing_columns(db, 'job_runs', {
+        'client_id': 'INTEGER REFERENCES clients(id)',
+        'custom_metadata': 'TEXT',
+    })
+    
+    # Move existing client info blobs over in chunks of runs
+    last_id = 0
+    while True:
+        rows = db.execute('''
+            SELECT id, client_info FROM job_runs
+            WHERE id > ? AND client_info IS NOT NULL
+            ORDER BY id
+            LIMIT 1000
+        ''', (last_id,)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for run_id, raw in rows:
+            try:
+                client, custom_metadata = split_client_info(json.loads(raw))
+            except (ValueError, TypeError):
+                # Not JSON we wrote; leave it in the legacy column
+                continue
+            updates.append((
+                _insert_client(db, client) if client else None,
+                json.dumps(custom_metadata) if custom_metadata else None,
+                run_id,
+            ))
+        db.executemany('''
+            UPDATE job_runs
+            SET client_id = ?, custom_metadata = ?, client_info = NULL
+            WHERE id = ?
+        ''', updates)
+        last_id = rows[-1][0]
+
+def _migration_7_job_stats(db):
+    """Keep running duration statistics per job, backfilled from runs and rollups"""
+    _add_missing_columns(db, 'job_run_rollups', {'duration_m2': 'REAL NOT NULL DEFAULT 0'})
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS job_stats (
+            job_id TEXT PRIMARY KEY,
+            duration_count INTEGER NOT NULL DEFAULT 0,
+            duration_sum REAL NOT NULL DEFAULT 0,
+            duration_m2 REAL NOT NULL DEFAULT 0,
+            duration_min REAL,
+            duration_max REAL,
+            duration_sketch BLOB
+        )
+    ''')
+    
+    stats = {}
+    # Rollups made before this migration carry no variance, so the spread
+    # within each of their buckets is missing from the backfilled variance
+    for row in db.execute('''
+        SELECT job_id, duration_count, duration_sum, duration_m2, duration_min, duration_max, duration_sketch
+        FROM job_run_rollups
+    '''):
+        stats.setdefault(row[0], DurationStats()).merge(_durations_from_row(*row[1:]))
+    last_id = 0
+    while True:
+        rows = db.execute('''
+            SELECT id, job_id, start_time, end_time, duration FROM job_runs
+            WHERE id > ? AND end_time IS NOT NULL
+            ORDER BY id
+            LIMIT 1000
+        ''', (last_id,)).fetchall()
+        if not rows:
+            break
+        for _, job_id, start_time, end_time, duration in rows:
+            if duration is None:
+                duration = (from_db_datetime(end_time) - from_db_datetime(start_time)).total_seconds() / 60
+            stats.setdefault(job_id, DurationStats()).add(duration)
+        last_id = rows[-1][0]
+    db.executemany('''
+        INSERT OR REPLACE INTO job_stats
+        (job_id, duration_count, duration_sum, duration_m2, duration_min, duration_max, duration_sketch)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(job_id, *_durations_to_row(durations)) for job_id, durations in stats.items()])
+
+def _migration_8_leases_and_alert_keys(db):
+    """Elect one checker among processes and make alert inserts idempotent.
+
+    Alerts are unique per job, type and the start time they are about: the
+    actual start for long-running alerts, the expected start for missed
+    ones. Duplicates recorded by racing checkers are merged into the oldest.
+    """
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            acquired_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    db.execute('''
+        UPDATE job_alerts
+        SET acknowledged = 1
+        WHERE acknowledged = 0 AND EXISTS (
+            SELECT 1 FROM job_alerts other
+            WHERE other.job_id = job_alerts.job_id
+              AND other.alert_type = job_alerts.alert_type
+              AND COALESCE(other.actual_start_time, other.expected_start_time)
+                  = COALESCE(job_alerts.actual_start_time, job_alerts.expected_start_time)
+              AND other.acknowledged = 1
+        )
+    ''')
+    db.execute('''
+        DELETE FROM job_alerts
+        WHERE COALESCE(actual_start_time, expected_start_time) IS NOT NULL
+          AND id NOT IN (
+            SELECT MIN(id) FROM job_alerts
+            GROUP BY job_id, alert_type, COALESCE(actual_start_time, expected_start_time)
+          )
+    ''')
+    db.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_job_alerts_unique
+        ON job_alerts (job_id, alert_type, COALESCE(actual_start_time, expected_start_time))
+    ''')
+
+def _migration_9_alert_groups(db):
+    """Maintain one row per job and alert type for the alerts panel.
+
+    A trigger folds every inserted alert into its group; acknowledging and
+    deleting go through acknowledge_job_alert() and delete_job(), which
+    update the groups themselves.
+    """
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS alert_groups (
+            job_id TEXT NOT NULL,
+            alert_type TEXT NOT NULL,
+            alert_count INTEGER NOT NULL,
+            first_detected TIMESTAMP NOT NULL,
+            last_detected TIMESTAMP NOT NULL,
+            latest_alert_id INTEGER NOT NULL,
+            open_count INTEGER NOT NULL,
+            open_first_detected TIMESTAMP,
+            PRIMARY KEY (job_id, alert_type)
+        )
+    ''')
+    db.execute('''
+        INSERT OR REPLACE INTO alert_groups (
+            job_id, alert_type, alert_count, first_detected, last_detected,
+            latest_alert_id, open_count, open_first_detected
+        )
+        SELECT
+            job_id,
+            alert_type,
+            COUNT(*),
+            MIN(detected_time),
+            MAX(detected_time),
+            (
+                SELECT id FROM job_alerts latest
+                WHERE latest.job_id = job_alerts.job_id AND latest.alert_type = job_alerts.alert_type
+                ORDER BY latest.detected_time DESC, latest.id DESC
+                LIMIT 1
+            ),
+            SUM(CASE WHEN acknowledged THEN 0 ELSE 1 END),
+            MIN(CASE WHEN acknowledged THEN NULL ELSE detected_time END)
+        FROM job_alerts
+        GROUP BY job_id, alert_type
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS job_alerts_group_insert
+        AFTER INSERT ON job_alerts
+        BEGIN
+            INSERT INTO alert_groups (
+                job_id, alert_type, alert_count, first_detected, last_detected,
+                latest_alert_id, open_count, open_first_detected
+            ) VALUES (
+                NEW.job_id, NEW.alert_type, 1, NEW.detected_time, NEW.detected_time, NEW.id,
+                CASE WHEN NEW.acknowledged THEN 0 ELSE 1 END,
+                CASE WHEN NEW.acknowledged THEN NULL ELSE NEW.detected_time END
+            )
+            ON CONFLICT (job_id, alert_type) DO UPDATE SET
+                alert_count = alert_count + 1,
+                first_detected = MIN(first_detected, excluded.first_detected),
+                last_detected = MAX(last_detected, excluded.last_detected),
+                latest_alert_id = CASE WHEN excluded.last_detected >= last_detected
+                                       THEN excluded.latest_alert_id ELSE latest_alert_id END,
+                open_count = open_count + excluded.open_count,
+                open_first_detected = COALESCE(
+                    MIN(open_first_detected, excluded.open_first_detected),
+                    open_first_detected,
+                    excluded.open_first_detected
+                );
+        END
+    ''')
+
+def _migration_10_alert_incidents(db):
+    """Summarize storms of correlated alerts as incidents"""
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS alert_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reason TEXT NOT NULL,
+            alert_type TEXT,
+            schedule TEXT,
+            first_start_time TIMESTAMP NOT NULL,
+            last_start_time TIMESTAMP NOT NULL,
+            detected_time TIMESTAMP NOT NULL,
+            alert_count INTEGER NOT NULL,
+            summary TEXT NOT NULL
+        )
+    ''')
+    _add_missing_columns(db, 'job_alerts', {'incident_id': 'INTEGER REFERENCES alert_incidents(id)'})
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_alerts_incident
+        ON job_alerts (incident_id)
+        WHERE incident_id IS NOT NULL
+    ''')
+
+def _migration_11_job_checks(db):
+    """Persist how far each job's missed-run check has got"""
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS job_checks (
+            job_id TEXT PRIMARY KEY,
+            checked_through TIMESTAMP NOT NULL
+        )
+    ''')
+
+def _migration_12_schedule_kinds(db):
+    """Store schedules parsed: their kind and, for intervals, their length and jitter"""
+    _add_missing_columns(db, 'job_configs', {
+        'schedule_kind': f"TEXT NOT NULL DEFAULT '{schedules.CRON}'",
+        'interval_seconds': 'INTEGER',
+        'jitter_seconds': 'INTEGER',
+    })
+    for job_id, schedule in db.execute('SELECT job_id, schedule FROM job_configs').fetchall():
+        try:
+            parsed = schedules.parse_schedule(schedule)
+        except ValueError:
+            # Left as is; the job keeps failing its schedule lookups as before
+            continue
+        if parsed['schedule_kind'] != schedules.CRON or parsed['schedule'] != schedule:
+            db.execute('''
+                UPDATE job_configs
+                SET schedule = ?, schedule_kind = ?, interval_seconds = ?, jitter_seconds = ?
+                WHERE job_id = ?
+            ''', (
+                parsed['schedule'], parsed['schedule_kind'],
+                parsed['interval_seconds'], parsed['jitter_seconds'], job_id
+            ))
+
+def _migration_13_rollup_history(db):
+    """List rollups by job in time order and count the runs they replaced"""
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_job_run_rollups_job_bucket
+        ON job_run_rollups (job_id, bucket_start DESC)
+    ''')
+    _add_missing_columns(db, 'job_run_counts', {
+        'rolled_up_count': 'INTEGER NOT NULL DEFAULT 0',
+    })
+    db.execute('''
+        INSERT OR IGNORE INTO job_run_counts (job_id, run_count)
+        SELECT DISTINCT job_id, 0 FROM job_run_rollups
+    ''')
+    db.execute('''
+        UPDATE job_run_counts SET rolled_up_count = (
+            SELECT COALESCE(SUM(run_count), 0) FROM job_run_rollups r
+            WHERE r.job_id = job_run_counts.job_id
+        )
+    ''')
+
+# Schema migrations, applied in order. A database at version N has had the
+# first N applied; the version is tracked in PRAGMA user_version. Never edit
+# or reorder a migration once released, only append new ones.
+MIGRATIONS = [
+    _migration_1_base_schema,
+    _migration_2_indexes,
+    _migration_3_latest_alert_index,
+    _migration_4_run_pagination,
+    _migration_5_run_rollups,
+    _migration_6_clients,
+    _migration_7_job_stats,
+    _migration_8_leases_and_alert_keys,
+    _migration_9_alert_groups,
+    _migration_10_alert_incidents,
+    _migration_11_job_checks,
+    _migration_12_schedule_kinds,
+    _migration_13_rollup_history,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(db) -> int:
+    """Return the migration version recorded in the database"""
+    return db.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(db, target: Optional[int] = None) -> int:
+    """Apply pending migrations up to target (default: latest) and return the new version"""
+    target = SCHEMA_VERSION if target is None else target
+    current = get_schema_version(db)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this release supports ({SCHEMA_VERSION})"
+        )
+    for version in range(current + 1, target + 1):
+        MIGRATIONS[version - 1](db)
+        db.execute(f'PRAGMA user_version = {version}')
+    return max(current, target)
+
 def init_db(force_recreate: bool = False):
-    """Initialize the database with required tables"""
+    """Initialize the database and bring its schema up to date"""
     # Ensure the parent directory exists
     DATABASE_FILE.parent.mkdir(parents=True, exist_ok=True)
     
     # Optionally delete existing database
     if force_recreate and DATABASE_FILE.exists():
+        close_db()
         os.remove(DATABASE_FILE)
+        shared_version.close()
+        for suffix in ('-wal', '-shm', '-version'):
+            Path(f"{DATABASE_FILE}{suffix}").unlink(missing_ok=True)
     
-    # Create database and tables
-    with get_db() as db:
-        # Create job_configs table
-        db.execute('''
-            CREATE TABLE IF NOT EXISTS job_configs (
-                job_id TEXT PRIMARY KEY,
-                schedule TEXT NOT NULL,
-                tolerance_minutes INTEGER NOT NULL,
-                max_runtime_minutes INTEGER,
-                needs_end_signal BOOLEAN DEFAULT FALSE,
-                paused BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_start TIMESTAMP,
-                last_end TIMESTAMP,
-                duration REAL
-            )
-        ''')
+    execute_write(migrate)
+    # Migrations may have rewritten config rows; load the registry afresh
+    job_configs.clear()
+    job_configs.load()
 
-        # Create job_runs table
-        db.execute('''
-            CREATE TABLE IF NOT EXISTS job_runs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id TEXT NOT NULL,
-                start_time TIMESTAMP NOT NULL,
-                end_time TIMESTAMP,
-                duration REAL,
-                client_info TEXT,
-                FOREIGN KEY (job_id) REFERENCES job_configs (job_id)
-            )
-        ''')
+# None unless CRONICLE_DB_PROFILE is set, so unprofiled connections pay nothing
+query_profiler = QueryProfiler(__file__, DB_SLOW_QUERY_MS / 1000 if DB_SLOW_QUERY_MS > 0 else None) if DB_PROFILE else None
 
-        # Create job_alerts table
-        db.execute('''
-            CREATE TABLE IF NOT EXISTS job_alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id TEXT NOT NULL,
-                alert_type TEXT NOT NULL,
-                expected_start_time TIMESTAMP,
-                actual_start_time TIMESTAMP,
-                detected_time TIMESTAMP NOT NULL,
-                alert_message TEXT NOT NULL,
-                acknowledged BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (job_id) REFERENCES job_configs (job_id)
-            )
-        ''')
-        
-        # Add any missing columns to existing tables
-        columns = {col[1] for col in db.execute('PRAGMA table_info(job_runs)')}
-        
-        # Add client_info column if it doesn't exist
-        if 'client_info' not in columns:
-            db.execute('ALTER TABLE job_runs ADD COLUMN client_info TEXT')
-    
-    # Update schema if needed
-    update_schema()
+class ConnectionPool:
+    """A fixed set of long-lived read connections plus a factory for the writer.
+
+    Connections are opened lazily and configured once with DB_PRAGMAS. Read
+    connections are marked query_only so that writes can only go through the
+    WriteQueue, which owns the one write connection.
+    """
+
+    def __init__(self, database: Path, size: int = DB_POOL_SIZE, pragmas: Optional[dict] = None):
+        self.database = database
+        self.size = max(1, size)
+        self.pragmas = DB_PRAGMAS if pragmas is None else pragmas
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def connect(self, read_only: bool = True) -> sqlite3.Connection:
+        """Open a new configured connection.
+
+        Write connections use autocommit mode so the caller controls
+        transactions explicitly.
+        """
+        conn = sqlite3.connect(
+            str(self.database),
+            timeout=DB_BUSY_TIMEOUT,
+            check_same_thread=False,
+            isolation_level='' if read_only else None,
+            factory=ProfilingConnection if query_profiler else sqlite3.Connection
+        )
+        if query_profiler:
+            conn.profiler = query_profiler
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def _check_pid(self):
+        # Connections must not be shared across a fork; start over in the child
+        if self._pid != os.getpid():
+            self._idle = queue.LifoQueue()
+            self._opened = 0
+            self._pid = os.getpid()
+
+    def _acquire(self) -> sqlite3.Connection:
+        self._check_pid()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self.connect(read_only=True)
+                except Exception:
+                    self._opened -= 1
+                    raise
+        return self._idle.get()
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read connection and return it to the pool afterwards"""
+        conn = self._acquire()
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            # Release any read snapshot still held by an unfinished statement
+            conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        """Close every idle read connection"""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._opened = 0
+
+class SharedVersion:
+    """Change counters shared by every process using the database.
+
+    Kept in a small memory-mapped file next to the database, so reading them
+    costs no system call: one counts committed writes, for ETags, the other
+    changes to job definitions, for the config registry. Writers bump them
+    after each commit under a POSIX record lock. A random nonce written when
+    the file is created keeps the tokens of a recreated file from repeating.
+    Each process also counts its own bumps, so it can tell when others wrote.
+    """
+
+    _LAYOUT = struct.Struct('<8sQQ')
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = None
+        self._map = None
+        self._lock = threading.Lock()
+        # Writes counted when this process opened the file, plus its own since
+        self._known = None
+
+    @staticmethod
+    def _lock_file(fd: int, locked: bool):
+        if fcntl is not None:
+            fcntl.lockf(fd, fcntl.LOCK_EX if locked else fcntl.LOCK_UN)
+
+    def _open(self) -> mmap.mmap:
+        if self._map is None:
+            with self._lock:
+                if self._map is None:
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    self._lock_file(fd, True)
+                    try:
+                        if os.fstat(fd).st_size < self._LAYOUT.size:
+                            os.pwrite(fd, self._LAYOUT.pack(os.urandom(8), 0, 0), 0)
+                    finally:
+                        self._lock_file(fd, False)
+                    self._map = mmap.mmap(fd, self._LAYOUT.size)
+                    self._fd = fd
+                    self._known = self._LAYOUT.unpack_from(self._map)[1]
+        return self._map
+
+    def token(self) -> str:
+        """Changes whenever a write is committed"""
+        nonce, data, _ = self._LAYOUT.unpack_from(self._open())
+        return f"{nonce.hex()}-{data}"
+
+    def configs(self) -> int:
+        """Changes whenever a job definition is created, changed or deleted"""
+        return self._LAYOUT.unpack_from(self._open())[2]
+
+    def foreign_writes(self) -> int:
+        """Writes committed by other processes since this one opened the file"""
+        mapped = self._open()
+        with self._lock:
+            return self._LAYOUT.unpack_from(mapped)[1] - self._known
+
+    def bump(self, configs: bool = False):
+        mapped = self._open()
+        with self._lock:
+            self._lock_file(self._fd, True)
+            try:
+                nonce, data, config_version = self._LAYOUT.unpack_from(mapped)
+                self._LAYOUT.pack_into(mapped, 0, nonce, data + 1, config_version + configs)
+                self._known += 1
+            finally:
+                self._lock_file(self._fd, False)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                os.close(self._fd)
+                self._map = self._fd = None
+
+class WriteQueue:
+    """Single writer thread that owns the only write connection.
+
+    Write operations are callables taking a cursor. They are queued by any
+    thread and executed by the writer in batches: a batch is flushed once it
+    holds `batch_size` operations or `max_delay` seconds after its first
+    operation arrived, whichever comes first, and the whole batch is
+    committed with a single fsync. The writer only waits for more operations
+    while writes are arriving concurrently, that is, after a batch of more
+    than one; a lone write is committed at once. Each operation runs inside
+    its own savepoint, so a failing operation is rolled back and reported to
+    its caller without affecting the rest of the batch.
+
+    `version` is incremented after every committed batch, before any caller
+    sees its result, so readers can tell cheaply whether anything changed;
+    `shared_version`, if given, is bumped along with it so that other
+    processes writing to the same database can tell as well. Operations
+    can register after_commit() callbacks to update in-memory state only
+    once their changes are durable. Bookkeeping operations can call
+    unversioned() so that committing them alone leaves `version` as it is,
+    and operations changing job definitions call configs_changed() so that
+    other processes reload their registries.
+    """
+
+    _STOP = object()
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = DB_WRITE_BATCH_SIZE, max_delay: float = DB_WRITE_MAX_DELAY,
+                 shared_version: Optional[SharedVersion] = None):
+        self.pool = pool
+        self.shared_version = shared_version
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._cursor = None
+        self._callbacks = None
+        self._versioned = True
+        self._configs_changed = False
+        self._pid = os.getpid()
+        self._concurrent = False
+        self.version = 0
+        self.commits = 0
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            self._queue = queue.Queue()
+            self._thread = None
+            self._pid = os.getpid()
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='cronicle-db-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, op) -> Future:
+        """Queue a write operation and return a future for its result"""
+        future = Future()
+        if threading.current_thread() is self._thread:
+            # Called from inside another write operation: run it in place
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(op(self._cursor))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._ensure_started()
+        self._queue.put((future, op))
+        return future
+
+    def execute(self, op):
+        """Run a write operation and wait for it to be committed"""
+        return self.submit(op).result()
+
+    def after_commit(self, callback):
+        """From inside a write operation, run callback() once it is committed.
+
+        Callbacks of an operation that fails are discarded with its changes.
+        """
+        if threading.current_thread() is not self._thread or self._callbacks is None:
+            raise RuntimeError("after_commit() must be called from a write operation")
+        self._callbacks.append(callback)
+
+    def unversioned(self):
+        """From inside a write operation, mark it as changing nothing clients read"""
+        if threading.current_thread() is not self._thread or self._callbacks is None:
+            raise RuntimeError("unversioned() must be called from a write operation")
+        self._versioned = False
+
+    def configs_changed(self):
+        """From inside a write operation, announce a change to job definitions"""
+        if threading.current_thread() is not self._thread or self._callbacks is None:
+            raise RuntimeError("configs_changed() must be called from a write operation")
+        self._configs_changed = True
+
+    def _run(self):
+        conn = self.pool.connect(read_only=False)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._STOP:
+                    break
+                batch = [item]
+                stopping = False
+                deadline = time.monotonic() + (self.max_delay if self._concurrent else 0)
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    try:
+                        if timeout > 0:
+                            item = self._queue.get(timeout=timeout)
+                        else:
+                            item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._concurrent = len(batch) > 1
+                self._commit(conn, batch)
+                if stopping:
+                    break
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list):
+        cursor = conn.cursor()
+        self._cursor = cursor
+        self._callbacks = callbacks = []
+        outcomes = []
+        changed = configs_changed = False
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for future, op in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute('SAVEPOINT write_op')
+                registered = len(callbacks)
+                self._versioned = True
+                self._configs_changed = False
+                try:
+                    result = op(cursor)
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO write_op')
+                    cursor.execute('RELEASE write_op')
+                    del callbacks[registered:]
+                    future.set_exception(e)
+                else:
+                    cursor.execute('RELEASE write_op')
+                    outcomes.append((future, result))
+                    changed = changed or self._versioned
+                    configs_changed = configs_changed or self._configs_changed
+            cursor.execute('COMMIT')
+            self.commits += 1
+            if changed:
+                self.version += 1
+                if self.shared_version is not None:
+                    self.shared_version.bump(configs_changed)
+        except Exception as e:
+            # The transaction itself failed; nothing in the batch was committed
+            if conn.in_transaction:
+                conn.rollback()
+            for future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._cursor = None
+            self._callbacks = None
+            cursor.close()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error running after-commit callback: {str(e)}")
+        for future, result in outcomes:
+            future.set_result(result)
+
+    def depth(self) -> int:
+        """Number of operations waiting for the writer thread"""
+        return self._queue.qsize()
+
+    def close(self):
+        """Flush pending operations and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(self._STOP)
+            thread.join()
+
+pool = ConnectionPool(DATABASE_FILE)
+shared_version = SharedVersion(Path(f"{DATABASE_FILE}-version"))
+writer = WriteQueue(pool, shared_version=shared_version)
 
-@contextmanager
 def get_db():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(str(DATABASE_FILE))
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn.cursor()
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    """Context manager for pooled read-only database access"""
+    return pool.reader()
+
+def execute_write(op):
+    """Run op(cursor) on the writer thread and return its result once committed"""
+    return writer.execute(op)
+
+# Client ids by fingerprint, only touched on the writer thread. Entries are
+# added once the transaction that created or found them has committed.
+_client_ids: Dict[bytes, int] = {}
+CLIENT_ID_CACHE_SIZE = 10000
+
+def _intern_client_info(db, client_info: Optional[dict]) -> Tuple[Optional[int], Optional[str]]:
+    """Client id and custom metadata JSON to store on a run, on the writer thread"""
+    client, custom_metadata = split_client_info(client_info)
+    custom_metadata = json.dumps(custom_metadata) if custom_metadata else None
+    if not client:
+        return None, custom_metadata
+    fingerprint, _ = _client_json(client)
+    client_id = _client_ids.get(fingerprint)
+    if client_id is None:
+        client_id = _insert_client(db, client)
+        def remember():
+            if len(_client_ids) >= CLIENT_ID_CACHE_SIZE:
+                _client_ids.clear()
+            _client_ids[fingerprint] = client_id
+        writer.after_commit(remember)
+    return client_id, custom_metadata
+
+def _client_info_from_row(client_json: Optional[str], custom_metadata: Optional[str], legacy_json: Optional[str] = None) -> Optional[dict]:
+    """Reassemble a run's client info from its client and custom metadata"""
+    if legacy_json:
+        return json.loads(legacy_json)
+    client_info = json.loads(client_json) if client_json else {}
+    if custom_metadata:
+        client_info['custom_metadata'] = json.loads(custom_metadata)
+    return client_info or None
+
+def get_data_version() -> str:
+    """Token that changes whenever a write is committed, by this process or any other"""
+    return shared_version.token()
+
+def close_db():
+    """Stop the async executor and the writer and close all pooled connections"""
+    aio.close()
+    writer.close()
+    pool.close()
+    shared_version.close()
+
+atexit.register(close_db)
 
 def save_job_config(job_id: str, schedule: str, tolerance_minutes: int, max_runtime_minutes: int = 60, paused: bool = False):
     """Save or update a job configuration"""
-    with get_db() as db:
+    parsed = schedules.parse_schedule(schedule)
+    def _write(db):
         db.execute('''
-            INSERT OR REPLACE INTO job_configs (job_id, schedule, tolerance_minutes, max_runtime_minutes, paused)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (job_id, schedule, tolerance_minutes, max_runtime_minutes, paused))
+            INSERT OR REPLACE INTO job_configs (
+                job_id, schedule, schedule_kind, interval_seconds, jitter_seconds,
+                tolerance_minutes, max_runtime_minutes, paused
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            job_id, parsed['schedule'], parsed['schedule_kind'], parsed['interval_seconds'],
+            parsed['jitter_seconds'], tolerance_minutes, max_runtime_minutes, paused
+        ))
+        _restart_checks(db, job_id)
+        writer.configs_changed()
+        _refresh_job_config(db, job_id)
+    return execute_write(_write)
+
+JOB_CONFIG_COLUMNS = '''
+    job_id,
+    schedule,
+    tolerance_minutes,
+    max_runtime_minutes,
+    paused,
+    last_start,
+    last_end,
+    duration,
+    schedule_kind,
+    interval_seconds,
+    jitter_seconds
+'''
+
+def _job_config_from_row(row) -> dict:
+    return {
+        'job_id': row[0],
+        'schedule': row[1],
+        'tolerance_minutes': row[2],
+        'max_runtime_minutes': row[3],
+        'paused': bool(row[4]),
+        'last_start_time': row[5],  # Keep the _time suffix for frontend compatibility
+        'last_end_time': row[6],    # Keep the _time suffix for frontend compatibility
+        'duration': row[7],
+        'schedule_kind': row[8],
+        'interval_seconds': row[9],
+        'jitter_seconds': row[10]
+    }
+
+class JobConfigRegistry:
+    """In-memory copy of the job_configs table.
+
+    The whole table is loaded once; after that lookups, including those for
+    unknown job ids, never touch SQLite. Every write function that changes a
+    config row re-reads it inside its own transaction and hands it over
+    through WriteQueue.after_commit(), so changes appear here once they are
+    committed and rolled-back writes never do. Updates wait for a load in
+    progress and are applied on top of it. `version` counts applied changes.
+
+    Job definitions changed by other processes are noticed through
+    `shared_version`, and the table is reloaded; their last start and end
+    times are only picked up along with such a reload.
+    """
+
+    def __init__(self, shared_version: Optional[SharedVersion] = None):
+        self.shared_version = shared_version
+        self._configs: Optional[dict] = None
+        self._synced = None
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> dict:
+        """Return the cached table, reading it from SQLite if needed"""
+        configs = self._configs
+        if configs is not None:
+            return configs
+        with self._lock:
+            if self._configs is None:
+                self.misses += 1
+                if self.shared_version is not None:
+                    self._synced = self.shared_version.configs()
+                with get_db() as db:
+                    rows = db.execute(f'SELECT {JOB_CONFIG_COLUMNS} FROM job_configs').fetchall()
+                self._configs = {row[0]: _job_config_from_row(row) for row in rows}
+            return self._configs
+
+    def _lookup(self) -> dict:
+        configs = self._configs
+        if configs is not None and self.shared_version is not None and self.shared_version.configs() != self._synced:
+            self.clear()
+            configs = None
+        if configs is None:
+            return self.load()
+        self.hits += 1
+        return configs
+
+    def current(self) -> bool:
+        """Whether lookups can be answered without reading SQLite"""
+        return self._configs is not None and (
+            self.shared_version is None or self.shared_version.configs() == self._synced
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        config = self._lookup().get(job_id)
+        return dict(config) if config else None
+
+    def get_many(self, job_ids) -> dict:
+        configs = self._lookup()
+        return {job_id: dict(configs[job_id]) for job_id in job_ids if job_id in configs}
+
+    def all(self) -> List[dict]:
+        configs = self._lookup()
+        with self._lock:
+            rows = list(configs.values())
+        return [dict(config) for config in sorted(rows, key=lambda config: config['job_id'])]
+
+    def put(self, job_id: str, config: Optional[dict]):
+        """Replace or, if config is None, remove a cached config"""
+        with self._lock:
+            self.version += 1
+            if self._configs is None:
+                return
+            if config is None:
+                self._configs.pop(job_id, None)
+            else:
+                self._configs[job_id] = config
+
+    def clear(self):
+        """Drop everything; the table is reloaded on the next lookup"""
+        with self._lock:
+            self.version += 1
+            self._configs = None
+
+    def stats(self) -> dict:
+        configs = self._configs
+        return {
+            'size': len(configs) if configs is not None else None,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+job_configs = JobConfigRegistry(shared_version)
+
+def _refresh_job_config(db, job_id: str):
+    """From a write operation, update the registry with the job's row once committed"""
+    row = db.execute(f'SELECT {JOB_CONFIG_COLUMNS} FROM job_configs WHERE job_id = ?', (job_id,)).fetchone()
+    config = _job_config_from_row(row) if row else None
+    writer.after_commit(lambda: job_configs.put(job_id, config))
+
+def _refresh_job_configs(db, job_ids: List[str]):
+    """Like _refresh_job_config for many jobs, reading their rows in chunks"""
+    job_ids = list(dict.fromkeys(job_ids))
+    configs = dict.fromkeys(job_ids)
+    for i in range(0, len(job_ids), 500):
+        chunk = job_ids[i:i + 500]
+        rows = db.execute(
+            f"SELECT {JOB_CONFIG_COLUMNS} FROM job_configs WHERE job_id IN ({','.join('?' * len(chunk))})",
+            chunk
+        ).fetchall()
+        for row in rows:
+            configs[row[0]] = _job_config_from_row(row)
+
+    def apply():
+        for job_id, config in configs.items():
+            job_configs.put(job_id, config)
+    writer.after_commit(apply)
 
 def get_job_config(job_id: str) -> Optional[dict]:
     """Get a job configuration by ID"""
-    with get_db() as db:
-        cursor = db.execute('''
-            SELECT 
-                job_id,
-                schedule,
-                tolerance_minutes,
-                max_runtime_minutes,
-                paused,
-                last_start,
-                last_end,
-                duration
-            FROM job_configs 
-            WHERE job_id = ?
-        ''', (job_id,))
-        
-        row = cursor.fetchone()
-        if row:
-            return {
-                'job_id': row[0],
-                'schedule': row[1],
-                'tolerance_minutes': row[2],
-                'max_runtime_minutes': row[3],
-                'paused': bool(row[4]),
-                'last_start_time': row[5],  # Keep the _time suffix for frontend compatibility
-                'last_end_time': row[6],    # Keep the _time suffix for frontend compatibility
-                'duration': row[7]
-            }
-        return None
+    return job_configs.get(job_id)
+
+def get_job_configs(job_ids: List[str]) -> dict:
+    """Get the configurations of several jobs, keyed by job ID; unknown IDs are left out"""
+    return job_configs.get_many(job_ids)
 
 def get_all_job_configs():
     """Get all job configurations"""
-    with get_db() as db:
-        cursor = db.execute('''
-            SELECT 
-                job_id,
-                schedule,
-                tolerance_minutes,
-                max_runtime_minutes,
-                paused,
-                last_start,
-                last_end,
-                duration
-            FROM job_configs
-            ORDER BY job_id
-        ''')
-        
-        jobs = []
-        for row in cursor:
-            jobs.append({
-                'job_id': row[0],
-                'schedule': row[1],
-                'tolerance_minutes': row[2],
-                'max_runtime_minutes': row[3],
-                'paused': bool(row[4]),
-                'last_start_time': row[5],  # Keep the _time suffix for frontend compatibility
-                'last_end_time': row[6],    # Keep the _time suffix for frontend compatibility
-                'duration': row[7]
-            })
-        return jobs
+    return job_configs.all()
 
 def start_job_run(job_id: str, client_info: dict, alert_message: str = None):
     """Record a job start with client information"""
-    with get_db() as db:
+    def _write(db):
+        client_id, custom_metadata = _intern_client_info(db, client_info)
         db.execute('''
             INSERT INTO job_runs (
-                job_id, start_time, client_info
+                job_id, start_time, client_id, custom_metadata
             )
-            VALUES (?, ?, ?)
+            VALUES (?, ?, ?, ?)
         ''', (
             job_id,
             datetime.now(pytz.UTC).isoformat(),
-            json.dumps(client_info) if client_info else None
+            client_id,
+            custom_metadata
         ))
         return db.lastrowid
+    return execute_write(_write)
 
 def end_job_run(job_id: str, run_id: int):
     """Record a job end"""
-    with get_db() as db:
+    def _write(db):
         end_time = datetime.now(pytz.UTC)
         db.execute('SELECT start_time FROM job_runs WHERE id = ?', (run_id,))
         row = db.fetchone()
@@ -221,15 +1266,22 @@ def end_job_run(job_id: str, run_id: int):
             SET end_time = ?, duration = ?
             WHERE id = ?
         ''', (end_time.isoformat(), duration, run_id))
+        # This endpoint stores seconds; the statistics are kept in minutes
+        durations = DurationStats()
+        durations.add(duration / 60)
+        _record_durations(db, {job_id: durations})
         return duration
+    return execute_write(_write)
 
 def get_latest_job_run(job_id: str):
     """Get the most recent run for a job"""
     with get_db() as db:
         db.execute('''
-            SELECT * FROM job_runs
-            WHERE job_id = ?
-            ORDER BY start_time DESC
+            SELECT jr.*, c.client_info AS client_json
+            FROM job_runs jr
+            LEFT JOIN clients c ON c.id = jr.client_id
+            WHERE jr.job_id = ?
+            ORDER BY jr.start_time DESC
             LIMIT 1
         ''', (job_id,))
         row = db.fetchone()
@@ -237,90 +1289,292 @@ def get_latest_job_run(job_id: str):
             result = dict(row)
             result['start_time'] = from_db_datetime(result.get('start_time'))
             result['end_time'] = from_db_datetime(result.get('end_time'))
-            result['client_info'] = json.loads(result.get('client_info')) if result.get('client_info') else None
+            result['client_info'] = _client_info_from_row(
+                result.pop('client_json'), result.pop('custom_metadata'), result.get('client_info')
+            )
             return result
         return None
 
-def get_job_status(job_id: str):
-    """Get comprehensive job status including config and latest run"""
+def get_latest_run_starts(job_ids: List[str]) -> Dict[str, Optional[datetime]]:
+    """Start time of each job's most recent run (None if it never ran), in one query"""
     with get_db() as db:
-        # Get job config
-        db.execute('SELECT * FROM job_configs WHERE job_id = ?', (job_id,))
-        config = db.fetchone()
-        if not config:
-            return None
-        
-        # Get latest run with client information and latest alert status
-        db.execute('''
-            WITH LatestAlert AS (
-                SELECT 
-                    job_id,
-                    alert_message,
-                    detected_time as alert_time,
-                    acknowledged
-                FROM job_alerts 
-                WHERE job_id = ?
+        rows = db.execute('''
+            SELECT value, (
+                SELECT start_time FROM job_runs
+                WHERE job_id = value
+                ORDER BY start_time DESC
+                LIMIT 1
+            )
+            FROM json_each(?)
+        ''', (json.dumps(list(job_ids)),)).fetchall()
+    return {row[0]: from_db_datetime(row[1]) for row in rows}
+
+def get_jobs_overview(job_id: Optional[str] = None) -> List[dict]:
+    """Get every job (or a single job) with its latest run and latest alert.
+
+    Everything comes back from one query; the latest run and alert of each
+    job are index lookups rather than a query per job.
+    """
+    with get_db() as db:
+        query = '''
+            SELECT
+                jc.job_id,
+                jc.schedule,
+                jc.tolerance_minutes,
+                jc.max_runtime_minutes,
+                jc.paused,
+                jc.last_start,
+                jc.last_end,
+                jc.duration,
+                jc.needs_end_signal,
+                jc.created_at,
+                jc.schedule_kind,
+                jc.interval_seconds,
+                jc.jitter_seconds,
+                jr.id AS run_id,
+                jr.start_time AS run_start_time,
+                jr.end_time AS run_end_time,
+                jr.duration AS run_duration,
+                jr.client_info AS run_legacy_client_info,
+                jr.custom_metadata AS run_custom_metadata,
+                c.client_info AS run_client_info,
+                ja.id AS alert_id,
+                ja.alert_type,
+                ja.alert_message,
+                ja.detected_time AS alert_time,
+                ja.acknowledged AS alert_acknowledged
+            FROM job_configs jc
+            LEFT JOIN job_runs jr ON jr.id = (
+                SELECT id FROM job_runs
+                WHERE job_id = jc.job_id
+                ORDER BY start_time DESC
+                LIMIT 1
+            )
+            LEFT JOIN clients c ON c.id = jr.client_id
+            LEFT JOIN job_alerts ja ON ja.id = (
+                SELECT id FROM job_alerts
+                WHERE job_id = jc.job_id
                 ORDER BY detected_time DESC
                 LIMIT 1
             )
-            SELECT 
-                job_runs.*,
-                json_extract(client_info, '$') as client_info,
-                la.alert_message,
-                la.alert_time,
-                la.acknowledged as alert_acknowledged
-            FROM job_runs
-            LEFT JOIN LatestAlert la ON job_runs.job_id = la.job_id
-            WHERE job_runs.job_id = ?
-            ORDER BY start_time DESC
-            LIMIT 1
-        ''', (job_id, job_id))
-        latest_run = db.fetchone()
+        '''
+        params = []
+        if job_id:
+            query += " WHERE jc.job_id = ?"
+            params.append(job_id)
+        query += " ORDER BY jc.job_id"
         
-        status = dict(config)
+        jobs = []
+        for row in db.execute(query, params):
+            job = {
+                'job_id': row['job_id'],
+                'schedule': row['schedule'],
+                'tolerance_minutes': row['tolerance_minutes'],
+                'max_runtime_minutes': row['max_runtime_minutes'],
+                'paused': bool(row['paused']),
+                'last_start_time': row['last_start'],  # Keep the _time suffix for frontend compatibility
+                'last_end_time': row['last_end'],      # Keep the _time suffix for frontend compatibility
+                'duration': row['duration'],
+                'needs_end_signal': bool(row['needs_end_signal']),
+                'created_at': row['created_at'],
+                'schedule_kind': row['schedule_kind'],
+                'interval_seconds': row['interval_seconds'],
+                'jitter_seconds': row['jitter_seconds'],
+                'latest_run': None,
+                'latest_alert': None
+            }
+            if row['run_id'] is not None:
+                job['latest_run'] = {
+                    'id': row['run_id'],
+                    'start_time': from_db_datetime(row['run_start_time']),
+                    'end_time': from_db_datetime(row['run_end_time']),
+                    'duration': row['run_duration'],
+                    'client_info': _client_info_from_row(
+                        row['run_client_info'], row['run_custom_metadata'], row['run_legacy_client_info']
+                    )
+                }
+            if row['alert_id'] is not None:
+                job['latest_alert'] = {
+                    'id': row['alert_id'],
+                    'type': row['alert_type'],
+                    'alert_message': row['alert_message'],
+                    'detected_time': from_db_datetime(row['alert_time']),
+                    'acknowledged': bool(row['alert_acknowledged'])
+                }
+            jobs.append(job)
+        return jobs
+
+def _job_status(job: dict) -> dict:
+    """Build the job status view from a get_jobs_overview() entry"""
+    status = {
+        'job_id': job['job_id'],
+        'schedule': job['schedule'],
+        'schedule_kind': job['schedule_kind'],
+        'interval_seconds': job['interval_seconds'],
+        'jitter_seconds': job['jitter_seconds'],
+        'tolerance_minutes': job['tolerance_minutes'],
+        'max_runtime_minutes': job['max_runtime_minutes'],
+        'needs_end_signal': job['needs_end_signal'],
+        'paused': job['paused'],
+        'created_at': job['created_at'],
         # Initialize default values for jobs that haven't run yet
+        'last_start': None,
+        'last_end': None,
+        'duration': None,
+        'last_alert': None,
+        'last_alert_message': None,
+        'last_alert_acknowledged': False,
+        'client': None
+    }
+    
+    run = job['latest_run']
+    if run:
+        client_info = run['client_info'] or {}
         status.update({
-            'last_start': None,
-            'last_end': None,
-            'duration': None,
-            'last_alert': None,
-            'last_alert_message': None,
-            'last_alert_acknowledged': False,
-            'client': None
+            'last_start': run['start_time'],
+            'last_end': run['end_time'],
+            'duration': run['duration'],
+            'client': {
+                'ip_address': client_info.get('ip_address'),
+                'user_agent': client_info.get('user_agent'),
+                'hostname': client_info.get('hostname'),
+                'os_info': client_info.get('os_info'),
+                'additional_info': client_info.get('additional_info') or {}
+            }
         })
-        
-        if latest_run:
-            run_info = dict(latest_run)
-            run_info['start_time'] = from_db_datetime(run_info.get('start_time'))
-            run_info['end_time'] = from_db_datetime(run_info.get('end_time'))
-            run_info['alert_time'] = from_db_datetime(run_info.get('alert_time'))
-            status.update({
-                'last_start': run_info['start_time'],
-                'last_end': run_info['end_time'],
-                'duration': run_info['duration'],
-                'last_alert': run_info['alert_time'],
-                'last_alert_message': run_info['alert_message'],
-                'last_alert_acknowledged': bool(run_info.get('alert_acknowledged', False)),
-                'client': {
-                    'ip_address': run_info['ip_address'],
-                    'user_agent': run_info['user_agent'],
-                    'hostname': run_info['hostname'],
-                    'os_info': run_info['os_info'],
-                    'additional_info': json.loads(run_info['client_info']) if run_info['client_info'] else {}
-                }
-            })
-        
-        return status
+    
+    alert = job['latest_alert']
+    if alert:
+        status.update({
+            'last_alert': alert['detected_time'],
+            'last_alert_message': alert['alert_message'],
+            'last_alert_acknowledged': alert['acknowledged']
+        })
+    
+    return status
+
+def get_job_status(job_id: str):
+    """Get comprehensive job status including config, latest run and latest alert"""
+    jobs = get_jobs_overview(job_id)
+    return _job_status(jobs[0]) if jobs else None
 
 def get_all_job_statuses() -> List[dict]:
     """Get status for all jobs"""
-    jobs = []
-    configs = get_all_job_configs()
-    for config in configs:
-        status = get_job_status(config['job_id'])
-        if status:
-            jobs.append(status)
-    return jobs
+    return [_job_status(job) for job in get_jobs_overview()]
+
+class RecentAlerts:
+    """Keys of alerts known to be recorded: (job_id, alert type, start time).
+
+    A key is what the unique index on job_alerts enforces, with the start
+    time as stored. Keys that have not been looked up or added for `ttl`
+    seconds are evicted, and the least recently used beyond `maxsize`. A
+    key missing here may still be in the database, so callers insert the
+    alert with INSERT OR IGNORE, which remembers the key either way.
+    """
+
+    def __init__(self, ttl: float = ALERT_DEDUP_TTL, maxsize: int = ALERT_DEDUP_MAX_KEYS):
+        self.ttl = ttl
+        self.maxsize = max(1, maxsize)
+        self._keys: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def key(job_id: str, alert_type: AlertType, start_time: datetime) -> tuple:
+        return (job_id, alert_type.value, to_utc(start_time).isoformat())
+
+    def __contains__(self, key: tuple) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            seen = self._keys.get(key)
+            if seen is None or now - seen > self.ttl:
+                self.misses += 1
+                return False
+            self._keys[key] = now
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def add(self, key: tuple):
+        now = time.monotonic()
+        with self._lock:
+            self._keys[key] = now
+            self._keys.move_to_end(key)
+            self._evict(now)
+
+    def warm(self, keys) -> int:
+        """Remember keys loaded from the database; returns how many"""
+        now = time.monotonic()
+        count = 0
+        with self._lock:
+            for key in keys:
+                self._keys[tuple(key)] = now
+                count += 1
+            self._evict(now)
+        return count
+
+    def _evict(self, now: float):
+        keys = self._keys
+        while keys and (len(keys) > self.maxsize or now - next(iter(keys.values())) > self.ttl):
+            keys.popitem(last=False)
+
+    def discard_job(self, job_id: str):
+        with self._lock:
+            for key in [key for key in self._keys if key[0] == job_id]:
+                del self._keys[key]
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._keys),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+recent_alerts = RecentAlerts()
+
+def _insert_alert(
+    db,
+    job_id: str,
+    alert_type: AlertType,
+    alert_message: str,
+    expected_start_time: Optional[datetime],
+    actual_start_time: Optional[datetime],
+    detected_time: str,
+    incident_id: Optional[int] = None
+) -> Optional[int]:
+    """From a write operation, record an alert unless it exists; returns its id or None"""
+    db.execute('''
+        INSERT OR IGNORE INTO job_alerts (
+            job_id, alert_type, expected_start_time, actual_start_time,
+            detected_time, alert_message, incident_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        job_id,
+        alert_type.value,
+        to_utc(expected_start_time).isoformat() if expected_start_time else None,
+        to_utc(actual_start_time).isoformat() if actual_start_time else None,
+        detected_time,
+        alert_message,
+        incident_id
+    ))
+    start_time = actual_start_time or expected_start_time
+    if start_time:
+        key = RecentAlerts.key(job_id, alert_type, start_time)
+        writer.after_commit(lambda: recent_alerts.add(key))
+    if not db.rowcount:
+        return None
+    writer.after_commit(metrics.alerts_created.labels(alert_type.value).inc)
+    return db.lastrowid
 
 def add_job_alert(
     job_id: str,
@@ -328,69 +1582,190 @@ def add_job_alert(
     alert_message: str,
     expected_start_time: Optional[datetime] = None,
     actual_start_time: Optional[datetime] = None
-) -> int:
-    """Add a job alert to the database"""
+) -> Optional[int]:
+    """Add a job alert to the database.
+
+    Returns the new alert's id, or None if the same alert (job, type and
+    start time) was already recorded, e.g. by another process.
+    """
+    def _write(db):
+        return _insert_alert(
+            db, job_id, alert_type, alert_message, expected_start_time, actual_start_time,
+            datetime.now(pytz.UTC).isoformat()
+        )
+    return execute_write(_write)
+
+def record_alerts(
+    alerts: List[dict],
+    incidents: List[dict] = (),
+    checked_through: Optional[Dict[str, datetime]] = None
+) -> dict:
+    """Record a batch of alerts, and the incidents grouping some of them, in one transaction.
+
+    Alerts are dicts with the arguments of add_job_alert, plus `incident`,
+    the index in `incidents` of the incident they belong to, if any.
+    Incidents are dicts with reason, alert_type, schedule,
+    first_start_time, last_start_time and summary. `checked_through`
+    advances the missed-run watermarks of the checked jobs in the same
+    transaction. Returns `{'alert_ids': [...], 'incident_ids': [...]}` in
+    the order given, with None for duplicate alerts and for incidents all
+    of whose alerts were duplicates.
+    """
+    def _write(db):
+        if checked_through:
+            _set_checked_through(db, checked_through)
+        detected_time = datetime.now(pytz.UTC).isoformat()
+        incident_ids = []
+        for incident in incidents:
+            db.execute('''
+                INSERT INTO alert_incidents (
+                    reason, alert_type, schedule, first_start_time, last_start_time,
+                    detected_time, alert_count, summary
+                ) VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+            ''', (
+                incident['reason'],
+                incident['alert_type'].value if incident['alert_type'] else None,
+                incident['schedule'],
+                to_utc(incident['first_start_time']).isoformat(),
+                to_utc(incident['last_start_time']).isoformat(),
+                detected_time,
+                incident['summary']
+            ))
+            incident_ids.append(db.lastrowid)
+        counts = [0] * len(incident_ids)
+        alert_ids = []
+        for alert in alerts:
+            index = alert.get('incident')
+            alert_id = _insert_alert(
+                db, alert['job_id'], alert['alert_type'], alert['alert_message'],
+                alert.get('expected_start_time'), alert.get('actual_start_time'),
+                detected_time, incident_ids[index] if index is not None else None
+            )
+            alert_ids.append(alert_id)
+            if alert_id is not None and index is not None:
+                counts[index] += 1
+        for i, (incident_id, count) in enumerate(zip(incident_ids, counts)):
+            if count:
+                db.execute('UPDATE alert_incidents SET alert_count = ? WHERE id = ?', (count, incident_id))
+                writer.after_commit(metrics.alert_incidents.labels(incidents[i]['reason']).inc)
+            else:
+                db.execute('DELETE FROM alert_incidents WHERE id = ?', (incident_id,))
+                incident_ids[i] = None
+        if not any(alert_id is not None for alert_id in alert_ids):
+            # Only watermarks moved
+            writer.unversioned()
+        return {'alert_ids': alert_ids, 'incident_ids': incident_ids}
+    return execute_write(_write)
+
+def _set_checked_through(db, checked_through: Dict[str, datetime]):
+    db.executemany('''
+        INSERT INTO job_checks (job_id, checked_through) VALUES (?, ?)
+        ON CONFLICT (job_id) DO UPDATE SET checked_through = excluded.checked_through
+        WHERE excluded.checked_through > job_checks.checked_through
+    ''', [(job_id, to_utc(when).isoformat()) for job_id, when in checked_through.items()])
+
+def _restart_checks(db, job_id: str):
+    # A new, changed or resumed job is checked from its latest expected run
+    # on, not for what it missed before
+    db.execute('DELETE FROM job_checks WHERE job_id = ?', (job_id,))
+
+def get_checked_through() -> Dict[str, datetime]:
+    """Latest expected start each job's missed-run check has handled, keyed by job ID"""
     with get_db() as db:
-        db.execute('''
-            INSERT INTO job_alerts (
-                job_id, alert_type, expected_start_time, actual_start_time,
-                detected_time, alert_message
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            job_id,
-            alert_type.value,
-            to_utc(expected_start_time).isoformat() if expected_start_time else None,
-            to_utc(actual_start_time).isoformat() if actual_start_time else None,
-            datetime.now(pytz.UTC).isoformat(),
-            alert_message
-        ))
-        return db.lastrowid
+        rows = db.execute('SELECT job_id, checked_through FROM job_checks').fetchall()
+    return {row[0]: from_db_datetime(row[1]) for row in rows}
+
+def get_alert_incidents(limit: int = 50, incident_ids: Optional[List[int]] = None) -> List[dict]:
+    """Latest incidents first, or the given ones, each with the ids of its jobs"""
+    with get_db() as db:
+        if incident_ids is not None:
+            rows = db.execute(
+                f"SELECT * FROM alert_incidents WHERE id IN ({','.join('?' * len(incident_ids))}) ORDER BY id DESC",
+                list(incident_ids)
+            ).fetchall() if incident_ids else []
+        else:
+            rows = db.execute('SELECT * FROM alert_incidents ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        incidents = []
+        for row in rows:
+            incident = dict(row)
+            for column in ('first_start_time', 'last_start_time', 'detected_time'):
+                incident[column] = from_db_datetime(incident[column])
+            incident['job_ids'] = [
+                job_row[0] for job_row in db.execute(
+                    'SELECT DISTINCT job_id FROM job_alerts WHERE incident_id = ? ORDER BY job_id',
+                    (incident['id'],)
+                )
+            ]
+            incidents.append(incident)
+        return incidents
+
+def load_recent_alerts(limit: int = ALERT_DEDUP_MAX_KEYS) -> int:
+    """Reset recent_alerts to the keys of the latest alerts detected within its TTL"""
+    since = (datetime.now(pytz.UTC) - timedelta(seconds=recent_alerts.ttl)).isoformat()
+    with get_db() as db:
+        rows = db.execute('''
+            SELECT job_id, alert_type, COALESCE(actual_start_time, expected_start_time) AS start_time, detected_time
+            FROM job_alerts
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (limit,)).fetchall()
+    # Oldest first, so the most recent keys are the last to be evicted
+    recent_alerts.clear()
+    return recent_alerts.warm(
+        (row[0], row[1], row[2])
+        for row in reversed(rows)
+        if row[2] is not None and row[3] >= since
+    )
 
 def get_job_alerts(
     job_id: Optional[str] = None,
     alert_type: Optional[AlertType] = None,
     include_acknowledged: bool = False
 ) -> List[dict]:
-    """Get job alerts, optionally filtered by job_id, type and acknowledgment status"""
+    """Get the latest alert of each job and alert type, optionally filtered.
+
+    Each alert carries its group's alert_count and first/last detected time,
+    counting only unacknowledged alerts unless include_acknowledged is set.
+    Reads alert_groups, so the cost depends on the number of groups, not on
+    the alert history.
+    """
     with get_db() as db:
-        query = """
-            WITH RankedAlerts AS (
-                SELECT 
-                    id,
-                    job_id,
-                    alert_type,
-                    COUNT(*) OVER (PARTITION BY job_id, alert_type) as alert_count,
-                    MIN(detected_time) as first_detected,
-                    MAX(detected_time) as last_detected,
-                    alert_message,
-                    expected_start_time,
-                    actual_start_time,
-                    detected_time,
-                    acknowledged,
-                    created_at,
-                    ROW_NUMBER() OVER (PARTITION BY job_id, alert_type ORDER BY detected_time DESC) as rn
-                FROM job_alerts
-                WHERE 1=1
+        if include_acknowledged:
+            count, first_detected = 'g.alert_count', 'g.first_detected'
+        else:
+            count, first_detected = 'g.open_count', 'g.open_first_detected'
+        query = f"""
+            SELECT
+                a.id,
+                g.job_id,
+                g.alert_type,
+                {count} AS alert_count,
+                {first_detected} AS first_detected,
+                g.last_detected,
+                a.alert_message,
+                a.expected_start_time,
+                a.actual_start_time,
+                a.detected_time,
+                g.open_count = 0 AS acknowledged,
+                a.created_at
+            FROM alert_groups g
+            JOIN job_alerts a ON a.id = g.latest_alert_id
+            WHERE 1=1
         """
         params = []
         
         if not include_acknowledged:
-            query += " AND acknowledged = 0"
+            query += " AND g.open_count > 0"
         
         if job_id:
-            query += " AND job_id = ?"
+            query += " AND g.job_id = ?"
             params.append(job_id)
         
         if alert_type:
-            query += " AND alert_type = ?"
+            query += " AND g.alert_type = ?"
             params.append(alert_type.value)
             
-        query += """
-            GROUP BY job_id, alert_type
-            )
-            SELECT * FROM RankedAlerts WHERE rn = 1
-            ORDER BY detected_time DESC
-        """
+        query += " ORDER BY g.last_detected DESC"
         
         results = []
         for row in db.execute(query, params).fetchall():
@@ -408,7 +1783,7 @@ def get_job_alerts(
 
 def acknowledge_job_alert(alert_id: int) -> bool:
     """Mark a job alert as acknowledged"""
-    with get_db() as db:
+    def _write(db):
         # Get the job_id and alert_type for the alert we're acknowledging
         cursor = db.execute(
             "SELECT job_id, alert_type FROM job_alerts WHERE id = ?",
@@ -421,31 +1796,62 @@ def acknowledge_job_alert(alert_id: int) -> bool:
             
         # Acknowledge all alerts of the same type for this job
         db.execute(
-            "UPDATE job_alerts SET acknowledged = 1 WHERE job_id = ? AND alert_type = ?",
+            "UPDATE job_alerts SET acknowledged = 1 WHERE job_id = ? AND alert_type = ? AND acknowledged = 0",
+            (alert['job_id'], alert['alert_type'])
+        )
+        db.execute(
+            "UPDATE alert_groups SET open_count = 0, open_first_detected = NULL WHERE job_id = ? AND alert_type = ?",
             (alert['job_id'], alert['alert_type'])
         )
         return True
+    return execute_write(_write)
 
 def update_job_config(job_id: str, max_runtime_minutes: int) -> bool:
     """Update a job configuration with max runtime"""
-    with get_db() as db:
+    def _write(db):
         db.execute('''
             UPDATE job_configs
             SET max_runtime_minutes = ?
             WHERE job_id = ?
         ''', (max_runtime_minutes, job_id))
-        return db.rowcount > 0
+        updated = db.rowcount > 0
+        writer.configs_changed()
+        _refresh_job_config(db, job_id)
+        return updated
+    return execute_write(_write)
 
-def get_running_jobs() -> List[dict]:
-    """Get all currently running jobs (started but not ended)"""
+def get_job_state_counts() -> dict:
+    """Count jobs by state: paused, alerting (unacknowledged alert), running or idle"""
     with get_db() as db:
-        db.execute('''
+        running = {row[0] for row in db.execute('SELECT DISTINCT job_id FROM job_runs WHERE end_time IS NULL')}
+        alerting = {row[0] for row in db.execute('SELECT DISTINCT job_id FROM alert_groups WHERE open_count > 0')}
+    counts = {'paused': 0, 'alerting': 0, 'running': 0, 'idle': 0}
+    for job in job_configs.all():
+        if job['paused']:
+            counts['paused'] += 1
+        elif job['job_id'] in alerting:
+            counts['alerting'] += 1
+        elif job['job_id'] in running:
+            counts['running'] += 1
+        else:
+            counts['idle'] += 1
+    return counts
+
+def get_running_jobs(job_id: Optional[str] = None) -> List[dict]:
+    """Get all currently running jobs (started but not ended), optionally for one job"""
+    with get_db() as db:
+        query = '''
             SELECT jr.*, jc.max_runtime_minutes
             FROM job_runs jr
             JOIN job_configs jc ON jr.job_id = jc.job_id
             WHERE jr.start_time IS NOT NULL
             AND jr.end_time IS NULL
-        ''')
+        '''
+        params = []
+        if job_id:
+            query += " AND jr.job_id = ?"
+            params.append(job_id)
+        db.execute(query, params)
         jobs = [dict(row) for row in db.fetchall()]
         # Convert datetime strings to UTC datetime objects
         for job in jobs:
@@ -456,135 +1862,547 @@ def get_running_jobs() -> List[dict]:
 
 def delete_job(job_id: str) -> None:
     """Delete a job and all its related data"""
-    with get_db() as db:
+    def _write(db):
         # Delete job alerts
         db.execute('DELETE FROM job_alerts WHERE job_id = ?', (job_id,))
-        # Delete job runs
+        db.execute('DELETE FROM alert_groups WHERE job_id = ?', (job_id,))
+        # Delete job runs and their counter
         db.execute('DELETE FROM job_runs WHERE job_id = ?', (job_id,))
+        db.execute('DELETE FROM job_run_counts WHERE job_id = ?', (job_id,))
+        db.execute('DELETE FROM job_run_rollups WHERE job_id = ?', (job_id,))
+        db.execute('DELETE FROM job_stats WHERE job_id = ?', (job_id,))
+        db.execute('DELETE FROM job_checks WHERE job_id = ?', (job_id,))
         # Delete job config
         db.execute('DELETE FROM job_configs WHERE job_id = ?', (job_id,))
+        writer.after_commit(lambda: recent_alerts.discard_job(job_id))
+        writer.configs_changed()
+        _refresh_job_config(db, job_id)
+    return execute_write(_write)
 
-def update_schema():
-    """Update database schema without losing data"""
-    with get_db() as db:
-        # Check if max_runtime_minutes column exists
-        cursor = db.execute("PRAGMA table_info(job_configs)")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        # Add max_runtime_minutes if it doesn't exist
-        if 'max_runtime_minutes' not in columns:
-            db.execute('''
-                ALTER TABLE job_configs 
-                ADD COLUMN max_runtime_minutes INTEGER
-            ''')
-        
-        # Add paused column if it doesn't exist
-        if 'paused' not in columns:
-            db.execute('''
-                ALTER TABLE job_configs 
-                ADD COLUMN paused BOOLEAN DEFAULT FALSE
-            ''')
-        
-        # Add last_start, last_end, duration columns if they don't exist
-        if 'last_start' not in columns:
-            db.execute('''
-                ALTER TABLE job_configs 
-                ADD COLUMN last_start TIMESTAMP
-            ''')
-        if 'last_end' not in columns:
-            db.execute('''
-                ALTER TABLE job_configs 
-                ADD COLUMN last_end TIMESTAMP
-            ''')
-        if 'duration' not in columns:
-            db.execute('''
-                ALTER TABLE job_configs 
-                ADD COLUMN duration REAL
-            ''')
-        
-        # Add needs_end_signal column if it doesn't exist
-        if 'needs_end_signal' not in columns:
-            db.execute('''
-                ALTER TABLE job_configs 
-                ADD COLUMN needs_end_signal BOOLEAN DEFAULT FALSE
-            ''')
+def acquire_lease(name: str, holder: str, ttl_seconds: float) -> bool:
+    """Take or renew a named lease for ttl_seconds; True if `holder` now holds it.
 
-def has_existing_alert(job_id: str, expected_start_time: Optional[datetime], alert_type: AlertType) -> bool:
-    """Check if an alert already exists for this job and expected start time"""
+    A lease held by someone else can only be taken once it has expired.
+    Expiry times are wall-clock, so every process must share the host clock.
+    """
+    def _write(db):
+        now = time.time()
+        db.execute('''
+            INSERT INTO leases (name, holder, acquired_at, expires_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                holder = excluded.holder,
+                acquired_at = CASE WHEN leases.holder = excluded.holder
+                                   THEN leases.acquired_at ELSE excluded.acquired_at END,
+                expires_at = excluded.expires_at
+            WHERE leases.holder = excluded.holder OR leases.expires_at <= excluded.acquired_at
+        ''', (name, holder, now, now + ttl_seconds))
+        # Renewals must not invalidate the ETags of every client
+        writer.unversioned()
+        return db.rowcount > 0
+    return execute_write(_write)
+
+def release_lease(name: str, holder: str) -> bool:
+    """Give up a lease so another process can take it without waiting for expiry"""
+    def _write(db):
+        db.execute('DELETE FROM leases WHERE name = ? AND holder = ?', (name, holder))
+        writer.unversioned()
+        return db.rowcount > 0
+    return execute_write(_write)
+
+def get_lease(name: str) -> Optional[dict]:
+    """Current holder of a lease with its acquisition and expiry times, if held"""
     with get_db() as db:
-        query = """
-            SELECT COUNT(*) as count 
-            FROM job_alerts 
-            WHERE job_id = ? AND alert_type = ?
-        """
-        params = [job_id, alert_type.value]
-        
-        if expected_start_time:
-            query += " AND expected_start_time = ?"
-            params.append(expected_start_time.isoformat())
-        
-        result = db.execute(query, params).fetchone()
-        return result['count'] > 0
+        row = db.execute(
+            'SELECT name, holder, acquired_at, expires_at FROM leases WHERE name = ? AND expires_at > ?',
+            (name, time.time())
+        ).fetchone()
+    if not row:
+        return None
+    return {
+        'name': row['name'],
+        'holder': row['holder'],
+        'acquired_at': datetime.fromtimestamp(row['acquired_at'], pytz.UTC),
+        'expires_at': datetime.fromtimestamp(row['expires_at'], pytz.UTC),
+    }
+
+def encode_run_cursor(start_time: str, run_id: int) -> str:
+    """Build an opaque pagination cursor pointing just past a run"""
+    raw = json.dumps([start_time, run_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_run_cursor(cursor: str) -> Tuple[str, int]:
+    """Parse a cursor from encode_run_cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        start_time, run_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(start_time, str) or not isinstance(run_id, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return start_time, run_id
+
+def encode_rollup_cursor(bucket_start: str, job_id: str, granularity: str) -> str:
+    """Build an opaque pagination cursor pointing just past a rollup"""
+    raw = json.dumps([bucket_start, job_id, granularity], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_history_cursor(cursor: str) -> tuple:
+    """Parse a run or rollup cursor into (start_time, run_id) or
+    (bucket_start, job_id, granularity), raising ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if isinstance(values, list) and len(values) == 3 and all(isinstance(value, str) for value in values):
+        return tuple(values)
+    return decode_run_cursor(cursor)
 
-def get_job_runs(offset: int = 0, limit: int = 10) -> List[dict]:
-    """Get paginated job runs"""
+def get_job_runs(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    job_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    run_ids: Optional[List[int]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Get a page of job runs, newest first, and the cursor for the next page.
+
+    Pages are addressed by keyset on (start_time, id) rather than OFFSET, so
+    every page costs the same index range scan no matter how deep it is.
+    `since` is inclusive and `until` exclusive. `run_ids` restricts the
+    page to the given runs.
+    """
+    query = '''
+        SELECT 
+            jr.id,
+            jr.job_id,
+            jr.start_time,
+            jr.end_time,
+            c.client_info,
+            jr.custom_metadata,
+            jr.client_info,
+            jc.max_runtime_minutes
+        FROM job_runs jr
+        LEFT JOIN job_configs jc ON jr.job_id = jc.job_id
+        LEFT JOIN clients c ON c.id = jr.client_id
+        WHERE 1=1
+    '''
+    params = []
+    
+    if cursor:
+        query += " AND (jr.start_time, jr.id) < (?, ?)"
+        params.extend(decode_run_cursor(cursor))
+    
+    if job_id:
+        query += " AND jr.job_id = ?"
+        params.append(job_id)
+    
+    if run_ids is not None:
+        query += f" AND jr.id IN ({','.join('?' * len(run_ids))})"
+        params.extend(run_ids)
+    
+    if since:
+        query += " AND jr.start_time >= ?"
+        params.append(to_utc(since).isoformat())
+    
+    if until:
+        query += " AND jr.start_time < ?"
+        params.append(to_utc(until).isoformat())
+    
+    # Fetch one extra row to find out whether there is a next page
+    query += " ORDER BY jr.start_time DESC, jr.id DESC LIMIT ?"
+    params.append(limit + 1)
+    
     with get_db() as db:
-        cursor = db.execute('''
-            SELECT 
-                jr.job_id,
-                jr.start_time,
-                jr.end_time,
-                jr.client_info,
-                jc.max_runtime_minutes
-            FROM job_runs jr
-            LEFT JOIN job_configs jc ON jr.job_id = jc.job_id
-            ORDER BY jr.start_time DESC
-            LIMIT ? OFFSET ?
-        ''', (limit, offset))
-        
-        runs = []
-        for row in cursor:
-            run = {
-                'job_id': row[0],
-                'start_time': from_db_datetime(row[1]) if row[1] else None,
-                'end_time': from_db_datetime(row[2]) if row[2] else None,
-                'client_info': json.loads(row[3]) if row[3] else None,
-                'is_health_check': not row[4],  # True if max_runtime_minutes is None/0
-            }
-            if run['start_time'] and run['end_time'] and not run['is_health_check']:
-                run['duration'] = (run['end_time'] - run['start_time']).total_seconds() / 60
-            else:
-                run['duration'] = None
-            runs.append(run)
-        return runs
+        rows = db.execute(query, params).fetchall()
+    
+    runs = []
+    for row in rows[:limit]:
+        run = {
+            'id': row[0],
+            'job_id': row[1],
+            'start_time': from_db_datetime(row[2]) if row[2] else None,
+            'end_time': from_db_datetime(row[3]) if row[3] else None,
+            'client_info': _client_info_from_row(row[4], row[5], row[6]),
+            'is_health_check': not row[7],  # True if max_runtime_minutes is None/0
+        }
+        if run['start_time'] and run['end_time'] and not run['is_health_check']:
+            run['duration'] = (run['end_time'] - run['start_time']).total_seconds() / 60
+        else:
+            run['duration'] = None
+        runs.append(run)
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_run_cursor(last[2], last[0])
+    return runs, next_cursor
+
+def count_job_runs(job_id: Optional[str] = None) -> int:
+    """Get total count of job runs, optionally for one job, from the maintained counters.
 
-def count_job_runs() -> int:
-    """Get total count of job runs"""
+    Runs rolled up past the retention window still count.
+    """
     with get_db() as db:
-        cursor = db.execute('SELECT COUNT(*) FROM job_runs')
+        if job_id:
+            cursor = db.execute('SELECT run_count + rolled_up_count FROM job_run_counts WHERE job_id = ?', (job_id,))
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        cursor = db.execute('SELECT COALESCE(SUM(run_count + rolled_up_count), 0) FROM job_run_counts')
         return cursor.fetchone()[0]
 
-def record_job_start(job_id: str, client_info: dict = None) -> None:
-    """Record a job start in both job_configs and job_runs tables"""
-    now = datetime.now(pytz.utc)
+ROLLUP_COLUMNS = '''
+    job_id, granularity, bucket_start, run_count, late_count, duration_count,
+    duration_sum, duration_m2, duration_min, duration_max, duration_sketch
+'''
+
+def _rollup_from_row(row) -> dict:
+    return {
+        'job_id': row[0],
+        'granularity': row[1],
+        'bucket_start': row[2],
+        'run_count': row[3],
+        'late_count': row[4],
+        'durations': _durations_from_row(*row[5:11]),
+    }
+
+def merge_rollups(rollup: dict, other: dict) -> dict:
+    """Fold the counts and durations of `other` into `rollup`"""
+    rollup['run_count'] += other['run_count']
+    rollup['late_count'] += other['late_count']
+    rollup['durations'].merge(other['durations'])
+    return rollup
+
+def _upsert_rollups(db, rollups: List[dict]):
+    """Merge rollups into the stored ones with the same job, granularity and bucket"""
+    merged = {}
+    for rollup in rollups:
+        key = (rollup['job_id'], rollup['granularity'], rollup['bucket_start'])
+        if key in merged:
+            merge_rollups(merged[key], rollup)
+        else:
+            merged[key] = rollup
+    for key, rollup in merged.items():
+        row = db.execute(f'''
+            SELECT {ROLLUP_COLUMNS} FROM job_run_rollups
+            WHERE job_id = ? AND granularity = ? AND bucket_start = ?
+        ''', key).fetchone()
+        if row:
+            merge_rollups(rollup, _rollup_from_row(row))
+    db.executemany(f'''
+        INSERT OR REPLACE INTO job_run_rollups ({ROLLUP_COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (
+            rollup['job_id'], rollup['granularity'], rollup['bucket_start'],
+            rollup['run_count'], rollup['late_count'], *_durations_to_row(rollup['durations']),
+        )
+        for rollup in merged.values()
+    ])
+
+def get_expired_job_runs(before: datetime, limit: int) -> List[dict]:
+    """Oldest finished runs that started before `before`, for rolling up.
+
+    Runs that are still open are left alone until they end.
+    """
+    with get_db() as db:
+        rows = db.execute('''
+            SELECT id, job_id, start_time, end_time, duration
+            FROM job_runs
+            WHERE start_time < ? AND end_time IS NOT NULL
+            ORDER BY start_time ASC, id ASC
+            LIMIT ?
+        ''', (to_utc(before).isoformat(), limit)).fetchall()
+    runs = []
+    for row in rows:
+        start_time = from_db_datetime(row[2])
+        end_time = from_db_datetime(row[3])
+        duration = row[4]
+        if duration is None:
+            duration = (end_time - start_time).total_seconds() / 60
+        runs.append({
+            'id': row[0],
+            'job_id': row[1],
+            'start_time': start_time,
+            'end_time': end_time,
+            'duration': duration,
+        })
+    return runs
+
+def roll_up_job_runs(rollups: List[dict], run_ids: List[int]) -> int:
+    """Merge hourly rollups into the stored aggregates and delete the runs they cover.
+
+    Both happen in one transaction, so a run is never counted twice or lost;
+    job_run_counts moves the runs from run_count to rolled_up_count. Rollups
+    of jobs deleted in the meantime are dropped. Returns the number
+    of runs deleted.
+    """
+    def _write(db):
+        job_ids = list({rollup['job_id'] for rollup in rollups})
+        existing = set()
+        for i in range(0, len(job_ids), 500):
+            chunk = job_ids[i:i + 500]
+            existing.update(row[0] for row in db.execute(
+                f"SELECT job_id FROM job_configs WHERE job_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ))
+        kept = [rollup for rollup in rollups if rollup['job_id'] in existing]
+        # Counted before merging, which adds to the first rollup of each bucket
+        rolled_up = {}
+        for rollup in kept:
+            rolled_up[rollup['job_id']] = rolled_up.get(rollup['job_id'], 0) + rollup['run_count']
+        _upsert_rollups(db, kept)
+        db.executemany(
+            'UPDATE job_run_counts SET rolled_up_count = rolled_up_count + ? WHERE job_id = ?',
+            [(count, job_id) for job_id, count in rolled_up.items()]
+        )
+        deleted = 0
+        for i in range(0, len(run_ids), 500):
+            chunk = run_ids[i:i + 500]
+            deleted += db.execute(
+                f"DELETE FROM job_runs WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).rowcount
+        return deleted
+    return execute_write(_write)
+
+def compact_job_run_rollups(before: datetime, limit: int) -> int:
+    """Merge up to `limit` hourly rollups older than `before` into daily ones.
+
+    `before` should fall on a UTC midnight so that a day is never split
+    between granularities. Returns the number of hourly rollups merged.
+    """
+    def _write(db):
+        rows = db.execute(f'''
+            SELECT {ROLLUP_COLUMNS} FROM job_run_rollups
+            WHERE granularity = 'hour' AND bucket_start < ?
+            ORDER BY bucket_start
+            LIMIT ?
+        ''', (to_utc(before).isoformat(), limit)).fetchall()
+        daily = []
+        for row in rows:
+            rollup = _rollup_from_row(row)
+            day = from_db_datetime(rollup['bucket_start']).replace(hour=0, minute=0, second=0, microsecond=0)
+            rollup['granularity'] = 'day'
+            rollup['bucket_start'] = day.isoformat()
+            daily.append(rollup)
+        _upsert_rollups(db, daily)
+        db.executemany(
+            "DELETE FROM job_run_rollups WHERE job_id = ? AND granularity = 'hour' AND bucket_start = ?",
+            [(row[0], row[2]) for row in rows]
+        )
+        return len(rows)
+    return execute_write(_write)
+
+def get_job_run_rollups(
+    job_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None
+) -> List[dict]:
+    """Get aggregated history of rolled-up runs, newest bucket first.
+
+    Each rollup covers the runs of one job that started within an hour or a
+    day from `bucket_start`. Buckets are selected by their start, with
+    `since` inclusive and `until` exclusive. Ties are ordered by job id and
+    granularity, descending, so pages can be addressed by keyset: `after`
+    is the (bucket_start, job_id, granularity) of the last rollup seen, or
+    a 1-tuple of a time, which keeps buckets starting at or before it.
+    """
+    query = f"SELECT {ROLLUP_COLUMNS} FROM job_run_rollups WHERE 1=1"
+    params = []
+    if after and len(after) == 3:
+        query += " AND (bucket_start, job_id, granularity) < (?, ?, ?)"
+        params.extend(after)
+    elif after:
+        query += " AND bucket_start <= ?"
+        params.append(after[0])
+    if job_id:
+        query += " AND job_id = ?"
+        params.append(job_id)
+    if since:
+        query += " AND bucket_start >= ?"
+        params.append(to_utc(since).isoformat())
+    if until:
+        query += " AND bucket_start < ?"
+        params.append(to_utc(until).isoformat())
+    query += " ORDER BY bucket_start DESC, job_id DESC, granularity DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    
+    with get_db() as db:
+        rows = db.execute(query, params).fetchall()
+    
+    rollups = []
+    for row in rows:
+        rollup = _rollup_from_row(row)
+        rollup['bucket_start'] = from_db_datetime(rollup['bucket_start'])
+        for key, value in rollup.pop('durations').summary().items():
+            rollup[f'duration_{key}'] = value
+        rollups.append(rollup)
+    return rollups
+
+def get_job_history(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    job_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Tuple[List[dict], List[dict], Optional[str]]:
+    """Get a page of runs and of the rollups that replaced older runs, and the next cursor.
+
+    Both are merged newest first, by run start and bucket start (runs first
+    on ties), into pages of at most `limit` entries in all. Rollups only
+    exist past the retention window, so recent pages hold runs alone, and
+    once a range reaches back past it the rollups follow in the same pages.
+    The cursor points past the last entry of either kind.
+    """
+    position = decode_history_cursor(cursor) if cursor else None
+    run_cursor = None
+    run_until = until
+    if position and len(position) == 3:
+        # Past a rollup: only runs that started before its bucket are left
+        bucket_start = from_db_datetime(position[0])
+        run_until = min(until, bucket_start) if until else bucket_start
+        after = position
+    elif position:
+        run_cursor = cursor
+        after = (position[0],)
+    else:
+        after = None
+    
+    runs, more_runs = get_job_runs(limit=limit, cursor=run_cursor, job_id=job_id, since=since, until=run_until)
+    rollups = get_job_run_rollups(job_id, since, until, limit=limit + 1, after=after)
+    
+    page_runs = []
+    page_rollups = []
+    last_is_run = False
+    while len(page_runs) + len(page_rollups) < limit:
+        run = runs[len(page_runs)] if len(page_runs) < len(runs) else None
+        rollup = rollups[len(page_rollups)] if len(page_rollups) < len(rollups) else None
+        if run and (not rollup or run['start_time'] >= rollup['bucket_start']):
+            page_runs.append(run)
+            last_is_run = True
+        elif rollup:
+            page_rollups.append(rollup)
+            last_is_run = False
+        else:
+            break
+    
+    next_cursor = None
+    if more_runs or len(page_runs) < len(runs) or len(page_rollups) < len(rollups):
+        if last_is_run:
+            last = page_runs[-1]
+            next_cursor = encode_run_cursor(last['start_time'].isoformat(), last['id'])
+        else:
+            last = page_rollups[-1]
+            next_cursor = encode_rollup_cursor(last['bucket_start'].isoformat(), last['job_id'], last['granularity'])
+    return page_runs, page_rollups, next_cursor
+
+JOB_STATS_COLUMNS = '''
+    job_id, duration_count, duration_sum, duration_m2, duration_min, duration_max, duration_sketch
+'''
+
+def _record_durations(db, durations: dict):
+    """Merge new run durations, as DurationStats per job id, into job_stats"""
+    for job_id, new in durations.items():
+        row = db.execute(f'SELECT {JOB_STATS_COLUMNS} FROM job_stats WHERE job_id = ?', (job_id,)).fetchone()
+        stats = _durations_from_row(*row[1:]) if row else DurationStats()
+        stats.merge(new)
+        db.execute(f'''
+            INSERT OR REPLACE INTO job_stats ({JOB_STATS_COLUMNS})
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (job_id, *_durations_to_row(stats)))
+
+def get_job_stats(job_ids: Optional[List[str]] = None) -> dict:
+    """Get the all-time duration statistics of some or all jobs, as DurationStats by job id.
+
+    Reads one maintained row per job, however many runs it has had.
+    """
+    query = f'SELECT {JOB_STATS_COLUMNS} FROM job_stats'
+    params = []
+    if job_ids is not None:
+        query += f" WHERE job_id IN ({','.join('?' * len(job_ids))})"
+        params = job_ids
     with get_db() as db:
+        return {row[0]: _durations_from_row(*row[1:]) for row in db.execute(query, params)}
+
+def get_job_stats_between(
+    job_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> dict:
+    """Get duration statistics of the runs started in a time range, as DurationStats by job id.
+
+    Recent runs are read individually and older ones from their rollups,
+    which are included whole when their bucket starts in the range.
+    """
+    rollup_query = '''
+        SELECT job_id, duration_count, duration_sum, duration_m2, duration_min, duration_max, duration_sketch
+        FROM job_run_rollups
+        WHERE 1=1
+    '''
+    run_query = '''
+        SELECT job_id, start_time, end_time, duration FROM job_runs
+        WHERE end_time IS NOT NULL
+    '''
+    rollup_params = []
+    run_params = []
+    if job_id:
+        rollup_query += " AND job_id = ?"
+        run_query += " AND job_id = ?"
+        rollup_params.append(job_id)
+        run_params.append(job_id)
+    if since:
+        rollup_query += " AND bucket_start >= ?"
+        run_query += " AND start_time >= ?"
+        rollup_params.append(to_utc(since).isoformat())
+        run_params.append(to_utc(since).isoformat())
+    if until:
+        rollup_query += " AND bucket_start < ?"
+        run_query += " AND start_time < ?"
+        rollup_params.append(to_utc(until).isoformat())
+        run_params.append(to_utc(until).isoformat())
+    
+    stats = {}
+    with get_db() as db:
+        for row in db.execute(rollup_query, rollup_params):
+            stats.setdefault(row[0], DurationStats()).merge(_durations_from_row(*row[1:]))
+        for job_id, start_time, end_time, duration in db.execute(run_query, run_params):
+            if duration is None:
+                duration = (from_db_datetime(end_time) - from_db_datetime(start_time)).total_seconds() / 60
+            stats.setdefault(job_id, DurationStats()).add(duration)
+    return stats
+
+def record_job_start(job_id: str, client_info: dict = None) -> int:
+    """Record a job start in both job_configs and job_runs tables and return the run id"""
+    now = datetime.now(pytz.utc)
+    def _write(db):
         # Update the job_configs table
         db.execute('''
             UPDATE job_configs 
             SET last_start = ?
             WHERE job_id = ?
-        ''', (now, job_id))
+        ''', (now.isoformat(), job_id))
         
         # Insert into job_runs table
+        client_id, custom_metadata = _intern_client_info(db, client_info)
         db.execute('''
-            INSERT INTO job_runs (job_id, start_time, client_info)
-            VALUES (?, ?, ?)
-        ''', (job_id, now, json.dumps(client_info) if client_info else None))
+            INSERT INTO job_runs (job_id, start_time, client_id, custom_metadata)
+            VALUES (?, ?, ?, ?)
+        ''', (job_id, now.isoformat(), client_id, custom_metadata))
+        run_id = db.lastrowid
+        _refresh_job_config(db, job_id)
+        return run_id
+    return execute_write(_write)
 
-def record_job_end(job_id: str) -> None:
-    """Record a job end in both job_configs and job_runs tables"""
+def record_job_end(job_id: str) -> List[int]:
+    """Record a job end in both job_configs and job_runs tables and return the ended run ids"""
     now = datetime.now(pytz.utc)
-    with get_db() as db:
+    def _write(db):
         # Get all unended runs for this job
         unended_runs = db.execute('''
             SELECT id, start_time 
@@ -594,31 +2412,179 @@ def record_job_end(job_id: str) -> None:
         ''', (job_id,)).fetchall()
         
         if not unended_runs:
-            return
+            return []
         
         # End all unended runs
+        durations = DurationStats()
         for run in unended_runs:
             run_id, start_time = run
             start_time = datetime.fromisoformat(start_time) if isinstance(start_time, str) else start_time
             duration = (now - start_time).total_seconds() / 60  # Convert to minutes
+            durations.add(duration)
             
             # Update job_runs
             db.execute('''
                 UPDATE job_runs 
                 SET end_time = ?, duration = ?
                 WHERE id = ?
-            ''', (now, duration, run_id))
+            ''', (now.isoformat(), duration, run_id))
+        _record_durations(db, {job_id: durations})
         
         # Update job_configs with the most recent end
         db.execute('''
             UPDATE job_configs 
             SET last_end = ?, duration = ?
             WHERE job_id = ?
-        ''', (now, duration, job_id))
+        ''', (now.isoformat(), duration, job_id))
+        _refresh_job_config(db, job_id)
+        return [run[0] for run in unended_runs]
+    return execute_write(_write)
+
+def record_heartbeat(job_id: str, client_info: dict = None) -> List[int]:
+    """Record a health check ping as one completed run, closing any runs left open.
+
+    Does the work of record_job_start() followed by record_job_end() in a
+    single write operation with fixed statements, which sqlite3 prepares
+    once per connection. Returns the new run id followed by the ids of the
+    runs it closed.
+    """
+    now = datetime.now(pytz.utc)
+    stamp = now.isoformat()
+    def _write(db):
+        client_id, custom_metadata = _intern_client_info(db, client_info)
+        open_runs = db.execute(
+            'SELECT id, start_time FROM job_runs WHERE job_id = ? AND end_time IS NULL ORDER BY start_time ASC',
+            (job_id,)
+        ).fetchall()
+        durations = DurationStats()
+        if open_runs:
+            closed = []
+            for run_id, start_time in open_runs:
+                duration = (now - from_db_datetime(start_time)).total_seconds() / 60  # Convert to minutes
+                durations.add(duration)
+                closed.append((stamp, duration, run_id))
+            db.executemany('UPDATE job_runs SET end_time = ?, duration = ? WHERE id = ?', closed)
+        # The ping's own run starts and ends at once
+        db.execute(
+            'INSERT INTO job_runs (job_id, start_time, end_time, duration, client_id, custom_metadata) VALUES (?, ?, ?, 0, ?, ?)',
+            (job_id, stamp, stamp, client_id, custom_metadata)
+        )
+        run_id = db.lastrowid
+        durations.add(0)
+        db.execute(
+            'UPDATE job_configs SET last_start = ?, last_end = ?, duration = 0 WHERE job_id = ?',
+            (stamp, stamp, job_id)
+        )
+        _record_durations(db, {job_id: durations})
+        _refresh_job_config(db, job_id)
+        return [run_id, *(run[0] for run in open_runs)]
+    return execute_write(_write)
+
+def record_job_events(events: List[dict]) -> List[List[int]]:
+    """Record a batch of job events in one transaction.
+
+    Each event is a dict with `job_id`, `event` ('start', 'end' or
+    'heartbeat'), a `timestamp` and an optional `client_info` dict. Events
+    are applied in order: a start opens a run, an end closes every open run
+    of the job, including runs started earlier in the batch, and a heartbeat
+    does both at once. The jobs are expected to exist. Returns, per event, the
+    ids of the runs it opened or closed, or None when the event was skipped
+    because it would end a run before that run started.
+    """
+    def _write(db):
+        job_ids = list(dict.fromkeys(event['job_id'] for event in events))
+        
+        # Runs already open before the batch, oldest first per job
+        open_runs = {job_id: [] for job_id in job_ids}
+        for i in range(0, len(job_ids), 500):
+            chunk = job_ids[i:i + 500]
+            rows = db.execute(f'''
+                SELECT id, job_id, start_time
+                FROM job_runs
+                WHERE end_time IS NULL AND job_id IN ({','.join('?' * len(chunk))})
+                ORDER BY start_time ASC
+            ''', chunk).fetchall()
+            for run_id, job_id, start_time in rows:
+                open_runs[job_id].append(('existing', run_id, from_db_datetime(start_time)))
+        
+        new_runs = []       # [job_id, start_time, end_time, duration, client_id, custom_metadata]
+        closed_runs = []    # (end_time, duration, run_id) for runs open before the batch
+        last_start = {}
+        last_end = {}
+        results = []
+        durations = {}
+        for event in events:
+            job_id = event['job_id']
+            timestamp = to_utc(event['timestamp'])
+            if event['event'] != 'start' and any(start_time > timestamp for _, _, start_time in open_runs[job_id]):
+                results.append(None)
+                continue
+            result = []
+            if event['event'] != 'end':
+                ref = len(new_runs)
+                client_id, custom_metadata = _intern_client_info(db, event.get('client_info'))
+                new_runs.append([job_id, timestamp.isoformat(), None, None, client_id, custom_metadata])
+                open_runs[job_id].append(('new', ref, timestamp))
+                if job_id not in last_start or timestamp > last_start[job_id]:
+                    last_start[job_id] = timestamp
+                result.append(('new', ref))
+            if event['event'] != 'start':
+                # A heartbeat ends its own run along with any left open, like record_job_end
+                duration = None
+                for kind, ref, start_time in open_runs[job_id]:
+                    duration = (timestamp - start_time).total_seconds() / 60  # Convert to minutes
+                    durations.setdefault(job_id, DurationStats()).add(duration)
+                    if kind == 'existing':
+                        closed_runs.append((timestamp.isoformat(), duration, ref))
+                    else:
+                        new_runs[ref][2] = timestamp.isoformat()
+                        new_runs[ref][3] = duration
+                    if (kind, ref) not in result:
+                        result.append((kind, ref))
+                if open_runs[job_id]:
+                    last_end[job_id] = (timestamp.isoformat(), duration)
+                open_runs[job_id] = []
+            results.append(result)
+        
+        first_id = None
+        if new_runs:
+            db.executemany('''
+                INSERT INTO job_runs (job_id, start_time, end_time, duration, client_id, custom_metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', new_runs)
+            # The only writer inserted these back to back, so their ids are consecutive
+            first_id = db.execute('SELECT last_insert_rowid()').fetchone()[0] - len(new_runs) + 1
+        if closed_runs:
+            db.executemany('''
+                UPDATE job_runs 
+                SET end_time = ?, duration = ?
+                WHERE id = ?
+            ''', closed_runs)
+        if last_start:
+            # Never moves back for a backdated start
+            db.executemany('''
+                UPDATE job_configs 
+                SET last_start = ?
+                WHERE job_id = ? AND (last_start IS NULL OR last_start < ?)
+            ''', [(start_time.isoformat(), job_id, start_time.isoformat()) for job_id, start_time in last_start.items()])
+        if last_end:
+            db.executemany('''
+                UPDATE job_configs 
+                SET last_end = ?, duration = ?
+                WHERE job_id = ?
+            ''', [(end_time, duration, job_id) for job_id, (end_time, duration) in last_end.items()])
+        _record_durations(db, durations)
+        _refresh_job_configs(db, job_ids)
+        
+        return [
+            [first_id + ref if kind == 'new' else ref for kind, ref in result] if result is not None else None
+            for result in results
+        ]
+    return execute_write(_write)
 
 def update_job_pause_status(job_id: str, paused: bool) -> None:
     """Update the pause status of a job"""
-    with get_db() as db:
+    def _write(db):
         db.execute(
             """
             UPDATE job_configs 
@@ -627,25 +2593,126 @@ def update_job_pause_status(job_id: str, paused: bool) -> None:
             """,
             (paused, job_id)
         )
+        if not paused:
+            _restart_checks(db, job_id)
+        writer.configs_changed()
+        _refresh_job_config(db, job_id)
+    return execute_write(_write)
 
 def add_job(job_id: str, schedule: str, tolerance_minutes: int = 0, max_runtime_minutes: int = None):
     """Add or update a job configuration.
     
     Args:
         job_id: Unique identifier for the job
-        schedule: Cron expression for the job schedule
+        schedule: Cron expression or interval (e.g. '@every 30s') for the job schedule
         tolerance_minutes: Number of minutes to wait before marking a job as missed (default: 0)
         max_runtime_minutes: Maximum runtime in minutes before marking as long-running (optional)
     """
     if tolerance_minutes is None:
         tolerance_minutes = 0
     needs_end_signal = max_runtime_minutes is not None and max_runtime_minutes > 0
-    with get_db() as db:
+    parsed = schedules.parse_schedule(schedule)
+    def _write(db):
         db.execute('''
         INSERT OR REPLACE INTO job_configs 
-        (job_id, schedule, tolerance_minutes, max_runtime_minutes, needs_end_signal) 
-        VALUES (?, ?, ?, ?, ?)
-        ''', (job_id, schedule, tolerance_minutes, max_runtime_minutes, needs_end_signal))
+        (job_id, schedule, schedule_kind, interval_seconds, jitter_seconds,
+         tolerance_minutes, max_runtime_minutes, needs_end_signal) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            job_id, parsed['schedule'], parsed['schedule_kind'], parsed['interval_seconds'],
+            parsed['jitter_seconds'], tolerance_minutes, max_runtime_minutes, needs_end_signal
+        ))
+        _restart_checks(db, job_id)
+        writer.configs_changed()
+        _refresh_job_config(db, job_id)
+    return execute_write(_write)
+
+# Functions that only wrap an execute_write() call. The async layer hands
+# these straight to the writer thread rather than to an executor thread.
+WRITE_FUNCTIONS = {
+    'save_job_config', 'start_job_run', 'end_job_run', 'add_job_alert',
+    'acknowledge_job_alert', 'update_job_config', 'delete_job',
+    'record_job_start', 'record_job_end', 'record_job_events', 'record_heartbeat',
+    'update_job_pause_status', 'add_job', 'roll_up_job_runs',
+    'compact_job_run_rollups', 'acquire_lease', 'release_lease', 'record_alerts',
+}
+
+# Functions answered from the job config registry. While it is loaded and in
+# sync they only read memory, so the async layer calls them in place.
+REGISTRY_FUNCTIONS = {'get_job_config', 'get_job_configs', 'get_all_job_configs'}
+
+class AsyncDatabase:
+    """Awaitable versions of this module's functions for the event loop.
+
+    `await aio.get_job_runs()` runs the read on a dedicated executor
+    with one thread per pooled connection, so at most `workers` queries run
+    at once and none of them blocks the loop. Write functions are queued on
+    the writer thread and awaited through its future, so waiting for a
+    group commit does not tie up an executor thread. Registry lookups skip
+    the executor unless the registry has to be (re)loaded first.
+    """
+
+    def __init__(self, workers: int = DB_POOL_SIZE):
+        self.workers = max(1, workers)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='cronicle-db-reader')
+                    self._pid = os.getpid()
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking function on the database executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+    async def write(self, func, *args, **kwargs):
+        """Run a write function on the writer thread and wait for its commit"""
+        # The nested execute_write() runs inline on the writer thread
+        return await asyncio.wrap_future(writer.submit(lambda cursor: func(*args, **kwargs)))
+
+    def __getattr__(self, name: str):
+        func = globals().get(name)
+        if name.startswith('_') or not isinstance(func, types.FunctionType):
+            raise AttributeError(name)
+        runner = self.write if name in WRITE_FUNCTIONS else self.run
+        latency = metrics.db_call_seconds.labels(name)
+
+        # Timed where it runs, so waiting for a thread or a commit is not counted
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                latency.observe(time.perf_counter() - started)
+
+        if name in REGISTRY_FUNCTIONS:
+            @functools.wraps(func)
+            async def call(*args, **kwargs):
+                if job_configs.current():
+                    return timed(*args, **kwargs)
+                return await runner(timed, *args, **kwargs)
+        else:
+            @functools.wraps(func)
+            async def call(*args, **kwargs):
+                return await runner(timed, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
+
+    def close(self):
+        """Wait for running reads and stop the executor"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+aio = AsyncDatabase()
 
 # Initialize database when module is imported
 init_db()
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import uuid
+from collections import deque
+from typing import Deque, List, Optional, Set
+
+# Events kept in memory so that reconnecting clients can catch up
+CHANGE_FEED_BUFFER = int(os.environ.get('CRONICLE_CHANGE_FEED_BUFFER', 1000))
+
+# Events queued for a single slow client before it is told to reload instead
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get('CRONICLE_CHANGE_FEED_QUEUE_SIZE', 1000))
+
+class Subscription:
+    """One client's view of the feed: a bounded queue of pending events.
+
+    If the client falls more than `maxsize` events behind, the queue is
+    dropped and the next get() returns a reset message instead, telling the
+    client to reload its state from the REST endpoints.
+    """
+
+    def __init__(self, feed: 'ChangeFeed', maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.feed = feed
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self.overflowed = False
+
+    def push(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake up a get() that is waiting on an empty queue
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> dict:
+        event = await self.queue.get()
+        if self.overflowed:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = False
+            return {'type': 'reset', 'feed': self.feed.feed_id, 'seq': self.feed.seq}
+        return event
+
+class ChangeFeed:
+    """Sequenced stream of data changes fanned out to WebSocket clients.
+
+    Every event gets the next sequence number. The most recent events are
+    kept in a ring buffer so that a client reconnecting with the last
+    sequence number it saw receives exactly what it missed. `feed_id`
+    changes on every restart, so sequence numbers from an earlier process
+    are never mistaken for current ones. Must be used from the event loop.
+    """
+
+    def __init__(self, buffer_size: int = CHANGE_FEED_BUFFER):
+        self.feed_id = uuid.uuid4().hex
+        self.seq = 0
+        self._buffer: Deque[dict] = deque(maxlen=max(1, buffer_size))
+        self._subscribers: Set[Subscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, **data) -> dict:
+        """Record an event and queue it for every subscriber"""
+        self.seq += 1
+        event = {'type': event_type, 'seq': self.seq, **data}
+        self._buffer.append(event)
+        for subscription in self._subscribers:
+            subscription.push(event)
+        return event
+
+    def skip(self):
+        """Account for a change without recording it.
+
+        Used when nobody is subscribed, to avoid building an event no one
+        will read. The buffer is dropped, so clients that reconnect are told
+        to reload rather than resume past the gap.
+        """
+        self.seq += 1
+        self._buffer.clear()
+
+    def reset(self):
+        """Tell every subscriber to reload, e.g. after another process changed data.
+
+        Like skip(), so clients reconnecting from before this point reload too.
+        """
+        self.skip()
+        event = {'type': 'reset', 'feed': self.feed_id, 'seq': self.seq}
+        for subscription in self._subscribers:
+            subscription.push(event)
+
+    def events_since(self, seq: int) -> Optional[List[dict]]:
+        """Events after `seq`, or None if some of them are no longer buffered"""
+        if seq > self.seq or seq < 0:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._buffer or self._buffer[0]['seq'] > seq + 1:
+            return None
+        return [event for event in self._buffer if event['seq'] > seq]
+
+    def subscribe(self, feed_id: Optional[str] = None, since: Optional[int] = None) -> Subscription:
+        """Register a subscriber and queue its opening message.
+
+        The first message is a hello carrying the current feed id and
+        sequence number. `resumed` tells the client whether the events it
+        missed since `since` follow; if not, it has to reload its state.
+        """
+        subscription = Subscription(self)
+        missed = None
+        if feed_id == self.feed_id and since is not None:
+            missed = self.events_since(since)
+        subscription.push({
+            'type': 'hello',
+            'feed': self.feed_id,
+            'seq': since if missed is not None else self.seq,
+            'resumed': missed is not None,
+        })
+        for event in missed or []:
+            subscription.push(event)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
@@ -0,0 +1,90 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from database import AlertType
+
+# Correlated alerts found in one checker wakeup are summarized as one
+# incident once there are at least this many of them
+ALERT_STORM_THRESHOLD = int(os.environ.get('CRONICLE_ALERT_STORM_THRESHOLD', 10))
+
+def _start_time(alert: dict) -> datetime:
+    return alert['actual_start_time'] or alert['expected_start_time']
+
+def _incident(reason: str, alerts: List[dict], schedule: Optional[str] = None) -> dict:
+    types = {alert['alert_type'] for alert in alerts}
+    starts = [_start_time(alert) for alert in alerts]
+    return {
+        'reason': reason,
+        'alert_type': types.pop() if len(types) == 1 else None,
+        'schedule': schedule,
+        'first_start_time': min(starts),
+        'last_start_time': max(starts),
+        'alerts': alerts,
+    }
+
+def coalesce_alerts(alerts: List[dict], checker_started: datetime, threshold: int = ALERT_STORM_THRESHOLD) -> List[dict]:
+    """Group correlated alerts found in one checker wakeup into incidents.
+
+    Alerts are `{job_id, alert_type, expected_start_time, actual_start_time,
+    schedule}` dicts. Groups are formed in this order, each taking its
+    alerts out of the running for the next:
+
+      restart   missed runs expected before the checker started, that is,
+                while Cronicle was down
+      schedule  missed runs of jobs sharing a schedule
+      tick      whatever is left of the wakeup
+
+    Groups of fewer than `threshold` alerts stay individual alerts. Each
+    incident is `{reason, alert_type, schedule, first_start_time,
+    last_start_time, alerts}`; alert_type is None for mixed incidents.
+    """
+    if len(alerts) < threshold:
+        return []
+    incidents = []
+    remaining = []
+    during_downtime = []
+    for alert in alerts:
+        if alert['alert_type'] == AlertType.MISSED_JOB and alert['expected_start_time'] < checker_started:
+            during_downtime.append(alert)
+        else:
+            remaining.append(alert)
+    if len(during_downtime) >= threshold:
+        incidents.append(_incident('restart', during_downtime))
+    else:
+        remaining.extend(during_downtime)
+
+    by_schedule: Dict[str, List[dict]] = {}
+    for alert in remaining:
+        if alert['alert_type'] == AlertType.MISSED_JOB:
+            by_schedule.setdefault(alert['schedule'], []).append(alert)
+    grouped = set()
+    for schedule, group in by_schedule.items():
+        if len(group) >= threshold:
+            incidents.append(_incident('schedule', group, schedule))
+            grouped.update(id(alert) for alert in group)
+    remaining = [alert for alert in remaining if id(alert) not in grouped]
+
+    if len(remaining) >= threshold:
+        incidents.append(_incident('tick', remaining))
+    return incidents
+
+def summarize(incident: dict, count: Optional[int] = None) -> str:
+    """One-line description of an incident with `count` recorded alerts"""
+    count = len(incident['alerts']) if count is None else count
+    if incident['alert_type'] == AlertType.MISSED_JOB:
+        what = f"{count} scheduled runs were missed"
+    elif incident['alert_type'] == AlertType.LONG_RUNNING:
+        what = f"{count} runs exceeded their maximum runtime"
+    else:
+        what = f"{count} missed or long-running jobs"
+    first, last = incident['first_start_time'], incident['last_start_time']
+    if first == last:
+        when = f"at {first.isoformat()}"
+    else:
+        when = f"between {first.isoformat()} and {last.isoformat()}"
+    if incident['reason'] == 'restart':
+        return f"{what} {when}, while the checker was down"
+    if incident['reason'] == 'schedule':
+        return f"{what} on schedule '{incident['schedule']}' {when}"
+    return f"{what} {when}, detected at once"
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+import database as db
+import metrics
+
+# A leader that stops renewing (crashed, hung) is replaced after this long
+LEADER_LEASE_SECONDS = float(os.environ.get('CRONICLE_LEADER_LEASE_SECONDS', 15))
+
+# Renewals per lease period, so that one slow write does not cost the lease
+LEADER_RENEWALS_PER_LEASE = 3
+
+class LeaderElection:
+    """Run background tasks in exactly one of the processes sharing the database.
+
+    Every process (uvicorn worker or replica on the same host) runs an
+    election, but only the holder of the named lease in the `leases` table
+    runs the tasks; the others keep trying to take the lease over, which
+    succeeds once the holder releases it or stops renewing it. A leader that
+    cannot renew its lease stops its tasks before the lease can expire, so
+    two processes never run them at once.
+    """
+
+    def __init__(self, name: str, tasks: List[Callable[[], Awaitable[None]]], lease_seconds: float = LEADER_LEASE_SECONDS):
+        self.name = name
+        self.tasks = tasks
+        self.lease_seconds = lease_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: List[asyncio.Task] = []
+        # Monotonic time until which our lease is certainly still valid
+        self._valid_until: Optional[float] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return bool(self._running)
+
+    async def _start(self):
+        print(f"Became {self.name} leader as {self.holder}")
+        self._running = [asyncio.create_task(task()) for task in self.tasks]
+        metrics.leader.labels(self.name).set(1)
+
+    async def _stop(self):
+        running, self._running = self._running, []
+        for task in running:
+            task.cancel()
+        for task in running:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                print(f"Error stopping {self.name} task: {str(e)}")
+        metrics.leader.labels(self.name).set(0)
+
+    async def run(self):
+        """Hold elections until cancelled, then hand the lease back"""
+        interval = self.lease_seconds / LEADER_RENEWALS_PER_LEASE
+        metrics.leader.labels(self.name).set(0)
+        try:
+            while True:
+                # Measured before the write, so our view of the lease never
+                # outlasts the one stored in the database
+                attempted = time.monotonic()
+                try:
+                    held = await db.aio.acquire_lease(self.name, self.holder, self.lease_seconds)
+                except Exception as e:
+                    print(f"Error renewing {self.name} lease: {str(e)}")
+                    held = None
+                if held:
+                    self._valid_until = attempted + self.lease_seconds
+                    if not self.is_leader:
+                        await self._start()
+                elif self.is_leader and (held is False or time.monotonic() + interval >= self._valid_until):
+                    print(f"Lost {self.name} lease; stopping its tasks")
+                    await self._stop()
+                await asyncio.sleep(interval)
+        finally:
+            was_leader = self.is_leader
+            await self._stop()
+            if was_leader:
+                try:
+                    await db.aio.release_lease(self.name, self.holder)
+                except Exception as e:
+                    print(f"Error releasing {self.name} lease: {str(e)}")
@@ -0,0 +1,280 @@
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+# Methods labelled by name; anything else a client sends is counted as 'other'
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# Upper bounds in seconds, from sub-millisecond queries to slow requests
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+class _Metric:
+    """A named metric family with one child per combination of label values.
+
+    Look up a child with labels() once and keep it; updating a child only
+    touches numbers that were allocated when it was created.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def clear(self):
+        """Drop every labelled child, e.g. for gauges rebuilt on each scrape"""
+        with self._lock:
+            self._children = {} if self.labelnames else {(): self._default}
+
+    def _samples(self, values, child) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._samples(values, child))
+        return lines
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def set(self, value: float):
+        """Mirror a total that only grows, kept elsewhere and read at scrape time"""
+        self._default.set(value)
+
+    def _samples(self, values, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def _samples(self, values, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus the +Inf overflow, allocated up front
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _samples(self, values, child) -> List[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames + ('le',), values + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    """The metrics exposed together at /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+http_request_seconds = registry.register(Histogram(
+    'cronicle_http_request_duration_seconds',
+    'Time to handle an HTTP request, by method and route template',
+    ('method', 'route')
+))
+db_call_seconds = registry.register(Histogram(
+    'cronicle_db_call_duration_seconds',
+    'Time a database function ran on a reader or the writer thread, excluding queueing and commit',
+    ('function',)
+))
+checker_tick_seconds = registry.register(Histogram(
+    'cronicle_checker_tick_duration_seconds',
+    'Time the alert checker spent handling the deadlines due at one wakeup'
+))
+checker_lag_seconds = registry.register(Histogram(
+    'cronicle_checker_lag_seconds',
+    'How long after the earliest due deadline the alert checker got to it'
+))
+alerts_created = registry.register(Counter(
+    'cronicle_alerts_created_total',
+    'Alerts recorded, by type',
+    ('alert_type',)
+))
+alert_incidents = registry.register(Counter(
+    'cronicle_alert_incidents_total',
+    'Incidents recorded for storms of correlated alerts, by reason',
+    ('reason',)
+))
+websocket_connections = registry.register(Gauge(
+    'cronicle_websocket_connections',
+    'Dashboard WebSocket connections currently subscribed to the change feed'
+))
+write_queue_depth = registry.register(Gauge(
+    'cronicle_write_queue_depth',
+    'Write operations waiting for the writer thread'
+))
+write_commits = registry.register(Counter(
+    'cronicle_write_commits_total',
+    'Write batches committed since startup'
+))
+leader = registry.register(Gauge(
+    'cronicle_leader',
+    'Whether this process holds a lease and runs its background tasks (1) or not (0)',
+    ('lease',)
+))
+jobs = registry.register(Gauge(
+    'cronicle_jobs',
+    'Jobs by state',
+    ('state',)
+))
+cache_hits = registry.register(Counter(
+    'cronicle_cache_hits_total',
+    'Lookups answered from an in-memory cache since startup',
+    ('cache',)
+))
+cache_misses = registry.register(Counter(
+    'cronicle_cache_misses_total',
+    'Lookups that had to load from the source since startup',
+    ('cache',)
+))
+cache_size = registry.register(Gauge(
+    'cronicle_cache_size',
+    'Entries held by an in-memory cache',
+    ('cache',)
+))
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing each HTTP request by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self._children: Dict[str, Dict[str, _HistogramValue]] = {}
+
+    def _child(self, scope) -> _HistogramValue:
+        route = scope.get('route')
+        if route is not None:
+            label = route.path
+        elif 'endpoint' in scope:
+            # Mounted apps such as the static files
+            label = scope.get('root_path', '') + '/{path}'
+        else:
+            label = 'unmatched'
+        by_method = self._children.get(label)
+        if by_method is None:
+            by_method = self._children.setdefault(label, {})
+        method = scope['method'] if scope['method'] in HTTP_METHODS else 'other'
+        child = by_method.get(method)
+        if child is None:
+            child = by_method.setdefault(method, http_request_seconds.labels(method, label))
+        return child
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._child(scope).observe(time.perf_counter() - started)
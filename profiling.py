@@ -0,0 +1,207 @@
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Parameter lists of variable length, e.g. IN (?, ?, ?), count as one statement
+_PARAMETER_LIST = re.compile(r'\?(\s*,\s*\?)+')
+
+# Normalized statements remembered by their raw text
+NORMALIZE_CACHE_SIZE = 10000
+
+class StatementStats:
+    __slots__ = ('sql', 'caller', 'calls', 'rows', 'total_time', 'max_time')
+
+    def __init__(self, sql: str, caller: str):
+        self.sql = sql
+        self.caller = caller
+        self.calls = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'sql': self.sql,
+            'caller': self.caller,
+            'calls': self.calls,
+            'rows': self.rows,
+            'total_ms': self.total_time * 1000,
+            'mean_ms': self.total_time * 1000 / self.calls if self.calls else None,
+            'max_ms': self.max_time * 1000,
+        }
+
+class QueryProfiler:
+    """Per-statement timing aggregates and a slow-query log.
+
+    Statements are grouped by their normalized SQL and the function in
+    `source_file` that issued them. A statement's time covers executing it
+    and fetching its rows. Statements slower than `slow_threshold` seconds
+    are printed with their query plan.
+    """
+
+    def __init__(self, source_file: str, slow_threshold: Optional[float] = None):
+        self.source_file = source_file
+        self.slow_threshold = slow_threshold
+        self._stats: Dict[tuple, StatementStats] = {}
+        self._normalized: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _normalize(self, sql: str) -> str:
+        normalized = self._normalized.get(sql)
+        if normalized is None:
+            normalized = _PARAMETER_LIST.sub('?, ...', ' '.join(sql.split()))
+            if len(self._normalized) < NORMALIZE_CACHE_SIZE:
+                self._normalized[sql] = normalized
+        return normalized
+
+    def _caller(self) -> str:
+        # The innermost function of the profiled module, by its outer name
+        # so that nested write operations are attributed to their function
+        frame = sys._getframe(3)
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == self.source_file:
+                return code.co_qualname.split('.', 1)[0]
+            frame = frame.f_back
+        return '<unknown>'
+
+    def begin(self, sql: str, elapsed: float, rows: int) -> StatementStats:
+        key = (self._normalize(sql), self._caller())
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats(*key)
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.rows += rows
+        return stats
+
+    def fetched(self, stats: StatementStats, elapsed: float, rows: int):
+        with self._lock:
+            stats.total_time += elapsed
+            stats.rows += rows
+
+    def finish(self, cursor: sqlite3.Cursor, stats: StatementStats, sql: str, parameters, elapsed: float):
+        with self._lock:
+            stats.max_time = max(stats.max_time, elapsed)
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            print(f"Slow query ({elapsed * 1000:.1f}ms) in {stats.caller}: {stats.sql}")
+            for line in self.explain(cursor.connection, sql, parameters):
+                print(f"    {line}")
+
+    @staticmethod
+    def explain(conn: sqlite3.Connection, sql: str, parameters) -> List[str]:
+        # A plain cursor, so the plan lookup is not profiled itself
+        cursor = sqlite3.Cursor(conn)
+        try:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parameters if parameters is not None else ())
+            return [row[3] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f"(no plan: {str(e)})"]
+        finally:
+            cursor.close()
+
+    def top(self, limit: int = 20, sort: str = 'total') -> List[dict]:
+        """The `limit` statements with the highest total, mean or max time, or most calls"""
+        keys = {
+            'total': lambda stats: stats.total_time,
+            'mean': lambda stats: stats.total_time / stats.calls if stats.calls else 0,
+            'max': lambda stats: stats.max_time,
+            'calls': lambda stats: stats.calls,
+        }
+        if sort not in keys:
+            raise ValueError(f"sort must be one of: {', '.join(keys)}")
+        with self._lock:
+            ranked = sorted(self._stats.values(), key=keys[sort], reverse=True)[:limit]
+            return [stats.to_dict() for stats in ranked]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor reporting each statement, and the rows fetched from it, to the connection's profiler"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._profiler: QueryProfiler = self.connection.profiler
+        self._statement = None
+
+    def _begin(self, sql: str, parameters, started: float):
+        elapsed = time.perf_counter() - started
+        # rowcount is -1 for SELECT; those rows are counted as they are fetched
+        stats = self._profiler.begin(sql, elapsed, max(self.rowcount, 0))
+        self._statement = [stats, sql, parameters, elapsed]
+
+    def _fetched(self, started: float, rows: int):
+        statement = self._statement
+        if statement is not None:
+            elapsed = time.perf_counter() - started
+            statement[3] += elapsed
+            self._profiler.fetched(statement[0], elapsed, rows)
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            self._profiler.finish(self, *statement)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        result = super().execute(sql, parameters)
+        self._begin(sql, parameters, started)
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        result = super().executemany(sql, seq_of_parameters)
+        self._begin(sql, None, started)
+        return result
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0)
+            self._finish()
+            raise
+        self._fetched(started, 1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connection whose cursors are profiled; set `profiler` before use"""
+
+    profiler: QueryProfiler = None
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
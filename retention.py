@@ -0,0 +1,123 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import pytz
+
+import database as db
+import schedules
+from sketches import DurationStats
+
+# Runs are kept individually for this many days, then rolled up into hourly
+# aggregates and deleted. 0, the default, keeps every run forever.
+RUN_RETENTION_DAYS = float(os.environ.get('CRONICLE_RUN_RETENTION_DAYS', 0))
+
+# Hourly aggregates older than this many days are merged into daily ones
+HOURLY_ROLLUP_RETENTION_DAYS = float(os.environ.get('CRONICLE_HOURLY_ROLLUP_RETENTION_DAYS', 365))
+
+# Seconds between retention passes
+RETENTION_INTERVAL = float(os.environ.get('CRONICLE_RETENTION_INTERVAL_SECONDS', 3600))
+
+# Runs (or hourly rollups) handled per write, and the pause between writes,
+# so that a large backlog never holds up job clients' writes for long
+RETENTION_CHUNK_SIZE = int(os.environ.get('CRONICLE_RETENTION_CHUNK_SIZE', 500))
+RETENTION_CHUNK_PAUSE = float(os.environ.get('CRONICLE_RETENTION_CHUNK_PAUSE_MS', 50)) / 1000
+
+def raw_cutoff(current_time: datetime) -> Optional[datetime]:
+    """Start time before which runs are rolled up, or None if retention is off"""
+    if RUN_RETENTION_DAYS <= 0:
+        return None
+    return current_time - timedelta(days=RUN_RETENTION_DAYS)
+
+def hourly_cutoff(current_time: datetime) -> Optional[datetime]:
+    """UTC midnight before which hourly rollups are merged into daily ones"""
+    if RUN_RETENTION_DAYS <= 0:
+        return None
+    cutoff = current_time.astimezone(pytz.UTC) - timedelta(days=max(HOURLY_ROLLUP_RETENTION_DAYS, RUN_RETENTION_DAYS))
+    return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def is_late(job: dict, start_time: datetime) -> bool:
+    """True if a run started more than the job's tolerance after its scheduled time"""
+    if job.get('schedule_kind') == schedules.INTERVAL:
+        # Interval schedules have no fire times to compare with
+        return False
+    try:
+        # A run starting exactly on a fire time belongs to that fire time
+        scheduled = schedules.prev_fire(job['schedule'], start_time + timedelta(microseconds=1))
+    except ValueError:
+        # Nor do invalid ones
+        return False
+    return start_time - scheduled > timedelta(minutes=job.get('tolerance_minutes') or 0)
+
+def aggregate_runs(runs: List[dict], configs: dict) -> List[dict]:
+    """Hourly rollups of finished runs, per job and hour of start time"""
+    rollups = {}
+    for run in runs:
+        job = configs.get(run['job_id'])
+        if not job:
+            continue
+        bucket = run['start_time'].astimezone(pytz.UTC).replace(minute=0, second=0, microsecond=0)
+        key = (run['job_id'], bucket)
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = {
+                'job_id': run['job_id'],
+                'granularity': 'hour',
+                'bucket_start': bucket.isoformat(),
+                'run_count': 0,
+                'late_count': 0,
+                'durations': DurationStats(),
+            }
+        rollup['run_count'] += 1
+        if is_late(job, run['start_time']):
+            rollup['late_count'] += 1
+        if run['duration'] is not None:
+            rollup['durations'].add(run['duration'])
+    return list(rollups.values())
+
+def prepare_rollup(before: datetime, limit: int) -> Tuple[List[dict], List[int]]:
+    """Read the next chunk of expired runs and aggregate it, off the writer thread"""
+    runs = db.get_expired_job_runs(before, limit)
+    configs = db.get_job_configs(list({run['job_id'] for run in runs}))
+    return aggregate_runs(runs, configs), [run['id'] for run in runs]
+
+async def apply_retention(current_time: Optional[datetime] = None) -> dict:
+    """Roll up and delete expired runs, then compact old hourly rollups.
+
+    Works in chunks of RETENTION_CHUNK_SIZE, each its own transaction,
+    until nothing is left to do. Returns how many runs and hourly rollups
+    were processed.
+    """
+    current_time = current_time or datetime.now(pytz.UTC)
+    result = {'runs_rolled_up': 0, 'rollups_compacted': 0}
+    before = raw_cutoff(current_time)
+    if before is None:
+        return result
+
+    while True:
+        rollups, run_ids = await db.aio.run(prepare_rollup, before, RETENTION_CHUNK_SIZE)
+        if not run_ids:
+            break
+        result['runs_rolled_up'] += await db.aio.roll_up_job_runs(rollups, run_ids)
+        if len(run_ids) < RETENTION_CHUNK_SIZE:
+            break
+        await asyncio.sleep(RETENTION_CHUNK_PAUSE)
+
+    compact_before = hourly_cutoff(current_time)
+    while True:
+        compacted = await db.aio.compact_job_run_rollups(compact_before, RETENTION_CHUNK_SIZE)
+        result['rollups_compacted'] += compacted
+        if compacted < RETENTION_CHUNK_SIZE:
+            break
+        await asyncio.sleep(RETENTION_CHUNK_PAUSE)
+    return result
+
+async def run_retention():
+    """Background task applying the retention policy every RETENTION_INTERVAL"""
+    while True:
+        try:
+            await apply_retention()
+        except Exception as e:
+            print(f"Error applying run retention: {str(e)}")
+        await asyncio.sleep(RETENTION_INTERVAL)
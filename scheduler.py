@@ -0,0 +1,133 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+class DeadlineScheduler:
+    """Min-heap of wall-clock deadlines keyed by (job_id, kind).
+
+    Each key has at most one live deadline. Re-arming or cancelling a key
+    does not touch the heap; the old entry is simply recognized as stale
+    (its token no longer matches) and dropped when it reaches the top.
+    The run loop sleeps until the earliest live deadline and is woken early
+    whenever a new, earlier deadline is armed.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str, str, Any]] = []
+        self._live: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._tokens = itertools.count()
+        # Created by run() so it belongs to the loop the scheduler runs on
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def arm(self, job_id: str, kind: str, when: datetime, payload: Any = None):
+        """Set (or replace) the deadline for a key"""
+        deadline = when.timestamp()
+        token = next(self._tokens)
+        self._live[(job_id, kind)] = (token, deadline)
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (deadline, token, job_id, kind, payload))
+        if self._wakeup and (earliest is None or deadline < earliest):
+            self._wakeup.set()
+        # Stale entries are only dropped lazily; rebuild if they dominate
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._compact()
+
+    def deadline(self, job_id: str, kind: str) -> Optional[float]:
+        """Return the live deadline for a key as a POSIX timestamp, if any"""
+        entry = self._live.get((job_id, kind))
+        return entry[1] if entry else None
+
+    def cancel(self, job_id: str, kind: Optional[str] = None):
+        """Drop the deadline for one kind, or every kind, of a job"""
+        if kind is not None:
+            self._live.pop((job_id, kind), None)
+            return
+        for key in [key for key in self._live if key[0] == job_id]:
+            del self._live[key]
+
+    def clear(self):
+        self._heap.clear()
+        self._live.clear()
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _is_live(self, entry) -> bool:
+        return self._live.get((entry[2], entry[3]), (None,))[0] == entry[1]
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest live deadline as a POSIX timestamp"""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[Tuple[str, str, Any]]:
+        """Remove and return every live entry whose deadline has passed"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                del self._live[(entry[2], entry[3])]
+                due.append((entry[2], entry[3], entry[4]))
+        return due
+
+    async def run(
+        self,
+        on_due: Callable[[List[Tuple[str, str, Any]]], Awaitable[None]],
+        on_resync: Optional[Callable[[], Awaitable[None]]] = None,
+        resync_interval: Optional[float] = None
+    ):
+        """Dispatch deadlines as they expire; never returns.
+
+        Both callbacks are coroutine functions and are awaited one at a time.
+        `on_due` receives every (job_id, kind, payload) due at one wakeup at
+        once, so that it can handle them together. `on_resync`, if given, is
+        called once at start and then every `resync_interval` seconds as a
+        safety net for changes that were not announced through arm()/cancel().
+        """
+        self._wakeup = asyncio.Event()
+        next_resync = time.time() if on_resync else float('inf')
+        while True:
+            now = time.time()
+            if on_resync and now >= next_resync:
+                try:
+                    await on_resync()
+                except Exception as e:
+                    print(f"Error resyncing job deadlines: {str(e)}")
+                next_resync = now + resync_interval if resync_interval else float('inf')
+
+            earliest = self.next_deadline()
+            if earliest is not None and earliest <= now:
+                metrics.checker_lag_seconds.observe(now - earliest)
+                started = time.perf_counter()
+                due = self.pop_due(now)
+                try:
+                    await on_due(due)
+                except Exception as e:
+                    print(f"Error checking {len(due)} due deadlines: {str(e)}")
+                metrics.checker_tick_seconds.observe(time.perf_counter() - started)
+
+            wake_at = min(self.next_deadline() or float('inf'), next_resync)
+            self._wakeup.clear()
+            timeout = wake_at - time.time()
+            if timeout <= 0:
+                await asyncio.sleep(0)
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    timeout=None if timeout == float('inf') else timeout
+                )
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,314 @@
+import bisect
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+
+import pytz
+from croniter import croniter, CroniterBadDateError
+
+# Number of parsed schedules kept in memory
+SCHEDULE_CACHE_SIZE = int(os.environ.get('CRONICLE_SCHEDULE_CACHE_SIZE', 4096))
+
+# Fire times precomputed around the most recent lookup. Lookups mostly move
+# forward in time, so the window reaches further ahead than behind.
+FIRE_TIMES_BEHIND = 2
+FIRE_TIMES_AHEAD = 8
+
+# Schedule kinds, as stored in job_configs.schedule_kind
+CRON = 'cron'
+INTERVAL = 'interval'
+
+# Interval schedules are written '@every 10s', or '@every 5m jitter 30s' for
+# runs that may come up to 30 seconds late
+INTERVAL_PREFIX = '@every'
+_DURATION = re.compile(r'(\d+)([dhms])')
+_DURATION_UNITS = {'d': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+# Sub-minute schedules were once written as a cron expression with a seconds
+# step in front, e.g. '*/10 * * * * *'
+_LEGACY_SECONDS = re.compile(r'\*/(\d+)(\s+\*){5}')
+
+def _field_step(field: str, limit: int) -> Optional[int]:
+    # Step of a field firing at a fixed interval from 0 ('*' or '*/n' with n
+    # dividing the field's range), else None
+    if field == '*':
+        return 1
+    if field.startswith('*/') and field[2:].isdigit():
+        step = int(field[2:])
+        if 0 < step <= limit and limit % step == 0:
+            return step
+    return None
+
+def fixed_period(expression: str) -> Optional[Tuple[int, int]]:
+    """(period, offset) in seconds if the expression fires exactly at offset + k * period
+    seconds since the epoch (UTC), e.g. '*/5 * * * *', '30 * * * *' or '0 */6 * * *';
+    None for anything else"""
+    fields = expression.split()
+    if len(fields) != 5 or fields[2:] != ['*', '*', '*']:
+        return None
+    minute, hour = fields[:2]
+    minute_step = _field_step(minute, 60)
+    hour_step = _field_step(hour, 24)
+    if minute_step is not None:
+        # Every n minutes around the clock
+        return (minute_step * 60, 0) if hour == '*' else None
+    if not minute.isdigit() or int(minute) >= 60:
+        return None
+    if hour_step is not None:
+        return hour_step * 3600, int(minute) * 60
+    if hour.isdigit() and int(hour) < 24:
+        return 86400, int(hour) * 3600 + int(minute) * 60
+    return None
+
+class CompiledSchedule:
+    """A validated cron expression with a rolling window of fire times.
+
+    prev_fire()/next_fire() are answered by a binary search over the window;
+    croniter is only consulted again when a lookup falls outside it.
+    Expressions firing at a fixed period are answered arithmetically.
+    """
+
+    def __init__(self, expression: str):
+        # croniter raises a ValueError subclass for invalid expressions
+        croniter(expression)
+        self.expression = expression
+        self.kind = CRON
+        self.period = fixed_period(expression)
+        self._times: List[datetime] = []
+        self._lock = threading.Lock()
+
+    def _fire_time(self, index: int) -> datetime:
+        period, offset = self.period
+        return datetime.fromtimestamp(offset + index * period, pytz.UTC)
+
+    def _index(self, when: datetime) -> float:
+        # Position of `when` on the fixed-period grid, in periods
+        period, offset = self.period
+        return (when.timestamp() - offset) / period
+
+    def _refill(self, around: datetime) -> List[datetime]:
+        # Walk back from `around`, then forward from the oldest fire time, so
+        # the window is contiguous even if `around` is itself a fire time
+        cron = croniter(self.expression, around)
+        oldest = cron.get_prev(datetime)
+        for _ in range(FIRE_TIMES_BEHIND - 1):
+            try:
+                oldest = cron.get_prev(datetime)
+            except CroniterBadDateError:
+                # Very sparse schedules (e.g. Feb 29) hit croniter's search limit
+                break
+        cron = croniter(self.expression, oldest)
+        times = [oldest.astimezone(pytz.UTC)]
+        for _ in range(FIRE_TIMES_BEHIND + FIRE_TIMES_AHEAD):
+            try:
+                times.append(cron.get_next(datetime).astimezone(pytz.UTC))
+            except CroniterBadDateError:
+                break
+        self._times = times
+        return times
+
+    def prev_fire(self, before: datetime) -> datetime:
+        """Latest fire time strictly before `before`"""
+        before = before.astimezone(pytz.UTC)
+        if self.period:
+            return self._fire_time(math.ceil(self._index(before)) - 1)
+        with self._lock:
+            times = self._times
+            index = bisect.bisect_left(times, before)
+            if index == 0 or index == len(times):
+                times = self._refill(before)
+                index = bisect.bisect_left(times, before)
+            return times[index - 1]
+
+    def next_fire(self, after: datetime) -> datetime:
+        """Earliest fire time strictly after `after`"""
+        after = after.astimezone(pytz.UTC)
+        if self.period:
+            return self._fire_time(math.floor(self._index(after)) + 1)
+        with self._lock:
+            times = self._times
+            index = bisect.bisect_right(times, after)
+            if index == 0 or index == len(times):
+                times = self._refill(after)
+                index = bisect.bisect_right(times, after)
+            return times[index]
+
+    def fire_times(self, since: datetime, until: datetime, limit: int) -> Tuple[List[datetime], bool]:
+        """Fire times from `since` to `until`, both inclusive, oldest first.
+
+        At most the latest `limit` are returned; the flag tells whether older
+        ones were left out. Costs O(limit) whatever the length of the range.
+        """
+        if until < since or limit <= 0:
+            return [], until >= since
+        if self.period:
+            first = math.ceil(self._index(since))
+            last = math.floor(self._index(until))
+            truncated = last - first + 1 > limit
+            first = max(first, last - limit + 1)
+            return [self._fire_time(index) for index in range(first, last + 1)], truncated
+        # Walk back from `until`; croniter returns fire times strictly before
+        # its start, so start just after it
+        cron = croniter(self.expression, until.astimezone(pytz.UTC) + timedelta(microseconds=1))
+        times = []
+        try:
+            while True:
+                fire_time = cron.get_prev(datetime).astimezone(pytz.UTC)
+                if fire_time < since:
+                    break
+                if len(times) == limit:
+                    times.reverse()
+                    return times, True
+                times.append(fire_time)
+        except CroniterBadDateError:
+            pass
+        times.reverse()
+        return times, False
+
+def parse_duration(text: str) -> int:
+    """Seconds in a duration such as '90s', '5m' or '1h30m'"""
+    if not text or _DURATION.sub('', text):
+        raise ValueError(f"Invalid duration '{text}': use a number of d, h, m or s, e.g. 30s or 1h30m")
+    return sum(int(amount) * _DURATION_UNITS[unit] for amount, unit in _DURATION.findall(text))
+
+def format_duration(seconds: int) -> str:
+    """Shortest duration string for a number of seconds, e.g. 5400 -> '1h30m'"""
+    parts = []
+    for unit, size in _DURATION_UNITS.items():
+        if seconds >= size:
+            parts.append(f"{seconds // size}{unit}")
+            seconds %= size
+    return ''.join(parts) or '0s'
+
+class IntervalSchedule:
+    """Runs expected every `seconds` after the previous one, up to `jitter` seconds late.
+
+    Fire times count from an anchor, normally the job's latest run, so every
+    lookup is a little arithmetic.
+    """
+
+    kind = INTERVAL
+
+    def __init__(self, seconds: int, jitter: int = 0):
+        if seconds < 1:
+            raise ValueError("Interval must be at least 1 second")
+        if jitter < 0:
+            raise ValueError("Jitter cannot be negative")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    @property
+    def expression(self) -> str:
+        expression = f"{INTERVAL_PREFIX} {format_duration(self.seconds)}"
+        if self.jitter:
+            expression += f" jitter {format_duration(self.jitter)}"
+        return expression
+
+    def next_fire(self, after: datetime, anchor: Optional[datetime] = None) -> datetime:
+        """Earliest anchor + k intervals (k >= 1) strictly after `after`; `after` itself
+        is the anchor if none is given"""
+        if anchor is None or anchor > after:
+            return (anchor or after) + timedelta(seconds=self.seconds)
+        periods = math.floor((after - anchor).total_seconds() / self.seconds) + 1
+        return anchor + timedelta(seconds=periods * self.seconds)
+
+    def prev_fire(self, before: datetime, anchor: Optional[datetime] = None) -> Optional[datetime]:
+        """Latest anchor + k intervals (k >= 0) strictly before `before`, if any"""
+        if anchor is None or anchor >= before:
+            return None
+        periods = math.ceil((before - anchor).total_seconds() / self.seconds) - 1
+        return anchor + timedelta(seconds=periods * self.seconds)
+
+def parse_schedule(text: str) -> dict:
+    """Parse a schedule as entered into the job_configs columns that store it:
+    schedule (normalized text), schedule_kind, interval_seconds and jitter_seconds.
+    Raises ValueError for anything that is neither an interval nor a cron expression.
+    """
+    text = ' '.join(text.split())
+    legacy = _LEGACY_SECONDS.fullmatch(text)
+    if legacy and 0 < int(legacy.group(1)) < 60:
+        text = f"{INTERVAL_PREFIX} {legacy.group(1)}s"
+    if text.startswith(INTERVAL_PREFIX):
+        words = text.split()[1:]
+        if len(words) not in (1, 3) or (len(words) == 3 and words[1] != 'jitter'):
+            raise ValueError(f"Invalid interval '{text}': use '{INTERVAL_PREFIX} 10s' or '{INTERVAL_PREFIX} 5m jitter 30s'")
+        schedule = IntervalSchedule(parse_duration(words[0]), parse_duration(words[2]) if len(words) == 3 else 0)
+        return {
+            'schedule': schedule.expression,
+            'schedule_kind': INTERVAL,
+            'interval_seconds': schedule.seconds,
+            'jitter_seconds': schedule.jitter,
+        }
+    # Validates the expression (and warms the cache for it)
+    get_schedule(text)
+    return {'schedule': text, 'schedule_kind': CRON, 'interval_seconds': None, 'jitter_seconds': None}
+
+class ScheduleCache:
+    """Thread-safe LRU cache of CompiledSchedule objects keyed by expression"""
+
+    def __init__(self, maxsize: int = SCHEDULE_CACHE_SIZE):
+        self.maxsize = max(1, maxsize)
+        self._schedules: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, expression: str) -> CompiledSchedule:
+        with self._lock:
+            schedule = self._schedules.get(expression)
+            if schedule is not None:
+                self._schedules.move_to_end(expression)
+                self.hits += 1
+                return schedule
+            self.misses += 1
+        # Parse outside the lock; a concurrent miss just parses twice
+        schedule = CompiledSchedule(expression)
+        with self._lock:
+            self._schedules[expression] = schedule
+            self._schedules.move_to_end(expression)
+            while len(self._schedules) > self.maxsize:
+                self._schedules.popitem(last=False)
+        return schedule
+
+    def clear(self):
+        with self._lock:
+            self._schedules.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._schedules),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+cache = ScheduleCache()
+
+def get_schedule(expression: str) -> CompiledSchedule:
+    """Return the compiled schedule for a cron expression, parsing it at most once"""
+    return cache.get(expression)
+
+def prev_fire(expression: str, before: datetime) -> datetime:
+    """Latest fire time of `expression` strictly before `before`, in UTC"""
+    return get_schedule(expression).prev_fire(before)
+
+def next_fire(expression: str, after: datetime) -> datetime:
+    """Earliest fire time of `expression` strictly after `after`, in UTC"""
+    return get_schedule(expression).next_fire(after)
+
+def for_job(job: dict) -> Union[CompiledSchedule, IntervalSchedule]:
+    """The schedule of a job config, built from its stored columns without parsing text"""
+    if job.get('schedule_kind') == INTERVAL:
+        return IntervalSchedule(job['interval_seconds'], job.get('jitter_seconds') or 0)
+    return get_schedule(job['schedule'])
+
+def fire_times(expression: str, since: datetime, until: datetime, limit: int) -> Tuple[List[datetime], bool]:
+    """Fire times of `expression` from `since` to `until`, capped at the latest `limit`"""
+    return get_schedule(expression).fire_times(since, until, limit)
@@ -0,0 +1,155 @@
+import math
+import struct
+from typing import Dict, Optional
+
+# Relative error of quantiles estimated from a DurationSketch
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+# Durations at or below this many minutes are counted as zero
+SKETCH_MIN_VALUE = 1e-3
+
+# Upper bound on stored buckets; the lowest ones are folded together past it
+SKETCH_MAX_BUCKETS = 2048
+
+_HEADER = struct.Struct('<Q')
+_BUCKET = struct.Struct('<iQ')
+
+class DurationSketch:
+    """Mergeable quantile sketch for run durations (in minutes).
+
+    Values are counted in logarithmic buckets (as in DDSketch), so any
+    quantile is estimated within SKETCH_RELATIVE_ACCURACY of the true value
+    using a few hundred buckets at most, whatever the number of values.
+    Sketches built from disjoint sets of runs merge into exactly the sketch
+    of their union, which is what makes rollups and per-job totals composable.
+    """
+
+    gamma = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+    _log_gamma = math.log(gamma)
+
+    def __init__(self):
+        self.zero_count = 0
+        self.buckets: Dict[int, int] = {}
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        if value <= SKETCH_MIN_VALUE:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > SKETCH_MAX_BUCKETS:
+            self._collapse()
+
+    def merge(self, other: 'DurationSketch') -> 'DurationSketch':
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > SKETCH_MAX_BUCKETS:
+            self._collapse()
+        return self
+
+    def _collapse(self):
+        # Fold the smallest buckets into one; only the lowest quantiles lose accuracy
+        indexes = sorted(self.buckets)
+        excess = indexes[:len(indexes) - SKETCH_MAX_BUCKETS + 1]
+        target = excess[-1]
+        self.buckets[target] = sum(self.buckets.pop(index) for index in excess)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile (0 <= q <= 1), or None if the sketch is empty"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.zero_count) + b''.join(
+            _BUCKET.pack(index, count) for index, count in sorted(self.buckets.items())
+        )
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> 'DurationSketch':
+        sketch = cls()
+        if not data:
+            return sketch
+        sketch.zero_count, = _HEADER.unpack_from(data)
+        for index, count in _BUCKET.iter_unpack(data[_HEADER.size:]):
+            sketch.buckets[index] = count
+        return sketch
+
+class DurationStats:
+    """Streaming summary of run durations: count, mean and variance, extremes and quantiles.
+
+    Mean and variance are kept with Welford's method and combined with Chan
+    et al.'s parallel formula, so summaries of disjoint sets of runs merge
+    exactly, like their sketches.
+    """
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0,
+                 minimum: Optional[float] = None, maximum: Optional[float] = None,
+                 sketch: Optional[DurationSketch] = None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = minimum
+        self.max = maximum
+        self.sketch = sketch or DurationSketch()
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other: 'DurationStats') -> 'DurationStats':
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance, or None with fewer than two values"""
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile, kept within the exact min and max"""
+        value = self.sketch.quantile(q)
+        if value is None:
+            return None
+        return min(max(value, self.min), self.max)
+
+    def summary(self) -> dict:
+        variance = self.variance
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else None,
+            'stddev': math.sqrt(variance) if variance is not None else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
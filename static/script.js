@@ -34,6 +34,17 @@ function formatDuration(minutes) {
     }
 }
 
+// Describe a schedule: a cron expression, or an interval such as '@every 5m jitter 30s'
+function describeSchedule(schedule) {
+    const interval = schedule.trim().match(/^@every\s+(\S+)(?:\s+jitter\s+(\S+))?$/);
+    if (interval) {
+        return interval[2] ?
+            `Every ${interval[1]}, up to ${interval[2]} late` :
+            `Every ${interval[1]}`;
+    }
+    return cronstrue.toString(schedule);
+}
+
 // Format datetime
 function formatDateTime(isoString) {
     if (!isoString) return 'Never';
@@ -41,11 +52,51 @@ function formatDateTime(isoString) {
     return date.toLocaleString();
 }
 
+// Dashboard state. Loaded from the REST endpoints and then kept current by
+// the change feed on /ws, so open tabs do not need to poll.
+let jobsState = new Map();
+let runsState = null;
+let alertsState = [];
+
+// Last ETag and body per URL. The server answers 304 without querying the
+// database when nothing changed, and the cached body is used instead.
+const responseCache = new Map();
+
+async function fetchJSON(url) {
+    const cached = responseCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) {
+        return JSON.parse(cached.body);
+    }
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    const body = await response.text();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        responseCache.set(url, { etag, body });
+    } else {
+        responseCache.delete(url);
+    }
+    return JSON.parse(body);
+}
+
 // Refresh jobs list
 async function refreshJobs() {
     try {
-        const response = await fetch('/jobs');
-        const jobs = await response.json();
+        const jobs = await fetchJSON('/jobs');
+        jobsState = new Map(jobs.map(job => [job.job_id, job]));
+        renderJobs();
+        // Run rows show the job type, so redraw them with the new jobs
+        renderRuns();
+    } catch (error) {
+        console.error('Error in refreshJobs:', error);
+        showToast('Error', 'Failed to refresh jobs: ' + error.message, 'error');
+    }
+}
+
+function renderJobs() {
+    try {
+        const jobs = [...jobsState.values()].sort((a, b) => a.job_id < b.job_id ? -1 : a.job_id > b.job_id ? 1 : 0);
         
         // Update jobs table
         const jobsList = document.getElementById('jobsList');
@@ -62,7 +113,7 @@ async function refreshJobs() {
                 <td>${job.job_id}</td>
                 <td>
                     ${job.schedule}
-                    <div class="small text-muted">${cronstrue.toString(job.schedule)}</div>
+                    <div class="small text-muted">${describeSchedule(job.schedule)}</div>
                 </td>
                 <td class="text-center">${job.tolerance_minutes}</td>
                 <td class="text-center">${isHeartbeat ? 'N/A' : job.max_runtime_minutes}</td>
@@ -110,41 +161,52 @@ async function refreshJobs() {
         // Restore scroll position
         window.scrollTo(0, currentScrollPos);
     } catch (error) {
-        console.error('Error in refreshJobs:', error);
-        showToast('Error', 'Failed to refresh jobs: ' + error.message, 'error');
+        console.error('Error in renderJobs:', error);
     }
 }
 
-// Global state for runs pagination
+// Global state for runs pagination. Pages are addressed by cursor; the
+// stack holds the cursor each visited page was fetched with.
 let currentRunsPage = 1;
-let totalRunsPages = 1;
+let runsCursors = [null];
+let nextRunsCursor = null;
+// Set when live updates shifted rows off page 1, making nextRunsCursor stale
+let runsPageStale = false;
 
 async function refreshRuns() {
     try {
-        const response = await fetch(`/job_runs?page=${currentRunsPage}`);
-        const data = await response.json();
+        const cursor = runsCursors[currentRunsPage - 1];
+        const params = new URLSearchParams({ per_page: 10 });
+        if (cursor) params.set('cursor', cursor);
+        runsState = await fetchJSON(`/job_runs?${params}`);
+        runsPageStale = false;
+        renderRuns();
+    } catch (error) {
+        console.error('Error refreshing runs:', error);
+        showToast('Error', 'Failed to refresh runs', 'error');
+    }
+}
+
+function renderRuns() {
+    if (!runsState) return;
+    try {
+        const data = runsState;
         
         const runsList = document.getElementById('runsList');
         runsList.innerHTML = '';
         
         // Update pagination info
-        totalRunsPages = data.total_pages;
-        document.getElementById('runsStartRange').textContent = ((data.page - 1) * data.per_page) + 1;
-        document.getElementById('runsEndRange').textContent = Math.min(data.page * data.per_page, data.total);
+        nextRunsCursor = data.next_cursor;
+        const firstRun = (currentRunsPage - 1) * data.per_page;
+        const entries = data.runs.length + (data.rollups || []).length;
+        document.getElementById('runsStartRange').textContent = entries ? firstRun + 1 : 0;
+        document.getElementById('runsEndRange').textContent = firstRun + entries;
         document.getElementById('totalRuns').textContent = data.total;
         
-        // Get job configurations to determine job types
-        const jobsResponse = await fetch('/jobs');
-        const jobs = await jobsResponse.json();
-        const jobConfigs = {};
-        jobs.forEach(job => {
-            jobConfigs[job.job_id] = job;
-        });
-        
-        // Update table
+        // Update table; job types come from the jobs already loaded
         for (const run of data.runs) {
             const row = document.createElement('tr');
-            const jobConfig = jobConfigs[run.job_id];
+            const jobConfig = jobsState.get(run.job_id);
             const isHeartbeat = jobConfig && !jobConfig.max_runtime_minutes;
             
             // Job ID
@@ -199,14 +261,32 @@ async function refreshRuns() {
             runsList.appendChild(row);
         }
         
+        // Older history only survives as hourly or daily rollups
+        for (const rollup of data.rollups || []) {
+            const row = document.createElement('tr');
+            row.className = 'text-muted';
+            const cells = [
+                rollup.job_id,
+                new Date(rollup.bucket_start).toLocaleString(),
+                `${rollup.run_count} runs (${rollup.granularity === 'day' ? 'daily' : 'hourly'} rollup)`,
+                rollup.duration_mean !== null ? `avg ${formatDuration(rollup.duration_mean)}` : '-',
+                '-'
+            ];
+            for (const text of cells) {
+                const cell = document.createElement('td');
+                cell.textContent = text;
+                row.appendChild(cell);
+            }
+            runsList.appendChild(row);
+        }
+        
         // Update pagination buttons
         const prevButton = document.querySelector('button[onclick="previousRunsPage()"]');
         const nextButton = document.querySelector('button[onclick="nextRunsPage()"]');
         prevButton.disabled = currentRunsPage === 1;
-        nextButton.disabled = currentRunsPage === totalRunsPages;
+        nextButton.disabled = !nextRunsCursor;
     } catch (error) {
-        console.error('Error refreshing runs:', error);
-        showToast('Error', 'Failed to refresh runs', 'error');
+        console.error('Error rendering runs:', error);
     }
 }
 
@@ -217,8 +297,13 @@ function previousRunsPage() {
     }
 }
 
-function nextRunsPage() {
-    if (currentRunsPage < totalRunsPages) {
+async function nextRunsPage() {
+    if (runsPageStale) {
+        await refreshRuns();
+    }
+    if (nextRunsCursor) {
+        runsCursors[currentRunsPage] = nextRunsCursor;
+        runsCursors.length = currentRunsPage + 1;
         currentRunsPage++;
         refreshRuns();
     }
@@ -418,8 +503,7 @@ async function addJob(event) {
 
     try {
         // First check if job already exists
-        const response = await fetch('/jobs');
-        const jobs = await response.json();
+        const jobs = await fetchJSON('/jobs');
         const existingJob = jobs.find(job => job.job_id === jobId);
         
         if (existingJob) {
@@ -500,12 +584,12 @@ document.getElementById('schedule').addEventListener('input', function(e) {
     try {
         const expression = e.target.value.trim();
         if (expression) {
-            scheduleHint.textContent = cronstrue.toString(expression);
+            scheduleHint.textContent = describeSchedule(expression);
         } else {
             scheduleHint.textContent = '';
         }
     } catch (error) {
-        scheduleHint.textContent = 'Invalid cron expression';
+        scheduleHint.textContent = 'Invalid schedule';
     }
 });
 
@@ -555,9 +639,17 @@ async function refreshAlerts() {
     const showAcknowledged = document.getElementById('showAcknowledged')?.checked || false;
     
     try {
-        const response = await fetch(`/job_alerts?include_acknowledged=${showAcknowledged}`);
-        const alerts = await response.json();
-        console.log('Received alerts:', alerts); // Debug log
+        alertsState = await fetchJSON(`/job_alerts?include_acknowledged=${showAcknowledged}`);
+        console.log('Received alerts:', alertsState); // Debug log
+        renderAlerts();
+    } catch (error) {
+        console.error('Error fetching alerts:', error);
+    }
+}
+
+function renderAlerts() {
+    try {
+        const alerts = alertsState;
         
         const alertsList = document.getElementById('alertsList');
         const noAlerts = document.getElementById('noAlerts');
@@ -624,7 +716,7 @@ async function refreshAlerts() {
         const hasUnacknowledged = alerts.some(alert => !alert.acknowledged);
         alertsContainer.classList.toggle('has-unacknowledged', hasUnacknowledged);
     } catch (error) {
-        console.error('Error fetching alerts:', error);
+        console.error('Error rendering alerts:', error);
     }
 }
 
@@ -686,12 +778,117 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
-// WebSocket connection
+// Apply one change-feed event to the dashboard state
+function applyChange(change) {
+    switch (change.type) {
+        case 'job':
+            if (change.job) {
+                jobsState.set(change.job_id, change.job);
+            } else {
+                // Deleted: drop everything that belongs to the job
+                jobsState.delete(change.job_id);
+                alertsState = alertsState.filter(alert => alert.job_id !== change.job_id);
+                if (runsState) {
+                    const remaining = runsState.runs.filter(run => run.job_id !== change.job_id);
+                    runsPageStale = runsPageStale || remaining.length !== runsState.runs.length;
+                    runsState.runs = remaining;
+                }
+                renderAlerts();
+            }
+            renderJobs();
+            renderRuns();
+            break;
+        case 'run':
+            applyRunChange(change.run);
+            break;
+        case 'alert': {
+            // Alerts are listed one per job and type, latest first
+            alertsState = alertsState.filter(alert => 
+                alert.job_id !== change.alert.job_id || alert.type !== change.alert.type);
+            alertsState.unshift(change.alert);
+            alertsState.sort((a, b) => new Date(b.detected_time) - new Date(a.detected_time));
+            renderAlerts();
+            break;
+        }
+        case 'alert_acknowledged': {
+            const acknowledged = alertsState.find(alert => alert.id === change.alert_id);
+            if (acknowledged) {
+                acknowledged.acknowledged = 1;
+                renderAlerts();
+            }
+            break;
+        }
+    }
+}
+
+function applyRunChange(run) {
+    if (!runsState) return;
+    const index = runsState.runs.findIndex(existing => existing.id === run.id);
+    if (index !== -1) {
+        runsState.runs[index] = run;
+    } else {
+        if (runsState.total !== null) runsState.total++;
+        // New runs are the newest, so they only show up on the first page
+        if (currentRunsPage !== 1) {
+            runsPageStale = true;
+        } else {
+            runsState.runs.unshift(run);
+            if (runsState.runs.length > runsState.per_page) {
+                runsState.runs.length = runsState.per_page;
+                runsPageStale = true;
+            }
+        }
+    }
+    renderRuns();
+}
+
+// Running durations are derived from the clock, not from pushed changes, so
+// redraw them now and then even while nothing changes
+const CLOCK_INTERVAL_MS = 30000;
+
+function tickClock() {
+    if (runsState && runsState.runs.some(run => run.start_time && !run.end_time)) {
+        renderRuns();
+    }
+}
+
+function refreshAll() {
+    refreshJobs();
+    refreshRuns();
+    refreshAlerts();
+}
+
+// WebSocket connection. While it is up the server pushes every change; while
+// it is down the dashboard falls back to polling.
 let ws;
+let feedId = null;
+let feedSeq = null;
+let pollTimer = null;
+// Changes that arrive while a full reload is in flight, replayed after it
+let pendingChanges = null;
+
+function startPolling() {
+    if (pollTimer) return;
+    pollTimer = setInterval(refreshAll, 5000);
+}
+
+function stopPolling() {
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
+async function reloadDashboard() {
+    pendingChanges = [];
+    await Promise.all([refreshJobs(), refreshRuns(), refreshAlerts()]);
+    const changes = pendingChanges;
+    pendingChanges = null;
+    changes.forEach(applyChange);
+}
 
 function connectWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/ws`;
+    const resume = feedId ? `?feed=${feedId}&since=${feedSeq}` : '';
+    const wsUrl = `${protocol}//${window.location.host}/ws${resume}`;
     ws = new WebSocket(wsUrl);
 
     ws.onopen = () => {
@@ -699,16 +896,26 @@ function connectWebSocket() {
     };
 
     ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
-        if (data.type === 'refresh') {
-            refreshJobs();
-            refreshRuns();
-            refreshAlerts();
+        const message = JSON.parse(event.data);
+        if (message.type === 'hello' || message.type === 'reset') {
+            feedId = message.feed;
+            feedSeq = message.seq;
+            stopPolling();
+            // Anything that was missed and could not be replayed is reloaded
+            if (!message.resumed) reloadDashboard();
+            return;
+        }
+        feedSeq = message.seq;
+        if (pendingChanges) {
+            pendingChanges.push(message);
+        } else {
+            applyChange(message);
         }
     };
 
     ws.onclose = () => {
-        console.log('WebSocket disconnected. Reconnecting in 5s...');
+        console.log('WebSocket disconnected. Polling and reconnecting in 5s...');
+        startPolling();
         setTimeout(connectWebSocket, 5000);
     };
 
@@ -720,6 +927,7 @@ function connectWebSocket() {
 // Initialize WebSocket connection
 document.addEventListener('DOMContentLoaded', () => {
     connectWebSocket();
+    setInterval(tickClock, CLOCK_INTERVAL_MS);
     setupAlertsCollapse();
     initTheme();
     
@@ -727,11 +935,6 @@ document.addEventListener('DOMContentLoaded', () => {
     refreshJobs();
     refreshRuns();
     refreshAlerts();
-    
-    // Set up periodic refreshes
-    setInterval(refreshJobs, 5000);
-    setInterval(refreshRuns, 5000);
-    setInterval(refreshAlerts, 5000);
 });
 
 // Add event listener for collapse button
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# A scratch data directory for the whole session; must be set before
+# database is imported, which opens (and migrates) the database
+os.environ['CRONICLE_DATA_DIR'] = tempfile.mkdtemp(prefix='cronicle-test-')
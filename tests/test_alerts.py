@@ -0,0 +1,195 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import database as db
+from database import AlertType, RecentAlerts
+from incidents import coalesce_alerts
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=pytz.UTC)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(db.time, 'monotonic', clock)
+    return clock
+
+
+def test_recent_alerts_expire_after_ttl(clock):
+    recent = RecentAlerts(ttl=60, maxsize=10)
+    key = RecentAlerts.key('job', AlertType.MISSED_JOB, START)
+    assert key not in recent
+    recent.add(key)
+    clock.now += 59
+    # A lookup counts as a use and restarts the clock
+    assert key in recent
+    clock.now += 59
+    assert key in recent
+    clock.now += 61
+    assert key not in recent
+    assert recent.stats()['hits'] == 2
+    assert recent.stats()['misses'] == 2
+
+
+def test_recent_alerts_evict_least_recently_used(clock):
+    recent = RecentAlerts(ttl=60, maxsize=2)
+    keys = [RecentAlerts.key('job', AlertType.MISSED_JOB, START + timedelta(minutes=i)) for i in range(3)]
+    recent.add(keys[0])
+    recent.add(keys[1])
+    assert keys[0] in recent
+    recent.add(keys[2])
+    assert len(recent) == 2
+    assert keys[1] not in recent
+    assert keys[0] in recent and keys[2] in recent
+
+
+def test_recent_alerts_keys_are_utc():
+    eastern = START.astimezone(pytz.timezone('US/Eastern'))
+    assert RecentAlerts.key('job', AlertType.LONG_RUNNING, eastern) == RecentAlerts.key('job', AlertType.LONG_RUNNING, START)
+
+
+def test_recent_alerts_discard_job():
+    recent = RecentAlerts()
+    recent.warm([RecentAlerts.key('a', AlertType.MISSED_JOB, START), RecentAlerts.key('b', AlertType.MISSED_JOB, START)])
+    recent.discard_job('a')
+    assert RecentAlerts.key('a', AlertType.MISSED_JOB, START) not in recent
+    assert RecentAlerts.key('b', AlertType.MISSED_JOB, START) in recent
+
+
+def test_add_job_alert_ignores_duplicates():
+    first = db.add_job_alert('dedup-single', AlertType.MISSED_JOB, 'missed', expected_start_time=START)
+    assert first is not None
+    # The same alert, with the start time in another time zone
+    eastern = START.astimezone(pytz.timezone('US/Eastern'))
+    assert db.add_job_alert('dedup-single', AlertType.MISSED_JOB, 'missed again', expected_start_time=eastern) is None
+    assert db.add_job_alert('dedup-single', AlertType.LONG_RUNNING, 'long', actual_start_time=START) is not None
+    assert RecentAlerts.key('dedup-single', AlertType.MISSED_JOB, START) in db.recent_alerts
+
+
+def missed(job_id, expected_start_time, incident=None):
+    return {
+        'job_id': job_id,
+        'alert_type': AlertType.MISSED_JOB,
+        'alert_message': f"{job_id} missed",
+        'expected_start_time': expected_start_time,
+        'incident': incident,
+    }
+
+
+def incident(first, last):
+    return {
+        'reason': 'schedule',
+        'alert_type': AlertType.MISSED_JOB,
+        'schedule': '0 * * * *',
+        'first_start_time': first,
+        'last_start_time': last,
+        'summary': 'test incident',
+    }
+
+
+def test_record_alerts_drops_duplicates_and_empty_incidents():
+    later = START + timedelta(hours=1)
+    recorded = db.record_alerts([missed('dedup-a', START), missed('dedup-b', START)])
+    assert None not in recorded['alert_ids']
+
+    result = db.record_alerts(
+        [missed('dedup-a', START, 0), missed('dedup-b', START, 0), missed('dedup-a', later, 1), missed('dedup-b', later, 1)],
+        [incident(START, START), incident(later, later)],
+    )
+    assert result['alert_ids'][:2] == [None, None]
+    assert None not in result['alert_ids'][2:]
+    # Every alert of the first incident was a duplicate, so it is not kept
+    assert result['incident_ids'][0] is None
+    assert result['incident_ids'][1] is not None
+    (kept,) = db.get_alert_incidents(incident_ids=[result['incident_ids'][1]])
+    assert kept['alert_count'] == 2
+
+
+def test_leases_are_held_by_one_holder_until_released():
+    assert db.acquire_lease('test-lease', 'first', 60)
+    assert not db.acquire_lease('test-lease', 'second', 60)
+    # Renewal keeps the original acquisition time
+    acquired_at = db.get_lease('test-lease')['acquired_at']
+    assert db.acquire_lease('test-lease', 'first', 60)
+    assert db.get_lease('test-lease')['acquired_at'] == acquired_at
+
+    assert not db.release_lease('test-lease', 'second')
+    assert db.release_lease('test-lease', 'first')
+    assert db.get_lease('test-lease') is None
+    assert db.acquire_lease('test-lease', 'second', 60)
+
+
+def test_expired_leases_are_taken_over():
+    assert db.acquire_lease('test-expiry', 'first', -1)
+    assert db.get_lease('test-expiry') is None
+    assert db.acquire_lease('test-expiry', 'second', 60)
+    assert db.get_lease('test-expiry')['holder'] == 'second'
+
+
+def test_alert_groups_count_unacknowledged_alerts():
+    ids = [
+        db.add_job_alert('grouped', AlertType.MISSED_JOB, 'missed', expected_start_time=START + timedelta(hours=hour))
+        for hour in range(3)
+    ]
+    (group,) = db.get_job_alerts('grouped')
+    assert (group['id'], group['alert_count']) == (ids[-1], 3)
+
+    assert db.acknowledge_job_alert(ids[-1])
+    assert db.get_job_alerts('grouped') == []
+    (group,) = db.get_job_alerts('grouped', include_acknowledged=True)
+    assert group['alert_count'] == 3
+
+
+def alert(job_id, alert_type, start_time, schedule='0 * * * *'):
+    return {
+        'job_id': job_id,
+        'alert_type': alert_type,
+        'expected_start_time': start_time,
+        'actual_start_time': start_time if alert_type == AlertType.LONG_RUNNING else None,
+        'schedule': schedule,
+    }
+
+
+def test_coalesce_below_threshold_keeps_alerts_individual():
+    alerts = [alert(f"job-{i}", AlertType.MISSED_JOB, START) for i in range(4)]
+    assert coalesce_alerts(alerts, START, threshold=5) == []
+
+
+def test_coalesce_groups_downtime_schedules_and_the_rest():
+    checker_started = START + timedelta(hours=1)
+    downtime = [alert(f"down-{i}", AlertType.MISSED_JOB, START) for i in range(3)]
+    hourly = [alert(f"hourly-{i}", AlertType.MISSED_JOB, checker_started, '30 * * * *') for i in range(3)]
+    # Long-running alerts never count as downtime, however old their runs
+    rest = [alert(f"long-{i}", AlertType.LONG_RUNNING, START) for i in range(2)]
+    rest.append(alert('other', AlertType.MISSED_JOB, checker_started, '*/5 * * * *'))
+
+    incidents = coalesce_alerts(downtime + hourly + rest, checker_started, threshold=3)
+    by_reason = {incident['reason']: incident for incident in incidents}
+    assert [incident['reason'] for incident in incidents] == ['restart', 'schedule', 'tick']
+
+    assert by_reason['restart']['alerts'] == downtime
+    assert by_reason['restart']['alert_type'] == AlertType.MISSED_JOB
+    assert by_reason['schedule']['alerts'] == hourly
+    assert by_reason['schedule']['schedule'] == '30 * * * *'
+    assert by_reason['tick']['alerts'] == rest
+    assert by_reason['tick']['alert_type'] is None
+    assert (by_reason['tick']['first_start_time'], by_reason['tick']['last_start_time']) == (START, checker_started)
+
+
+def test_coalesce_small_groups_fall_through_to_the_tick():
+    checker_started = START + timedelta(hours=1)
+    alerts = [alert('down', AlertType.MISSED_JOB, START)]
+    alerts += [alert(f"job-{i}", AlertType.MISSED_JOB, checker_started, f"{i} * * * *") for i in range(3)]
+    (incident,) = coalesce_alerts(alerts, checker_started, threshold=3)
+    assert incident['reason'] == 'tick'
+    assert incident['alerts'] == alerts[1:] + alerts[:1]
@@ -0,0 +1,104 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import app
+import database as db
+from events import ChangeFeed, Subscription
+
+
+def drain(subscription):
+    """Every message queued for a subscription"""
+    async def get_all():
+        messages = []
+        while not subscription.queue.empty():
+            messages.append(await subscription.get())
+        return messages
+    return asyncio.run(get_all())
+
+
+def test_new_subscribers_start_from_the_current_sequence():
+    feed = ChangeFeed()
+    feed.publish('job', job_id='a')
+    (hello,) = drain(feed.subscribe())
+    assert hello == {'type': 'hello', 'feed': feed.feed_id, 'seq': 1, 'resumed': False}
+
+
+def test_reconnecting_subscribers_resume_from_the_buffer():
+    feed = ChangeFeed(buffer_size=10)
+    for job_id in 'abc':
+        feed.publish('job', job_id=job_id)
+    hello, *missed = drain(feed.subscribe(feed.feed_id, since=1))
+    assert hello == {'type': 'hello', 'feed': feed.feed_id, 'seq': 1, 'resumed': True}
+    assert [(event['seq'], event['job_id']) for event in missed] == [(2, 'b'), (3, 'c')]
+    # Up to date already
+    assert drain(feed.subscribe(feed.feed_id, since=3)) == [
+        {'type': 'hello', 'feed': feed.feed_id, 'seq': 3, 'resumed': True}
+    ]
+
+
+def test_subscribers_reload_when_they_cannot_resume():
+    feed = ChangeFeed(buffer_size=2)
+    for job_id in 'abcd':
+        feed.publish('job', job_id=job_id)
+    # Events 2 and 3 were dropped from the buffer
+    (hello,) = drain(feed.subscribe(feed.feed_id, since=1))
+    assert hello['resumed'] is False and hello['seq'] == 4
+    # A feed from an earlier process, or a sequence number from the future
+    assert drain(feed.subscribe('earlier', since=3))[0]['resumed'] is False
+    assert drain(feed.subscribe(feed.feed_id, since=9))[0]['resumed'] is False
+
+
+def test_events_reach_every_subscriber():
+    feed = ChangeFeed()
+    first, second = feed.subscribe(), feed.subscribe()
+    feed.publish('alert_acknowledged', alert_id=7)
+    feed.unsubscribe(second)
+    feed.publish('alert_acknowledged', alert_id=8)
+    assert [event.get('alert_id') for event in drain(first)] == [None, 7, 8]
+    assert [event.get('alert_id') for event in drain(second)] == [None, 7]
+    assert len(feed) == 1
+
+
+def test_slow_subscribers_are_reset():
+    feed = ChangeFeed()
+    subscription = Subscription(feed, maxsize=2)
+    feed._subscribers.add(subscription)
+    for job_id in 'abc':
+        feed.publish('job', job_id=job_id)
+    # The queue overflowed: its events are dropped for one reset message
+    assert drain(subscription) == [{'type': 'reset', 'feed': feed.feed_id, 'seq': 3}]
+    feed.publish('job', job_id='d')
+    assert [event['job_id'] for event in drain(subscription)] == ['d']
+
+
+def test_websocket_opens_with_hello():
+    client = TestClient(app.app)
+    with client.websocket_connect('/ws') as websocket:
+        hello = websocket.receive_json()
+    assert hello['type'] == 'hello'
+    assert hello['feed'] == app.change_feed.feed_id
+
+
+def test_reset_tells_subscribers_to_reload():
+    feed = ChangeFeed()
+    subscription = feed.subscribe()
+    feed.publish('job', job_id='a')
+    feed.reset()
+    assert drain(subscription)[-1] == {'type': 'reset', 'feed': feed.feed_id, 'seq': 2}
+    # Clients from before the reset cannot resume past it
+    assert drain(feed.subscribe(feed.feed_id, since=1))[0]['resumed'] is False
+
+
+def test_shared_version_counts_writes_of_other_processes(tmp_path):
+    ours, theirs = db.SharedVersion(tmp_path / 'version'), db.SharedVersion(tmp_path / 'version')
+    assert ours.foreign_writes() == theirs.foreign_writes() == 0
+    ours.bump()
+    theirs.bump(configs=True)
+    theirs.bump()
+    assert ours.foreign_writes() == 2
+    assert theirs.foreign_writes() == 1
+    assert ours.token() == theirs.token()
+    assert ours.configs() == 1
+    ours.close()
+    theirs.close()
@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import app
+import schedules
+import database as db
+from scheduler import DeadlineScheduler
+
+NOW = datetime(2024, 3, 1, 12, 7, tzinfo=pytz.UTC)
+
+HOURLY = '0 * * * *'
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=pytz.UTC)
+
+
+@pytest.fixture(autouse=True)
+def checker(monkeypatch):
+    # A scheduler and watermarks of its own for every test
+    monkeypatch.setattr(app, 'scheduler', DeadlineScheduler())
+    monkeypatch.setattr(app, 'handled_through', {})
+    # Long past the grace window after startup
+    monkeypatch.setattr(app, 'checker_started', NOW - timedelta(days=1))
+
+
+def alert_count(job_id):
+    with db.get_db() as conn:
+        return conn.execute('SELECT COUNT(*) FROM job_alerts WHERE job_id = ?', (job_id,)).fetchone()[0]
+
+
+def test_next_expected_run_waits_for_the_latest_fire_time_first():
+    job = {'job_id': 'hourly', 'schedule': HOURLY}
+    # Never ran: the fire time that just passed is the one to check
+    assert app.next_expected_run(job, None, NOW) == utc(2024, 3, 1, 12)
+    assert app.next_expected_run(job, utc(2024, 3, 1, 11), NOW) == utc(2024, 3, 1, 12)
+    # Ran since, or already checked: the next one
+    assert app.next_expected_run(job, utc(2024, 3, 1, 12, 1), NOW) == utc(2024, 3, 1, 13)
+    app.handled_through['hourly'] = utc(2024, 3, 1, 12)
+    assert app.next_expected_run(job, None, NOW) == utc(2024, 3, 1, 13)
+
+
+def test_next_expected_run_for_interval_schedules():
+    job = {'job_id': 'fast', **schedules.parse_schedule('@every 10s jitter 5s')}
+    assert app.next_expected_run(job, NOW, NOW) == NOW + timedelta(seconds=10)
+    assert app.next_expected_run(job, None, NOW) == NOW + timedelta(seconds=10)
+    # Only the first missed interval after a run is alerted on
+    app.handled_through['fast'] = NOW + timedelta(seconds=10)
+    assert app.next_expected_run(job, NOW, NOW + timedelta(seconds=30)) is None
+    # Jitter extends the window before a run counts as missed
+    assert app.missed_after({**job, 'tolerance_minutes': 1}) == timedelta(seconds=65)
+
+
+def test_scheduler_keeps_one_live_deadline_per_key():
+    scheduler = DeadlineScheduler()
+    scheduler.arm('a', 'missed', utc(2024, 1, 1, 0, 5), payload='first')
+    scheduler.arm('a', 'missed', utc(2024, 1, 1, 0, 1), payload='second')
+    scheduler.arm('b', 'missed', utc(2024, 1, 1, 0, 3))
+    scheduler.arm('b', 'long_running', utc(2024, 1, 1, 0, 2))
+    scheduler.cancel('b', 'long_running')
+    assert len(scheduler) == 2
+    assert scheduler.deadline('a', 'missed') == utc(2024, 1, 1, 0, 1).timestamp()
+    assert scheduler.next_deadline() == utc(2024, 1, 1, 0, 1).timestamp()
+    assert scheduler.pop_due(utc(2024, 1, 1, 0, 4).timestamp()) == [('a', 'missed', 'second'), ('b', 'missed', None)]
+    assert scheduler.pop_due(utc(2024, 1, 2).timestamp()) == []
+    assert scheduler.next_deadline() is None
+
+
+def test_find_missed_runs_skips_jobs_that_cannot_miss():
+    job = {'job_id': 'find', 'schedule': HOURLY, 'paused': False, 'tolerance_minutes': 1, 'max_runtime_minutes': 10}
+    expected = utc(2024, 3, 1, 12)
+    (alert,), truncated = app.find_missed_runs([('find', expected)], {'find': job}, {}, NOW)
+    assert truncated == 0
+    assert (alert['alert_type'], alert['expected_start_time']) == (db.AlertType.MISSED_JOB, expected)
+    assert app.handled_through['find'] == expected
+
+    paused = {**job, 'paused': True}
+    assert app.find_missed_runs([('find', expected)], {'find': paused}, {}, NOW) == ([], 0)
+    assert app.find_missed_runs([('find', expected)], {'find': job}, {'find': utc(2024, 3, 1, 12, 1)}, NOW) == ([], 0)
+    # Deleted jobs are forgotten
+    assert app.find_missed_runs([('find', expected)], {}, {}, NOW) == ([], 0)
+    assert 'find' not in app.handled_through
+
+
+def test_find_missed_runs_catches_up_on_every_missed_run():
+    job = {'job_id': 'catch-up', 'schedule': HOURLY, 'paused': False, 'tolerance_minutes': 1, 'max_runtime_minutes': 10}
+    # Down since 7:00; the run started at 9:30 only covers 7:00 to 9:00
+    alerts, truncated = app.find_missed_runs([('catch-up', utc(2024, 3, 1, 7))], {'catch-up': job}, {'catch-up': utc(2024, 3, 1, 9, 30)}, NOW)
+    assert [alert['expected_start_time'].hour for alert in alerts] == [10, 11, 12]
+    assert truncated == 0
+    assert app.handled_through['catch-up'] == utc(2024, 3, 1, 12)
+
+
+def test_find_missed_runs_caps_the_catch_up(monkeypatch):
+    monkeypatch.setattr(app, 'CATCH_UP_MAX_RUNS', 2)
+    job = {'job_id': 'capped', 'schedule': HOURLY, 'paused': False, 'tolerance_minutes': 1, 'max_runtime_minutes': 10}
+    alerts, truncated = app.find_missed_runs([('capped', utc(2024, 2, 1))], {'capped': job}, {}, NOW)
+    # Only the latest runs are checked
+    assert [alert['expected_start_time'] for alert in alerts] == [utc(2024, 3, 1, 11), utc(2024, 3, 1, 12)]
+    assert truncated == 1
+    assert app.handled_through['capped'] == utc(2024, 3, 1, 12)
+
+
+def test_missed_deadline_alerts_once_and_rearms():
+    db.add_job('checker-missed', HOURLY, tolerance_minutes=1, max_runtime_minutes=10)
+    expected = datetime.now(pytz.UTC).replace(second=0, microsecond=0) - timedelta(minutes=10)
+    asyncio.run(app.on_deadlines([('checker-missed', app.MISSED_DEADLINE, expected)]))
+    assert alert_count('checker-missed') == 1
+    assert app.handled_through['checker-missed'] == expected
+    # Re-armed for the next fire time after the one just checked
+    assert app.scheduler.deadline('checker-missed', app.MISSED_DEADLINE) > expected.timestamp()
+
+    asyncio.run(app.on_deadlines([('checker-missed', app.MISSED_DEADLINE, expected)]))
+    assert alert_count('checker-missed') == 1
+
+
+def test_missed_deadline_ignores_jobs_that_ran():
+    db.add_job('checker-ran', HOURLY, tolerance_minutes=1, max_runtime_minutes=10)
+    expected = datetime.now(pytz.UTC) - timedelta(minutes=1)
+    db.record_job_start('checker-ran')
+    asyncio.run(app.on_deadlines([('checker-ran', app.MISSED_DEADLINE, expected)]))
+    assert alert_count('checker-ran') == 0
+    assert app.handled_through['checker-ran'] == expected
+
+
+def test_deadlines_within_the_grace_window_are_deferred(monkeypatch):
+    monkeypatch.setattr(app, 'checker_started', datetime.now(pytz.UTC))
+    db.add_job('checker-grace', HOURLY, tolerance_minutes=1, max_runtime_minutes=10)
+    expected = datetime.now(pytz.UTC) - timedelta(hours=2)
+    asyncio.run(app.on_deadlines([('checker-grace', app.MISSED_DEADLINE, expected)]))
+    assert alert_count('checker-grace') == 0
+    grace_end = app.checker_started + timedelta(seconds=app.CHECKER_GRACE_SECONDS)
+    assert app.scheduler.deadline('checker-grace', app.MISSED_DEADLINE) == grace_end.timestamp()
+
+
+def test_watermarks_are_persisted_for_the_next_checker():
+    db.add_job('checker-watermark', HOURLY, tolerance_minutes=1, max_runtime_minutes=10)
+    current_hour = datetime.now(pytz.UTC).replace(minute=0, second=0, microsecond=0)
+    expected = current_hour - timedelta(hours=3)
+    asyncio.run(app.on_deadlines([('checker-watermark', app.MISSED_DEADLINE, expected)]))
+    assert alert_count('checker-watermark') >= 3
+    assert app.handled_through['checker-watermark'] >= current_hour - timedelta(hours=1)
+    assert db.get_checked_through()['checker-watermark'] == app.handled_through['checker-watermark']
+
+
+def test_following_other_workers_arms_long_running_deadlines():
+    db.add_job('checker-foreign', HOURLY, tolerance_minutes=1, max_runtime_minutes=10)
+    # Started through another worker: nothing was armed here
+    run_id = db.record_job_start('checker-foreign')
+    (run,), _ = db.get_job_runs(run_ids=[run_id])
+    assert app.scheduler.deadline('checker-foreign', app.LONG_RUNNING_DEADLINE) is None
+
+    asyncio.run(app.follow_job_checks(configs_changed=False))
+    deadline = run['start_time'] + timedelta(minutes=10)
+    assert app.scheduler.deadline('checker-foreign', app.LONG_RUNNING_DEADLINE) == deadline.timestamp()
+
+
+def test_only_the_checker_arms_deadlines_for_runs(monkeypatch):
+    job = {'job_id': 'checker-follower', 'schedule': HOURLY, 'tolerance_minutes': 1, 'max_runtime_minutes': 10}
+    monkeypatch.setattr(type(app.checker_election), 'is_leader', False)
+    app.job_started(job, NOW)
+    assert len(app.scheduler) == 0
+
+    monkeypatch.setattr(type(app.checker_election), 'is_leader', True)
+    app.job_started(job, NOW)
+    assert app.scheduler.deadline('checker-follower', app.LONG_RUNNING_DEADLINE) == (NOW + timedelta(minutes=10)).timestamp()
+    monkeypatch.setattr(type(app.checker_election), 'is_leader', False)
+    app.job_ended('checker-follower')
+    assert app.scheduler.deadline('checker-follower', app.LONG_RUNNING_DEADLINE) is not None
@@ -0,0 +1,42 @@
+import database as db
+
+
+def client_info(timestamp, **metadata):
+    info = {
+        'ip_address': '10.0.0.7',
+        'hostname': 'agent-1',
+        'additional_info': {
+            'timestamp': timestamp,
+            'headers': {'User-Agent': 'cron/1.0', 'X-Request-Id': timestamp},
+        },
+    }
+    if metadata:
+        info['custom_metadata'] = metadata
+    return info
+
+
+def client_rows():
+    with db.get_db() as conn:
+        return conn.execute('SELECT COUNT(*) FROM clients').fetchone()[0]
+
+
+def test_split_client_info_drops_per_request_fields():
+    client, metadata = db.split_client_info(client_info('t1', batch=3))
+    assert client['additional_info'] == {'headers': {'User-Agent': 'cron/1.0'}}
+    assert metadata == {'batch': 3}
+    assert db.split_client_info(client_info('t2'))[0] == client
+    assert db.split_client_info(None) == (None, None)
+
+
+def test_runs_from_one_agent_share_a_client_row():
+    db.add_job('clients-job', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    before = client_rows()
+    first = db.record_job_start('clients-job', client_info('t1', attempt=1))
+    second = db.record_job_start('clients-job', client_info('t2', attempt=2))
+    assert client_rows() == before + 1
+
+    runs, _ = db.get_job_runs(limit=2, run_ids=[first, second])
+    by_id = {run['id']: run['client_info'] for run in runs}
+    assert by_id[first]['hostname'] == by_id[second]['hostname'] == 'agent-1'
+    assert by_id[first]['custom_metadata'] == {'attempt': 1}
+    assert by_id[second]['custom_metadata'] == {'attempt': 2}
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytz
+from fastapi.testclient import TestClient
+
+import app
+import database as db
+
+client = TestClient(app.app)
+
+
+def test_unchanged_data_is_not_modified():
+    db.add_job('etag-job', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    for path in ('/jobs', '/job_alerts', '/job_runs'):
+        response = client.get(path)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert etag.startswith('W/"')
+
+        response = client.get(path, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert not response.content
+
+
+def test_writes_change_the_etag():
+    response = client.get('/job_alerts')
+    etag = response.headers['ETag']
+    db.add_job_alert('etag-job', db.AlertType.LONG_RUNNING, 'slow', actual_start_time=datetime.now(pytz.UTC))
+
+    response = client.get('/job_alerts', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert any(alert['job_id'] == 'etag-job' for alert in response.json())
+
+
+def test_if_none_match_lists_and_wildcards():
+    etag = client.get('/job_runs').headers['ETag']
+    assert client.get('/job_runs', headers={'If-None-Match': f'W/"other", {etag}'}).status_code == 304
+    assert client.get('/job_runs', headers={'If-None-Match': '*'}).status_code == 304
+    assert client.get('/job_runs', headers={'If-None-Match': 'W/"other"'}).status_code == 200
+
+
+def test_etags_depend_on_the_query():
+    first = client.get('/job_runs?per_page=5&job_id=etag-job').headers['ETag']
+    assert client.get('/job_runs?job_id=etag-job&per_page=5').headers['ETag'] == first
+    assert client.get('/job_runs?per_page=6&job_id=etag-job', headers={'If-None-Match': first}).status_code == 200
+    for path, query in (('/incidents', 'limit=5'), ('/jobs/stats', 'since=2024-01-01T00:00:00Z')):
+        assert client.get(path).headers['ETag'] != client.get(f'{path}?{query}').headers['ETag']
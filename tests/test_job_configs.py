@@ -0,0 +1,30 @@
+import pytest
+
+import database as db
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = db.JobConfigRegistry()
+    monkeypatch.setattr(db, 'job_configs', registry)
+    return registry
+
+
+def test_lookups_are_served_from_memory(registry):
+    db.add_job('registry-job', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    assert db.get_job_config('registry-job')['schedule'] == '0 * * * *'
+    assert db.get_job_config('registry-unknown') is None
+    stats = registry.stats()
+    assert stats['misses'] == 1 and stats['hits'] == 1
+
+
+def test_writes_update_cached_configs(registry):
+    db.add_job('registry-update', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    db.get_all_job_configs()
+    db.update_job_pause_status('registry-update', True)
+    assert db.get_job_config('registry-update')['paused']
+    db.record_job_start('registry-update')
+    assert db.get_job_config('registry-update')['last_start_time']
+    db.delete_job('registry-update')
+    assert db.get_job_config('registry-update') is None
+    assert registry.stats()['misses'] == 1
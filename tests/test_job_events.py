@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytz
+from fastapi.testclient import TestClient
+
+import app
+import database as db
+from scheduler import DeadlineScheduler
+
+client = TestClient(app.app)
+
+
+def runs(job_id):
+    with db.get_db() as conn:
+        return conn.execute(
+            'SELECT start_time, end_time FROM job_runs WHERE job_id = ? ORDER BY id', (job_id,)
+        ).fetchall()
+
+
+def test_invalid_events_are_reported_without_affecting_the_rest():
+    db.add_job('batch-job', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    db.add_job('batch-paused', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    db.update_job_pause_status('batch-paused', True)
+    db.add_job('batch-health', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=0)
+    started = datetime.now(pytz.UTC) - timedelta(minutes=5)
+
+    response = client.post('/jobs/batch', json=[
+        {'job_id': 'batch-job', 'event': 'start', 'timestamp': started.isoformat()},
+        {'job_id': 'batch-missing', 'event': 'start'},
+        {'job_id': 'batch-paused', 'event': 'start'},
+        {'job_id': 'batch-health', 'event': 'end'},
+        {'job_id': 'batch-job', 'event': 'end'},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['accepted'], body['rejected']) == (2, 3)
+    assert [result['status'] for result in body['results']] == ['ok', 'error', 'error', 'error', 'ok']
+    assert 'not found' in body['results'][1]['detail']
+    assert 'paused' in body['results'][2]['detail']
+
+    ((start_time, end_time),) = runs('batch-job')
+    assert start_time and end_time
+    assert runs('batch-paused') == [] and runs('batch-health') == []
+
+
+def test_oversized_batches_are_refused(monkeypatch):
+    monkeypatch.setattr(app, 'MAX_BATCH_EVENTS', 1)
+    response = client.post('/jobs/batch', json=[{'job_id': 'a', 'event': 'start'}] * 2)
+    assert response.status_code == 400
+
+
+def test_heartbeat_records_one_completed_run_and_closes_open_ones():
+    db.add_job('heartbeat-job', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=0)
+    left_open = db.record_job_start('heartbeat-job')
+    count = db.count_job_runs('heartbeat-job')
+
+    run_id, *closed = db.record_heartbeat('heartbeat-job', {'hostname': 'pinger'})
+    assert closed == [left_open]
+    assert db.count_job_runs('heartbeat-job') == count + 1
+    assert all(end_time for _, end_time in runs('heartbeat-job'))
+    (ping,), _ = db.get_job_runs(run_ids=[run_id])
+    assert ping['start_time'] == ping['end_time'] and ping['is_health_check']
+    assert ping['client_info']['hostname'] == 'pinger'
+    job = db.get_job_config('heartbeat-job')
+    assert job['last_start_time'] == job['last_end_time']
+
+
+def test_events_from_the_future_or_before_their_run_are_rejected():
+    db.add_job('batch-clock', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    now = datetime.now(pytz.UTC)
+    started = now - timedelta(minutes=5)
+
+    response = client.post('/jobs/batch', json=[
+        {'job_id': 'batch-clock', 'event': 'start', 'timestamp': started.isoformat()},
+        {'job_id': 'batch-clock', 'event': 'end', 'timestamp': (started - timedelta(minutes=1)).isoformat()},
+        {'job_id': 'batch-clock', 'event': 'end', 'timestamp': (now + timedelta(hours=1)).isoformat()},
+        {'job_id': 'batch-clock', 'event': 'end', 'timestamp': now.isoformat()},
+    ])
+    body = response.json()
+    assert (body['accepted'], body['rejected']) == (2, 2)
+    assert [result['status'] for result in body['results']] == ['ok', 'error', 'error', 'ok']
+    assert 'started after' in body['results'][1]['detail']
+    assert 'future' in body['results'][2]['detail']
+    ((start_time, end_time),) = runs('batch-clock')
+    assert db.from_db_datetime(end_time) == now
+
+
+def test_backdated_starts_do_not_move_the_deadlines_back(monkeypatch):
+    monkeypatch.setattr(app, 'scheduler', DeadlineScheduler())
+    monkeypatch.setattr(type(app.checker_election), 'is_leader', True)
+    db.add_job('batch-backdated', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    now = datetime.now(pytz.UTC)
+
+    client.post('/jobs/batch', json=[
+        {'job_id': 'batch-backdated', 'event': 'start', 'timestamp': now.isoformat()},
+        {'job_id': 'batch-backdated', 'event': 'start', 'timestamp': (now - timedelta(hours=2)).isoformat()},
+    ])
+    deadline = app.scheduler.deadline('batch-backdated', app.LONG_RUNNING_DEADLINE)
+    assert deadline == (now + timedelta(minutes=30)).timestamp()
+    assert db.from_db_datetime(db.get_job_config('batch-backdated')['last_start_time']) == now
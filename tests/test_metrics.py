@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+
+import app
+import metrics
+
+client = TestClient(app.app)
+
+
+def test_render_uses_the_text_exposition_format():
+    registry = metrics.Registry()
+    counter = registry.register(metrics.Counter('test_events_total', 'Events', ('kind',)))
+    histogram = registry.register(metrics.Histogram('test_seconds', 'Latency', buckets=(0.1, 1.0)))
+    counter.labels('a"b').inc(2)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(3)
+    assert registry.render().splitlines() == [
+        '# HELP test_events_total Events',
+        '# TYPE test_events_total counter',
+        'test_events_total{kind="a\\"b"} 2',
+        '# HELP test_seconds Latency',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        'test_seconds_sum 3.55',
+        'test_seconds_count 3',
+    ]
+
+
+def test_metrics_endpoint_reports_requests_by_route():
+    client.get('/jobs/metrics-unknown/stats')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    body = response.text
+    assert '# TYPE cronicle_http_request_duration_seconds histogram' in body
+    assert 'cronicle_http_request_duration_seconds_count{method="GET",route="/jobs/{job_id}/stats"} ' in body
+    assert 'cronicle_write_queue_depth ' in body
+
+
+def test_totals_are_counters_and_unknown_methods_share_a_label():
+    client.request('BREW', '/metrics')
+    body = client.get('/metrics').text
+    assert '# TYPE cronicle_write_commits_total counter' in body
+    assert '# TYPE cronicle_cache_hits_total counter' in body
+    assert 'method="other"' in body
+    assert 'method="BREW"' not in body
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from fastapi.testclient import TestClient
+
+import app
+import database as db
+
+JOB_ID = 'pagination-test'
+START = datetime(2024, 1, 1, tzinfo=pytz.UTC)
+
+
+@pytest.fixture(scope='module')
+def run_ids():
+    # Every third run shares its start time with the one before, so pages
+    # must break ties on the run id
+    times = []
+    for i in range(25):
+        times.append(times[-1] if i % 3 == 2 else START + timedelta(minutes=i))
+
+    def _write(cursor):
+        ids = []
+        for start_time in times:
+            cursor.execute('INSERT INTO job_runs (job_id, start_time) VALUES (?, ?)', (JOB_ID, start_time.isoformat()))
+            ids.append(cursor.lastrowid)
+        return ids
+    ids = db.execute_write(_write)
+    # Newest first, as pages are ordered
+    return [run_id for _, run_id in sorted(zip(times, ids), reverse=True)]
+
+
+@pytest.mark.parametrize('limit', [1, 4, 10, 25, 50])
+def test_pages_cover_every_run_once(run_ids, limit):
+    seen = []
+    cursor = None
+    while True:
+        runs, cursor = db.get_job_runs(limit=limit, cursor=cursor, job_id=JOB_ID)
+        assert len(runs) <= limit
+        seen.extend(run['id'] for run in runs)
+        if cursor is None:
+            break
+        assert len(runs) == limit
+    assert seen == run_ids
+
+
+def test_last_full_page_has_no_cursor(run_ids):
+    runs, cursor = db.get_job_runs(limit=len(run_ids), job_id=JOB_ID)
+    assert len(runs) == len(run_ids)
+    assert cursor is None
+
+
+def test_time_range_is_half_open(run_ids):
+    runs, _ = db.get_job_runs(
+        limit=100, job_id=JOB_ID, since=START + timedelta(minutes=3), until=START + timedelta(minutes=6)
+    )
+    assert [run['start_time'] for run in runs] == [START + timedelta(minutes=minute) for minute in (4, 4, 3)]
+
+
+def test_run_counts_are_maintained(run_ids):
+    assert db.count_job_runs(JOB_ID) == len(run_ids)
+    assert db.count_job_runs() >= len(run_ids)
+
+
+def test_cursor_round_trip():
+    cursor = db.encode_run_cursor('2024-01-01T00:00:00+00:00', 42)
+    assert db.decode_run_cursor(cursor) == ('2024-01-01T00:00:00+00:00', 42)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!', 'e30', db.encode_run_cursor('x', 1)[:-3], 'WzEsMl0',  # '{}', truncated, '[1,2]'
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        db.decode_run_cursor(cursor)
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        db.get_job_runs(cursor=cursor)
+
+
+def test_invalid_cursor_is_a_bad_request(run_ids):
+    client = TestClient(app.app)
+    response = client.get('/job_runs', params={'job_id': JOB_ID, 'cursor': 'not base64!'})
+    assert response.status_code == 400
+
+    response = client.get('/job_runs', params={'job_id': JOB_ID, 'per_page': 10})
+    assert response.status_code == 200
+    page = response.json()
+    assert page['total'] == len(run_ids)
+    response = client.get('/job_runs', params={'job_id': JOB_ID, 'per_page': 10, 'cursor': page['next_cursor']})
+    assert response.status_code == 200
+    assert [run['id'] for run in page['runs'] + response.json()['runs']] == run_ids[:20]
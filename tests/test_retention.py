@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from fastapi.testclient import TestClient
+
+import app
+import database as db
+import retention
+
+NOW = datetime.now(pytz.UTC).replace(minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture(autouse=True)
+def retention_on(monkeypatch):
+    monkeypatch.setattr(retention, 'RUN_RETENTION_DAYS', 1)
+    monkeypatch.setattr(retention, 'HOURLY_ROLLUP_RETENTION_DAYS', 30)
+
+
+def add_runs(job_id, starts, duration=timedelta(seconds=30)):
+    events = []
+    for start in starts:
+        events.append({'job_id': job_id, 'event': 'start', 'timestamp': start, 'client_info': {}})
+        events.append({'job_id': job_id, 'event': 'end', 'timestamp': start + duration, 'client_info': None})
+    db.record_job_events(events)
+
+
+def test_expired_runs_are_rolled_up_and_deleted():
+    db.add_job('retention-job', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    old = NOW - timedelta(days=2)
+    add_runs('retention-job', [old, old + timedelta(minutes=10), old + timedelta(hours=1), NOW - timedelta(minutes=5)])
+    assert db.count_job_runs('retention-job') == 4
+
+    result = asyncio.run(retention.apply_retention(NOW))
+    assert result['runs_rolled_up'] == 3
+    # Rolled-up runs still count
+    assert db.count_job_runs('retention-job') == 4
+
+    rollups = db.get_job_run_rollups('retention-job')
+    assert [(rollup['bucket_start'], rollup['run_count'], rollup['late_count']) for rollup in rollups] == [
+        (old + timedelta(hours=1), 1, 0),
+        (old, 2, 1),
+    ]
+    assert rollups[1]['duration_mean'] == 0.5  # minutes
+    # Nothing left to do
+    assert asyncio.run(retention.apply_retention(NOW))['runs_rolled_up'] == 0
+
+
+def test_old_hourly_rollups_are_compacted_into_days():
+    db.add_job('retention-compact', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    day = (NOW - timedelta(days=40)).replace(hour=0)
+    add_runs('retention-compact', [day + timedelta(hours=3), day + timedelta(hours=9)])
+
+    result = asyncio.run(retention.apply_retention(NOW))
+    assert result['rollups_compacted'] == 2
+    (rollup,) = db.get_job_run_rollups('retention-compact')
+    assert (rollup['granularity'], rollup['bucket_start'], rollup['run_count']) == ('day', day, 2)
+
+
+def test_history_lists_rollups_after_the_runs_they_replaced():
+    db.add_job('retention-history', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    old = NOW - timedelta(days=3)
+    recent = [NOW - timedelta(minutes=minutes) for minutes in (5, 10, 15)]
+    add_runs('retention-history', [old + timedelta(hours=hour) for hour in range(4)] + recent)
+    asyncio.run(retention.apply_retention(NOW))
+
+    client = TestClient(app.app)
+    entries = []
+    cursor = None
+    while True:
+        params = {'job_id': 'retention-history', 'per_page': 2}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get('/job_runs', params=params).json()
+        assert len(page['runs']) + len(page['rollups']) <= 2
+        assert page['total'] == 7
+        entries += [run['start_time'] for run in page['runs']]
+        entries += [(rollup['bucket_start'], rollup['run_count']) for rollup in page['rollups']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert len(entries) == 7
+    assert [entry[1] for entry in entries[3:]] == [1, 1, 1, 1]
+    assert [datetime.fromisoformat(entry[0]) for entry in entries[3:]] == [old + timedelta(hours=hour) for hour in (3, 2, 1, 0)]
+
+    # A range crossing the retention cutoff merges both; one inside it has runs only
+    page = client.get('/job_runs', params={
+        'job_id': 'retention-history', 'per_page': 10, 'until': (NOW - timedelta(minutes=7)).isoformat()
+    }).json()
+    assert (len(page['runs']), len(page['rollups']), page['next_cursor']) == (2, 4, None)
+    page = client.get('/job_runs', params={
+        'job_id': 'retention-history', 'per_page': 10, 'since': (NOW - timedelta(days=1)).isoformat()
+    }).json()
+    assert (len(page['runs']), page['rollups']) == (3, [])
+
+
+def test_stats_include_rolled_up_runs():
+    db.add_job('retention-stats', '0 * * * *', tolerance_minutes=5, max_runtime_minutes=30)
+    old = NOW - timedelta(days=3)
+    add_runs('retention-stats', [old, old + timedelta(hours=1), NOW - timedelta(minutes=5)], duration=timedelta(minutes=2))
+    asyncio.run(retention.apply_retention(NOW))
+
+    client = TestClient(app.app)
+    assert client.get('/jobs/retention-stats/stats').json()['duration']['count'] == 3
+    crossing = client.get('/jobs/retention-stats/stats', params={'since': (old - timedelta(hours=1)).isoformat()}).json()
+    assert crossing['duration']['count'] == 3
+    assert crossing['duration']['mean'] == 2
+
+
+def test_retention_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(retention, 'RUN_RETENTION_DAYS', 0)
+    assert asyncio.run(retention.apply_retention(NOW)) == {'runs_rolled_up': 0, 'rollups_compacted': 0}
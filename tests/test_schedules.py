@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from croniter import croniter
+
+import schedules
+from schedules import CompiledSchedule, ScheduleCache, fixed_period, parse_schedule
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=pytz.UTC)
+
+
+def croniter_prev(expression, before):
+    return croniter(expression, before).get_prev(datetime).astimezone(pytz.UTC)
+
+
+def croniter_next(expression, after):
+    return croniter(expression, after).get_next(datetime).astimezone(pytz.UTC)
+
+
+@pytest.mark.parametrize('expression', ['*/5 * * * *', '30 * * * *', '0 9 * * 1-5', '15 4 1 * *'])
+def test_lookups_match_croniter(expression):
+    schedule = CompiledSchedule(expression)
+    # Walk forward, back and across the precomputed window
+    when = utc(2024, 2, 26, 7, 3)
+    for step in [7, 7, 7, -30, 600, -1, 4000, 5, -9000]:
+        when += timedelta(minutes=step)
+        assert schedule.prev_fire(when) == croniter_prev(expression, when)
+        assert schedule.next_fire(when) == croniter_next(expression, when)
+
+
+def test_lookups_are_strict_on_fire_times():
+    schedule = CompiledSchedule('0 * * * *')
+    assert schedule.prev_fire(utc(2024, 1, 1, 5)) == utc(2024, 1, 1, 4)
+    assert schedule.next_fire(utc(2024, 1, 1, 5)) == utc(2024, 1, 1, 6)
+
+
+def test_lookups_convert_to_utc():
+    eastern = pytz.timezone('US/Eastern').localize(datetime(2024, 1, 1, 7, 30))
+    assert schedules.next_fire('0 * * * *', eastern) == utc(2024, 1, 1, 13)
+
+
+def test_invalid_expressions_are_rejected():
+    with pytest.raises(ValueError):
+        CompiledSchedule('61 * * * *')
+    with pytest.raises(ValueError):
+        schedules.prev_fire('not a schedule', utc(2024, 1, 1))
+
+
+def croniter_times(expression, since, until):
+    """Every fire time from since to until, inclusive, the slow way"""
+    cron = croniter(expression, since - timedelta(microseconds=1))
+    times = []
+    while True:
+        fire_time = cron.get_next(datetime).astimezone(pytz.UTC)
+        if fire_time > until:
+            return times
+        times.append(fire_time)
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('* * * * *', (60, 0)),
+    ('*/5 * * * *', (300, 0)),
+    ('30 * * * *', (3600, 1800)),
+    ('0 */6 * * *', (21600, 0)),
+    ('15 4 * * *', (86400, 4 * 3600 + 15 * 60)),
+    ('*/7 * * * *', None),     # 7 does not divide the hour
+    ('*/5 9 * * *', None),     # only during one hour
+    ('0 9 * * 1-5', None),     # weekdays
+    ('0 0 1 * *', None),
+    ('0 */5 * * *', None),     # 5 does not divide the day
+])
+def test_fixed_period(expression, expected):
+    assert fixed_period(expression) == expected
+
+
+@pytest.mark.parametrize('expression', [
+    '*/5 * * * *', '30 * * * *', '0 */6 * * *', '15 4 * * *', '0 9 * * 1-5', '*/7 * * * *',
+])
+def test_fire_times_match_croniter(expression):
+    since, until = utc(2024, 2, 26, 7, 3), utc(2024, 3, 4, 11, 30)
+    times, truncated = CompiledSchedule(expression).fire_times(since, until, 100000)
+    assert times == croniter_times(expression, since, until)
+    assert not truncated
+
+
+@pytest.mark.parametrize('expression', ['*/5 * * * *', '0 9 * * 1-5'])
+def test_fire_times_keeps_the_latest_when_truncated(expression):
+    since, until = utc(2024, 1, 1), utc(2024, 1, 31)
+    everything = croniter_times(expression, since, until)
+    times, truncated = CompiledSchedule(expression).fire_times(since, until, 3)
+    assert truncated
+    assert times == everything[-3:]
+
+
+def test_fire_times_bounds_are_inclusive():
+    schedule = CompiledSchedule('*/5 * * * *')
+    times, truncated = schedule.fire_times(utc(2024, 1, 1, 0, 0), utc(2024, 1, 1, 0, 30), 7)
+    assert times == [utc(2024, 1, 1, 0, minute) for minute in range(0, 31, 5)]
+    assert not truncated
+
+
+def test_fire_times_empty_ranges():
+    schedule = CompiledSchedule('0 * * * *')
+    assert schedule.fire_times(utc(2024, 1, 1, 0, 1), utc(2024, 1, 1, 0, 59), 10) == ([], False)
+    assert schedule.fire_times(utc(2024, 1, 2), utc(2024, 1, 1), 10) == ([], False)
+    # A limit of 0 reports that there were times to return
+    assert schedule.fire_times(utc(2024, 1, 1), utc(2024, 1, 1, 5), 0) == ([], True)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ScheduleCache(maxsize=2)
+    first = cache.get('0 * * * *')
+    cache.get('30 * * * *')
+    assert cache.get('0 * * * *') is first
+    cache.get('15 * * * *')
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 1, 'misses': 3}
+    # '30 * * * *' was evicted and is parsed again
+    cache.get('30 * * * *')
+    assert cache.stats()['misses'] == 4
+    assert cache.get('15 * * * *') is not None
+    assert cache.stats()['hits'] == 2
+
+
+@pytest.mark.parametrize('text, schedule, interval, jitter', [
+    ('@every 10s', '@every 10s', 10, 0),
+    ('@every 90s', '@every 1m30s', 90, 0),
+    ('@every 1h30m', '@every 1h30m', 5400, 0),
+    ('@every 5m jitter 30s', '@every 5m jitter 30s', 300, 30),
+    ('  @every   1d  ', '@every 1d', 86400, 0),
+    # Sub-minute cron expressions with a leading seconds field
+    ('*/10 * * * * *', '@every 10s', 10, 0),
+    ('*/45 * * * * *', '@every 45s', 45, 0),
+])
+def test_parse_interval_schedules(text, schedule, interval, jitter):
+    assert parse_schedule(text) == {
+        'schedule': schedule,
+        'schedule_kind': schedules.INTERVAL,
+        'interval_seconds': interval,
+        'jitter_seconds': jitter,
+    }
+
+
+@pytest.mark.parametrize('text, schedule', [
+    ('0 * * * *', '0 * * * *'),
+    ('*/3 * * * *', '*/3 * * * *'),
+    (' 0  9 * * 1-5 ', '0 9 * * 1-5'),
+])
+def test_parse_cron_schedules(text, schedule):
+    assert parse_schedule(text) == {
+        'schedule': schedule,
+        'schedule_kind': schedules.CRON,
+        'interval_seconds': None,
+        'jitter_seconds': None,
+    }
+
+
+@pytest.mark.parametrize('text', [
+    '@every', '@every 10x', '@every 0s', '@every 5m jitter', '@every 5m after 30s',
+    'not a schedule', '61 * * * *',
+])
+def test_parse_schedule_rejects_invalid_text(text):
+    with pytest.raises(ValueError):
+        parse_schedule(text)
+
+
+def test_interval_fire_times_count_from_the_anchor():
+    schedule = schedules.IntervalSchedule(60, jitter=15)
+    anchor = utc(2024, 1, 1, 0, 0, 10)
+    assert schedule.next_fire(utc(2024, 1, 1, 0, 2, 30), anchor) == utc(2024, 1, 1, 0, 3, 10)
+    assert schedule.prev_fire(utc(2024, 1, 1, 0, 2, 30), anchor) == utc(2024, 1, 1, 0, 2, 10)
+    assert schedule.prev_fire(anchor, anchor) is None
+    # Without an anchor the interval counts from `after`
+    assert schedule.next_fire(anchor) == utc(2024, 1, 1, 0, 1, 10)
@@ -0,0 +1,57 @@
+import random
+import statistics
+
+from sketches import SKETCH_RELATIVE_ACCURACY, DurationSketch, DurationStats
+
+_random = random.Random(7)
+VALUES = [_random.lognormvariate(1, 1.5) for _ in range(5000)]
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def stats_of(values):
+    stats = DurationStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    sketch = DurationSketch()
+    for value in VALUES:
+        sketch.add(value)
+    for q in (0.0, 0.25, 0.5, 0.95, 0.99, 1.0):
+        exact = exact_quantile(VALUES, q)
+        assert abs(sketch.quantile(q) - exact) <= exact * SKETCH_RELATIVE_ACCURACY
+    assert DurationSketch().quantile(0.5) is None
+
+
+def test_merged_sketches_equal_the_sketch_of_the_union():
+    first, second, whole = DurationSketch(), DurationSketch(), DurationSketch()
+    for index, value in enumerate(VALUES + [0.0]):
+        (first if index % 3 else second).add(value)
+        whole.add(value)
+    merged = first.merge(second)
+    assert (merged.zero_count, merged.buckets) == (whole.zero_count, whole.buckets)
+    assert DurationSketch.from_bytes(merged.to_bytes()).buckets == whole.buckets
+    assert DurationSketch.from_bytes(None).count == 0
+
+
+def test_merged_stats_match_the_whole():
+    merged = stats_of(VALUES[:1234]).merge(stats_of(VALUES[1234:])).merge(DurationStats())
+    assert merged.count == len(VALUES)
+    assert abs(merged.mean - statistics.fmean(VALUES)) < 1e-9
+    assert abs(merged.variance - statistics.variance(VALUES)) < 1e-6 * statistics.variance(VALUES)
+    assert (merged.min, merged.max) == (min(VALUES), max(VALUES))
+    summary = merged.summary()
+    assert summary['min'] <= summary['p50'] <= summary['p95'] <= summary['p99'] <= summary['max']
+
+
+def test_empty_stats_summary():
+    summary = DurationStats().summary()
+    assert summary['count'] == 0
+    assert all(summary[key] is None for key in ('mean', 'stddev', 'min', 'max', 'p50'))
+    assert stats_of([3.0]).summary()['stddev'] is None
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+import database as db
+
+
+@pytest.fixture
+def writer(tmp_path):
+    pool = db.ConnectionPool(tmp_path / 'queue.db', size=1)
+    # Operations queued together are committed together
+    writer = db.WriteQueue(pool, max_delay=0.1)
+    writer.execute(lambda cursor: cursor.execute('CREATE TABLE items (name TEXT PRIMARY KEY)'))
+    yield writer
+    writer.close()
+    pool.close()
+
+
+def names(writer):
+    return writer.execute(lambda cursor: [row[0] for row in cursor.execute('SELECT name FROM items ORDER BY name')])
+
+
+def insert(name, fail=False):
+    def op(cursor):
+        cursor.execute('INSERT INTO items (name) VALUES (?)', (name,))
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        return name
+    return op
+
+
+def test_failing_operation_does_not_affect_its_batch(writer):
+    # Hold the writer inside one operation so the next three queue up and
+    # are committed together
+    running, release = threading.Event(), threading.Event()
+
+    def block(cursor):
+        running.set()
+        return release.wait(5)
+
+    blocker = writer.submit(block)
+    assert running.wait(5)
+    first = writer.submit(insert('a'))
+    failing = writer.submit(insert('b', fail=True))
+    last = writer.submit(insert('c'))
+    release.set()
+
+    assert blocker.result(5)
+    assert first.result(5) == 'a'
+    assert last.result(5) == 'c'
+    with pytest.raises(RuntimeError, match='b failed'):
+        failing.result(5)
+    assert names(writer) == ['a', 'c']
+
+
+def test_constraint_violation_rolls_back_only_that_operation(writer):
+    writer.execute(insert('x'))
+
+    def duplicate(cursor):
+        cursor.execute("INSERT INTO items (name) VALUES ('y')")
+        cursor.execute("INSERT INTO items (name) VALUES ('x')")
+
+    with pytest.raises(db.sqlite3.IntegrityError):
+        writer.execute(duplicate)
+    assert names(writer) == ['x']
+
+
+def test_nested_write_runs_in_place(writer):
+    def outer(cursor):
+        cursor.execute("INSERT INTO items (name) VALUES ('outer')")
+        return writer.execute(lambda inner: inner.execute('SELECT COUNT(*) FROM items').fetchone()[0])
+
+    assert writer.execute(outer) == 1
+
+
+def test_version_counts_commits(writer):
+    version = writer.version
+    writer.execute(insert('v'))
+    writer.execute(insert('w'))
+    assert writer.version == version + 2
+
+
+def test_unversioned_commits_leave_the_version(writer):
+    version, commits = writer.version, writer.commits
+
+    def bookkeeping(cursor):
+        writer.unversioned()
+        return insert('lease')(cursor)
+
+    writer.execute(bookkeeping)
+    assert (writer.version, writer.commits) == (version, commits + 1)
+
+
+def test_after_commit_callbacks_run_only_for_committed_operations(writer):
+    called = []
+
+    def op(name, fail=False):
+        def run(cursor):
+            writer.after_commit(lambda: called.append(name))
+            return insert(name, fail)(cursor)
+        return run
+
+    writer.execute(op('kept'))
+    with pytest.raises(RuntimeError):
+        writer.execute(op('dropped', fail=True))
+    assert called == ['kept']
+    with pytest.raises(RuntimeError):
+        writer.after_commit(lambda: None)
+
+
+def test_lone_writes_are_not_delayed(tmp_path):
+    pool = db.ConnectionPool(tmp_path / 'lone.db', size=1)
+    writer = db.WriteQueue(pool, max_delay=5)
+    writer.execute(lambda cursor: cursor.execute('CREATE TABLE items (name TEXT PRIMARY KEY)'))
+    started = time.monotonic()
+    writer.execute(insert('alone'))
+    assert time.monotonic() - started < 1
+    writer.close()
+    pool.close()
+
+
+def test_close_flushes_pending_operations(tmp_path):
+    pool = db.ConnectionPool(tmp_path / 'close.db', size=1)
+    writer = db.WriteQueue(pool, max_delay=0.1)
+    writer.execute(lambda cursor: cursor.execute('CREATE TABLE items (name TEXT PRIMARY KEY)'))
+    pending = [writer.submit(insert(name)) for name in 'abc']
+    writer.close()
+    assert [future.result(0) for future in pending] == ['a', 'b', 'c']
+    with pool.reader() as conn:
+        assert [row[0] for row in conn.execute('SELECT name FROM items ORDER BY name')] == ['a', 'b', 'c']
+    pool.close()